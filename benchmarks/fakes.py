@@ -0,0 +1,209 @@
+"""Stand-ins for external services so benchmarks run offline and repeatably."""
+import re
+import time
+import zlib
+import asyncio
+import random
+import threading
+from typing import List, Dict, Any, Optional
+
+import numpy as np
+
+from unified_llm.storage.embeddings import EmbeddingService
+
+class FakeLLMClient:
+    """Drop-in for LLMClient with configurable latency and error rate.
+
+    Extraction prompts get one "[idx] Fact: ... Category: ..." line per
+    message that looks fact-bearing, so MemoryExtractor produces facts.
+    Errors are reported the way LLMClient reports them: as the string "None".
+    """
+
+    _MESSAGE_RE = re.compile(r"\[(\d+)\] Context: .*? \| User: (.*?)\.\.\.(?=\n|$)", re.DOTALL)
+    _FACT_HINTS = ("I prefer", "I'm currently", "My name", "I live", "My goal", "I always")
+
+    def __init__(self, latency: float = 0.05, jitter: float = 0.0, error_rate: float = 0.0, seed: int = 0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.model = "fake-llm"
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.prompt_chars = 0
+
+    def _delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self._rng.uniform(-self.jitter, self.jitter))
+
+    def _respond(self, messages: Any) -> str:
+        prompt = messages if isinstance(messages, str) else "\n".join(m["content"] for m in messages)
+        with self._lock:
+            self.calls += 1
+            self.prompt_chars += len(prompt)
+            if self._rng.random() < self.error_rate:
+                self.errors += 1
+                return "None"
+
+        lines = []
+        for idx, text in self._MESSAGE_RE.findall(prompt):
+            if text.startswith(self._FACT_HINTS):
+                lines.append(f"[{idx}] Fact: {text.strip().rstrip('.')}. Category: preference")
+        if lines:
+            return "\n".join(lines)
+        return '{"bio": "Synthetic user.", "traits": {}, "key_themes": []}'
+
+    async def generate_async(self, messages: Any) -> str:
+        await asyncio.sleep(self._delay())
+        return self._respond(messages)
+
+    def generate(self, messages: Any) -> str:
+        time.sleep(self._delay())
+        return self._respond(messages)
+
+class HashingEmbeddingService(EmbeddingService):
+    """Deterministic bag-of-words embeddings; used when the real model is unavailable.
+
+    Tokens are bucketed by CRC-32, not hash(), which is salted per process,
+    so vectors are identical from run to run.
+    """
+
+    def __init__(self, dimension: int = 384):
+        self.dimension = dimension
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        out = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for token in text.lower().split():
+                out[i, zlib.crc32(token.encode('utf-8')) % self.dimension] += 1.0
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        out /= norms
+        return out
+
+class FakePineconeIndex:
+    """In-process stand-in for a Pinecone Index handle.
+
+    Supports the calls VectorStore makes: upsert, query, fetch,
+    list_paginated, delete and describe_index_stats, each namespace-aware. Optional latency simulates
+    the network round-trip.
+    """
+
+    def __init__(self, dimension: int = 384, latency: float = 0.0):
+        self.dimension = dimension
+        self.latency = latency
+        self._namespaces: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def _ns(self, namespace: str) -> Dict[str, Any]:
+        return self._namespaces.setdefault(namespace or "", {"ids": [], "rows": {}, "vectors": [], "meta": []})
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def upsert(self, vectors: List[Dict[str, Any]], namespace: str = "", **kwargs):
+        self._sleep()
+        with self._lock:
+            ns = self._ns(namespace)
+            for v in vectors:
+                values = np.asarray(v["values"], dtype=np.float32)
+                row = ns["rows"].get(v["id"])
+                if row is None:
+                    ns["rows"][v["id"]] = len(ns["ids"])
+                    ns["ids"].append(v["id"])
+                    ns["vectors"].append(values)
+                    ns["meta"].append(v.get("metadata") or {})
+                else:
+                    ns["vectors"][row] = values
+                    ns["meta"][row] = v.get("metadata") or {}
+                ns.pop("matrix", None)
+        return {"upserted_count": len(vectors)}
+
+    def query(self, vector: List[float], top_k: int = 10, include_metadata: bool = False,
+              include_values: bool = False, namespace: str = "", filter: Optional[Dict] = None, **kwargs):
+        self._sleep()
+        with self._lock:
+            ns = self._ns(namespace)
+            if not ns["ids"]:
+                return {"matches": [], "namespace": namespace}
+            if "matrix" not in ns:
+                ns["matrix"] = np.vstack(ns["vectors"])
+            matrix = ns["matrix"]
+            ids = list(ns["ids"])
+            meta = list(ns["meta"])
+
+        query = np.asarray(vector, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1) * (np.linalg.norm(query) or 1.0)
+        norms[norms == 0] = 1.0
+        scores = (matrix @ query) / norms
+        top = min(top_k, len(ids))
+        rows = np.argpartition(-scores, top - 1)[:top]
+        rows = rows[np.argsort(-scores[rows])]
+
+        matches = []
+        for r in rows:
+            match = {"id": ids[r], "score": float(scores[r])}
+            if include_metadata:
+                match["metadata"] = meta[r]
+            if include_values:
+                match["values"] = matrix[r].tolist()
+            matches.append(match)
+        return {"matches": matches, "namespace": namespace}
+
+    def fetch(self, ids: List[str], namespace: str = "", **kwargs):
+        self._sleep()
+        with self._lock:
+            ns = self._ns(namespace)
+            vectors = {}
+            for fact_id in ids:
+                row = ns["rows"].get(fact_id)
+                if row is not None:
+                    vectors[fact_id] = {
+                        "id": fact_id,
+                        "values": ns["vectors"][row].tolist(),
+                        "metadata": ns["meta"][row],
+                    }
+        return {"vectors": vectors, "namespace": namespace}
+
+    def list_paginated(self, namespace: str = "", limit: int = 100, pagination_token: Optional[str] = None,
+                       prefix: Optional[str] = None, **kwargs):
+        self._sleep()
+        start = int(pagination_token) if pagination_token else 0
+        with self._lock:
+            ids = self._ns(namespace)["ids"]
+            if prefix:
+                ids = [fact_id for fact_id in ids if fact_id.startswith(prefix)]
+            page = ids[start:start + limit]
+            more = start + limit < len(ids)
+        return {
+            "vectors": [{"id": fact_id} for fact_id in page],
+            "pagination": {"next": str(start + limit)} if more else None,
+            "namespace": namespace,
+        }
+
+    def delete(self, ids: Optional[List[str]] = None, delete_all: bool = False, namespace: str = "", **kwargs):
+        self._sleep()
+        with self._lock:
+            if delete_all:
+                self._namespaces.pop(namespace or "", None)
+                return {}
+            ns = self._ns(namespace)
+            doomed = set(ids or [])
+            keep = [i for i, fact_id in enumerate(ns["ids"]) if fact_id not in doomed]
+            ns["ids"] = [ns["ids"][i] for i in keep]
+            ns["vectors"] = [ns["vectors"][i] for i in keep]
+            ns["meta"] = [ns["meta"][i] for i in keep]
+            ns["rows"] = {fact_id: i for i, fact_id in enumerate(ns["ids"])}
+            ns.pop("matrix", None)
+        return {}
+
+    def describe_index_stats(self, **kwargs):
+        with self._lock:
+            namespaces = {name: {"vector_count": len(ns["ids"])} for name, ns in self._namespaces.items()}
+        return {
+            "dimension": self.dimension,
+            "namespaces": namespaces,
+            "total_vector_count": sum(ns["vector_count"] for ns in namespaces.values()),
+        }
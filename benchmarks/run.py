@@ -0,0 +1,385 @@
+"""End-to-end benchmarks.
+
+Each scenario runs in its own subprocess (so peak RSS is per scenario)
+against fakes for the LLM and, optionally, Pinecone. Results are written
+as JSON so runs can be diffed:
+
+    python -m benchmarks.run --output bench_results.json
+    python -m benchmarks.run --scenario query --backend pinecone --queries 500
+    python -m benchmarks.run --scenario search --facts 50000
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from typing import Dict, Any, List
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# --- Helpers ---
+
+def peak_rss_mb() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    ordered = sorted(samples)
+
+    def pick(p):
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": 1000 * sum(ordered) / len(ordered),
+        "p50_ms": 1000 * pick(50),
+        "p90_ms": 1000 * pick(90),
+        "p99_ms": 1000 * pick(99),
+        "max_ms": 1000 * ordered[-1],
+    }
+
+def setup_services(args) -> Dict[str, Any]:
+    """Registers fakes with the ServiceFactory and returns the lazy services mapping."""
+    os.environ.pop("PINECONE_API_KEY", None)
+    os.environ["LOCAL_INDEX_DIR"] = tempfile.mkdtemp(prefix="bench-index-")
+    os.environ["TRANSCRIPT_DIR"] = tempfile.mkdtemp(prefix="bench-transcripts-")
+
+    from unified_llm.factory import ServiceFactory, get_services
+    from unified_llm.storage.vector_store import VectorStore
+    from benchmarks.fakes import FakeLLMClient, FakePineconeIndex, HashingEmbeddingService
+
+    factory = ServiceFactory.get_instance()
+
+    if args.embeddings == "local":
+        from unified_llm.storage.embeddings import LocalEmbeddingService
+        embedding_service = LocalEmbeddingService()
+        embedding_service.warm_up()
+    else:
+        embedding_service = HashingEmbeddingService()
+    factory.register("embedding_service", embedding_service)
+
+    vector_store = VectorStore(embedding_service=embedding_service)
+    if args.backend == "pinecone":
+        vector_store.index = FakePineconeIndex(latency=args.pinecone_latency)
+        vector_store.use_mock = False
+    factory.register("vector_store", vector_store)
+
+    factory.register("llm_client", FakeLLMClient(
+        latency=args.llm_latency,
+        jitter=args.llm_latency / 2,
+        error_rate=args.llm_error_rate,
+        seed=args.seed
+    ))
+    return get_services()
+
+def seed_facts(vector_store, count: int, seed: int):
+    from unified_llm.models import Fact
+    from benchmarks.synthetic import FACT_TEMPLATES, _fill
+
+    rng = random.Random(seed)
+    categories = ["preference", "project", "user_info", "goal", "other"]
+    facts = [
+        Fact(content=f"{_fill(rng, rng.choice(FACT_TEMPLATES))} (#{i})", category=rng.choice(categories))
+        for i in range(count)
+    ]
+    start = time.perf_counter()
+    vector_store.add_facts(facts)
+    return time.perf_counter() - start
+
+# --- Scenarios ---
+
+def scenario_import(args) -> Dict[str, Any]:
+    """Full /import background path: parse export, extract with the fake LLM, store."""
+    services = setup_services(args)
+    import server
+    from benchmarks.synthetic import write_export
+
+    server.services = services
+    fd, path = tempfile.mkstemp(suffix=".json", prefix="bench-export-")
+    os.close(fd)
+    write_export(path, args.format, args.conversations, args.messages, args.fact_ratio, args.seed)
+    export_bytes = os.path.getsize(path)
+
+    start = time.perf_counter()
+    asyncio.run(server.process_import_background(path, args.format))
+    elapsed = time.perf_counter() - start
+
+    llm = services["llm_client"]
+    facts = services["vector_store"].count()
+    messages = args.conversations * args.messages
+    return {
+        "elapsed_s": elapsed,
+        "export_bytes": export_bytes,
+        "conversations": args.conversations,
+        "messages": messages,
+        "facts_stored": facts,
+        "llm_calls": llm.calls,
+        "llm_errors": llm.errors,
+        "llm_prompt_chars": llm.prompt_chars,
+        "messages_per_s": messages / elapsed if elapsed else None,
+        "facts_per_s": facts / elapsed if elapsed else None,
+    }
+
+def scenario_query(args) -> Dict[str, Any]:
+    """POST /query latency through the FastAPI stack with a pre-populated memory."""
+    services = setup_services(args)
+    from fastapi.testclient import TestClient
+    import server
+
+    seed_s = seed_facts(services["vector_store"], args.facts, args.seed)
+    rng = random.Random(args.seed + 1)
+    queries = [f"What do I think about {rng.choice(['Python', 'Rust', 'RAG', 'Berlin', 'Atlas'])}?"
+               for _ in range(args.queries)]
+
+    latencies = []
+    errors = 0
+    with TestClient(server.app) as client:
+        for q in queries[:min(10, len(queries))]: # warm-up
+            client.post("/query", json={"query": q})
+        start = time.perf_counter()
+        for q in queries:
+            t0 = time.perf_counter()
+            resp = client.post("/query", json={"query": q, "top_k": args.top_k})
+            latencies.append(time.perf_counter() - t0)
+            if resp.status_code != 200:
+                errors += 1
+        elapsed = time.perf_counter() - start
+
+    return {
+        "facts": args.facts,
+        "seed_s": seed_s,
+        "errors": errors,
+        "qps": len(queries) / elapsed if elapsed else None,
+        "latency": percentiles(latencies),
+    }
+
+def scenario_search(args) -> Dict[str, Any]:
+    """Retrieval-only latency: VectorStore.search directly, then GET /search with and without the cache."""
+    services = setup_services(args)
+    from fastapi.testclient import TestClient
+    import server
+
+    vector_store = services["vector_store"]
+    seed_s = seed_facts(vector_store, args.facts, args.seed)
+    rng = random.Random(args.seed + 1)
+    topics = ['Python', 'Rust', 'RAG', 'Berlin', 'Atlas', 'coffee', 'running', 'deadlines']
+    # Distinct queries, so the uncached runs never hit the search cache
+    queries = [f"What do I think about {rng.choice(topics)}? ({i})" for i in range(args.queries)]
+
+    def timed(run) -> List[float]:
+        latencies = []
+        for q in queries:
+            t0 = time.perf_counter()
+            run(q)
+            latencies.append(time.perf_counter() - t0)
+        return latencies
+
+    for q in queries[:min(10, len(queries))]: # warm-up
+        vector_store.search(q, k=args.top_k)
+    store_latencies = timed(lambda q: vector_store.search(q, k=args.top_k))
+
+    errors = 0
+    with TestClient(server.app) as client:
+        def get(q, cache):
+            nonlocal errors
+            resp = client.get("/search", params={"q": q, "top_k": args.top_k, "cache": cache})
+            if resp.status_code != 200:
+                errors += 1
+
+        api_latencies = timed(lambda q: get(q, False))
+        for q in queries: # fill the cache
+            get(q, True)
+        cached_latencies = timed(lambda q: get(q, True))
+
+    return {
+        "facts": args.facts,
+        "seed_s": seed_s,
+        "errors": errors,
+        "store_latency": percentiles(store_latencies),
+        "api_latency": percentiles(api_latencies),
+        "api_cached_latency": percentiles(cached_latencies),
+    }
+
+def scenario_embedding(args) -> Dict[str, Any]:
+    """Embedding throughput over a mix of short and long texts."""
+    services = setup_services(args)
+    from benchmarks.synthetic import FACT_TEMPLATES, FILLER_TEMPLATES, _fill
+
+    rng = random.Random(args.seed)
+    templates = FACT_TEMPLATES + FILLER_TEMPLATES
+    texts = [_fill(rng, rng.choice(templates)) for _ in range(args.texts)]
+    embedding_service = services["embedding_service"]
+
+    start = time.perf_counter()
+    for i in range(0, len(texts), args.chunk):
+        embedding_service.embed(texts[i:i + args.chunk])
+    elapsed = time.perf_counter() - start
+
+    return {
+        "texts": len(texts),
+        "chunk": args.chunk,
+        "total_chars": sum(len(t) for t in texts),
+        "elapsed_s": elapsed,
+        "texts_per_s": len(texts) / elapsed if elapsed else None,
+    }
+
+def scenario_models(args) -> Dict[str, Any]:
+    """Per-message memory of parsed conversations, as objects and as a ConversationBatch."""
+    import gc
+    import tracemalloc
+    from benchmarks.synthetic import write_export
+    from unified_llm.importers.chatgpt_importer import ChatGPTImporter
+    from unified_llm.importers.claude_importer import ClaudeImporter
+    from unified_llm.models import ConversationBatch
+
+    fd, path = tempfile.mkstemp(suffix=".json", prefix="bench-export-")
+    os.close(fd)
+    write_export(path, args.format, args.conversations, args.messages, args.fact_ratio, args.seed)
+    importer = ChatGPTImporter() if args.format == "chatgpt" else ClaudeImporter()
+
+    def traced(build):
+        gc.collect()
+        tracemalloc.start()
+        start = time.perf_counter()
+        value = build()
+        elapsed = time.perf_counter() - start
+        size = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        return value, size, elapsed
+
+    try:
+        conversations, objects_bytes, objects_s = traced(lambda: importer.import_data(path))
+        messages = sum(len(c.messages) for c in conversations)
+        content_bytes = sum(len(m.content.encode("utf-8")) for c in conversations for m in c.messages)
+        del conversations
+        batch, batch_bytes, batch_s = traced(lambda: ConversationBatch(importer.iter_conversations(path)))
+    finally:
+        os.remove(path)
+
+    return {
+        "conversations": len(batch),
+        "messages": messages,
+        "content_bytes_per_message": content_bytes / messages if messages else None,
+        "objects_bytes_per_message": objects_bytes / messages if messages else None,
+        "batch_bytes_per_message": batch_bytes / messages if messages else None,
+        "objects_parse_s": objects_s,
+        "batch_parse_s": batch_s,
+    }
+
+SCENARIOS = {
+    "import": scenario_import,
+    "query": scenario_query,
+    "search": scenario_search,
+    "embedding": scenario_embedding,
+    "models": scenario_models,
+}
+
+# --- Driver ---
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Unified LLM benchmarks")
+    parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS),
+                        help="Scenario to run (repeatable; default: all)")
+    parser.add_argument("--output", default="bench_results.json", help="Where to write the JSON report")
+    parser.add_argument("--backend", choices=["local", "pinecone"], default="local",
+                        help="Local index or the in-process Pinecone stand-in")
+    parser.add_argument("--embeddings", choices=["hashing", "local"], default="hashing",
+                        help="Hashing stand-in or the real sentence-transformers model")
+    parser.add_argument("--seed", type=int, default=0)
+    # import
+    parser.add_argument("--format", choices=["chatgpt", "claude"], default="chatgpt")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--messages", type=int, default=20)
+    parser.add_argument("--fact-ratio", type=float, default=0.3)
+    parser.add_argument("--llm-latency", type=float, default=0.05, help="Seconds per fake LLM call")
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--pinecone-latency", type=float, default=0.0, help="Seconds per fake Pinecone call")
+    # query, search
+    parser.add_argument("--facts", type=int, default=5000, help="Facts to seed before querying or searching")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=5)
+    # embedding
+    parser.add_argument("--texts", type=int, default=2000)
+    parser.add_argument("--chunk", type=int, default=256)
+    # internal: run one scenario in-process and write its result here
+    parser.add_argument("--result-file", help=argparse.SUPPRESS)
+    return parser
+
+def run_child(name: str, argv: List[str]) -> Dict[str, Any]:
+    fd, result_file = tempfile.mkstemp(suffix=".json", prefix=f"bench-{name}-")
+    os.close(fd)
+    cmd = [sys.executable, "-m", "benchmarks.run", "--scenario", name, "--result-file", result_file] + argv
+    proc = subprocess.run(cmd, cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True)
+    try:
+        if proc.returncode != 0:
+            return {"error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "failed"}
+        with open(result_file, "r", encoding="utf-8") as f:
+            return json.load(f)
+    finally:
+        os.remove(result_file)
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def main():
+    parser = build_parser()
+    args, _ = parser.parse_known_args()
+    scenarios = args.scenario or list(SCENARIOS)
+
+    if args.result_file:
+        # Child process: run exactly one scenario
+        result = SCENARIOS[scenarios[0]](args)
+        result["peak_rss_mb"] = peak_rss_mb()
+        with open(args.result_file, "w", encoding="utf-8") as f:
+            json.dump(result, f)
+        return
+
+    # Parent: forward every option except the scenario selection and output
+    argv = []
+    skip = False
+    for token in sys.argv[1:]:
+        if skip:
+            skip = False
+            continue
+        if token in ("--scenario", "--output"):
+            skip = True
+            continue
+        if token.startswith(("--scenario=", "--output=")):
+            continue
+        argv.append(token)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "git_revision": git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "params": {k: v for k, v in vars(args).items() if k not in ("result_file", "output")},
+        },
+        "results": {},
+    }
+    for name in scenarios:
+        print(f"Running {name}...")
+        report["results"][name] = run_child(name, argv)
+        print(json.dumps(report["results"][name], indent=2))
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+if __name__ == "__main__":
+    main()
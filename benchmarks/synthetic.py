@@ -0,0 +1,148 @@
+"""Synthetic ChatGPT and Claude exports for benchmarks.
+
+Usage:
+    python -m benchmarks.synthetic --format chatgpt --conversations 1000 --out export.json
+"""
+import json
+import uuid
+import random
+import argparse
+from datetime import datetime, timezone
+from typing import List, Dict, Any
+
+# User turns are a mix of fact-bearing statements and the fact-free text
+# (code pastes, error reports, short follow-ups) real exports are full of.
+FACT_TEMPLATES = [
+    "I prefer {lang} over {other} for most of my {domain} work.",
+    "I'm currently building a {domain} project called {name} with {lang}.",
+    "My name is {person} and I work as a {role} at {company}.",
+    "I live in {city} and usually work remotely.",
+    "My goal this quarter is to ship {name} and learn more about {topic}.",
+    "I always use {tool} for {domain} because it fits how I think.",
+]
+FILLER_TEMPLATES = [
+    "Can you fix this error?\nTraceback (most recent call last):\n  File \"app.py\", line {n}, in <module>\n    main()\nValueError: invalid literal for int()",
+    "```{lang_lower}\ndef handler(event):\n    for item in event['items']:\n        process(item, retries={n})\n    return {{'status': 'ok'}}\n```\nwhy does this hang?",
+    "ok thanks",
+    "What does {topic} mean?",
+    "Rewrite this paragraph to sound more formal: the meeting went fine and we'll follow up next week.",
+    "Explain the difference between {topic} and {other_topic} in simple terms.",
+]
+ASSISTANT_TEMPLATES = [
+    "Sure! Here's an explanation of {topic}. In short, it is a way to structure {domain} systems so they scale.",
+    "The error happens because the input is not a number. Validate it before calling int().",
+    "Great choice. {lang} has a strong ecosystem for {domain}.",
+]
+VOCAB = {
+    "lang": ["Python", "Rust", "Go", "TypeScript", "Java", "Kotlin"],
+    "other": ["Java", "C++", "PHP", "Ruby"],
+    "domain": ["backend", "data", "ML", "web", "infra"],
+    "name": ["Atlas", "Nimbus", "Orchid", "Beacon", "Harbor"],
+    "person": ["Sam", "Alex", "Jordan", "Riley", "Casey"],
+    "role": ["software engineer", "data scientist", "product manager", "researcher"],
+    "company": ["Acme", "Globex", "Initech", "Umbrella"],
+    "city": ["Toronto", "Berlin", "Austin", "Singapore"],
+    "topic": ["vector search", "RAG", "event sourcing", "CRDTs", "Kubernetes"],
+    "other_topic": ["keyword search", "fine-tuning", "CQRS", "OT", "Nomad"],
+    "tool": ["Neovim", "VS Code", "Docker", "Postgres"],
+}
+
+def _fill(rng: random.Random, template: str) -> str:
+    values = {k: rng.choice(v) for k, v in VOCAB.items()}
+    values["lang_lower"] = values["lang"].lower()
+    values["n"] = rng.randint(1, 500)
+    return template.format(**values)
+
+def _turns(rng: random.Random, messages: int, fact_ratio: float):
+    """Yields (role, text) pairs alternating user/assistant."""
+    for i in range(messages):
+        if i % 2 == 0:
+            template = rng.choice(FACT_TEMPLATES if rng.random() < fact_ratio else FILLER_TEMPLATES)
+            yield "user", _fill(rng, template)
+        else:
+            yield "assistant", _fill(rng, rng.choice(ASSISTANT_TEMPLATES))
+
+def generate_chatgpt_export(conversations: int, messages: int = 20, fact_ratio: float = 0.3,
+                            seed: int = 0) -> List[Dict[str, Any]]:
+    """Returns a ChatGPT conversations.json payload (tree-shaped mapping)."""
+    rng = random.Random(seed)
+    base_time = 1_700_000_000.0
+    export = []
+    for c in range(conversations):
+        root_id = str(uuid.UUID(int=rng.getrandbits(128)))
+        mapping = {root_id: {"id": root_id, "parent": None, "children": [], "message": None}}
+        parent = root_id
+        created = base_time + c * 3600
+        for m, (role, text) in enumerate(_turns(rng, messages, fact_ratio)):
+            node_id = str(uuid.UUID(int=rng.getrandbits(128)))
+            mapping[parent]["children"].append(node_id)
+            mapping[node_id] = {
+                "id": node_id,
+                "parent": parent,
+                "children": [],
+                "message": {
+                    "id": node_id,
+                    "author": {"role": role},
+                    "create_time": created + m * 30,
+                    "content": {"content_type": "text", "parts": [text]},
+                },
+            }
+            parent = node_id
+        export.append({
+            "id": str(uuid.UUID(int=rng.getrandbits(128))),
+            "title": f"Conversation {c}",
+            "create_time": created,
+            "mapping": mapping,
+        })
+    return export
+
+def generate_claude_export(conversations: int, messages: int = 20, fact_ratio: float = 0.3,
+                           seed: int = 0) -> List[Dict[str, Any]]:
+    """Returns a Claude conversations.json payload (linear chat_messages)."""
+    rng = random.Random(seed)
+    base_time = 1_700_000_000.0
+    export = []
+    for c in range(conversations):
+        created = base_time + c * 3600
+        chat_messages = []
+        for m, (role, text) in enumerate(_turns(rng, messages, fact_ratio)):
+            ts = datetime.fromtimestamp(created + m * 30, tz=timezone.utc)
+            chat_messages.append({
+                "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+                "sender": "human" if role == "user" else "assistant",
+                "text": text,
+                "created_at": ts.isoformat().replace("+00:00", "Z"),
+            })
+        export.append({
+            "uuid": str(uuid.UUID(int=rng.getrandbits(128))),
+            "name": f"Conversation {c}",
+            "created_at": datetime.fromtimestamp(created, tz=timezone.utc).isoformat().replace("+00:00", "Z"),
+            "chat_messages": chat_messages,
+        })
+    return export
+
+GENERATORS = {
+    "chatgpt": generate_chatgpt_export,
+    "claude": generate_claude_export,
+}
+
+def write_export(path: str, fmt: str, conversations: int, messages: int = 20,
+                 fact_ratio: float = 0.3, seed: int = 0) -> str:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(GENERATORS[fmt](conversations, messages, fact_ratio, seed), f)
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic chat export")
+    parser.add_argument("--format", choices=sorted(GENERATORS), default="chatgpt")
+    parser.add_argument("--conversations", type=int, default=100)
+    parser.add_argument("--messages", type=int, default=20, help="Messages per conversation")
+    parser.add_argument("--fact-ratio", type=float, default=0.3, help="Share of user turns that state a fact")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    write_export(args.out, args.format, args.conversations, args.messages, args.fact_ratio, args.seed)
+    print(f"Wrote {args.conversations} {args.format} conversations to {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -4,80 +4,120 @@ import argparse
 from dotenv import load_dotenv
 
 from unified_llm.factory import get_services
-from unified_llm.rag_engine import RAGEngine
+from unified_llm.models import ConversationBatch
 from unified_llm.importers.chatgpt_importer import ChatGPTImporter
 from unified_llm.importers.claude_importer import ClaudeImporter
+from unified_llm.memory.estimator import ImportEstimator, format_estimate
+
+def extract_and_store(conversations, extractor, vector_store, namespace: str):
+    print("Extracting facts (this may take a while)...")
+    
+    all_facts = []
+    for i, conv in enumerate(conversations):
+        print(f"Processing conversation {i+1}: {conv.title}")
+        facts = extractor.extract_facts(conv.messages, conversation_id=conv.id)
+        if facts:
+            print(f"  Found {len(facts)} facts.")
+            all_facts.extend(facts)
+        else:
+            print("  No facts found in this conversation.")
+    
+    if all_facts:
+        print(f"Storing {len(all_facts)} facts to Pinecone...")
+        try:
+            vector_store.add_facts(all_facts, namespace=namespace)
+            print("Done storing.")
+        except Exception as e:
+            print(f"Error storing facts: {e}")
+    else:
+        print("No facts extracted from any conversation.")
 
 def main():
     load_dotenv()
     
     parser = argparse.ArgumentParser(description="Unified LLM Workspace CLI")
-    parser.add_argument("--import-file", help="Path to chat export file (conversations.json)")
+    parser.add_argument("--import-file", help="Path to chat export file (conversations.json or the export ZIP)")
     parser.add_argument("--type", choices=["chatgpt", "claude"], default="chatgpt", help="Type of export")
     parser.add_argument("--query", help="Query to ask the system")
     parser.add_argument("--interactive", action="store_true", help="Run in interactive mode")
+    parser.add_argument("--namespace", default="", help="User/tenant memory partition (default: shared)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="With --import-file: estimate LLM calls, tokens and duration without importing")
+    parser.add_argument("--export-snapshot", metavar="DIR",
+                        help="Write the namespace's facts and embeddings to a snapshot directory")
+    parser.add_argument("--import-snapshot", metavar="DIR",
+                        help="Restore a snapshot into the namespace (no LLM calls or re-embedding)")
+    parser.add_argument("--reextract", action="store_true",
+                        help="Re-run fact extraction over archived transcripts instead of a new export")
     
     args = parser.parse_args()
     
-    # Initialize components via Factory
-    print("Initializing components...")
+    # Components are built on first use, so --query never loads the extractor
+    # and --import-file never builds the RAG engine.
     services = get_services()
     
-    rag_engine = RAGEngine(
-        retrieval_service=services['retriever'],
-        llm_client=services['llm_client']
-    )
-    
-    vector_store = services['vector_store']
-    extractor = services['extractor']
-    
     # Import if requested
     if args.import_file:
-        print(f"Importing from {args.import_file}...")
+        extractor = services['extractor']
         if args.type == "chatgpt":
             importer = ChatGPTImporter()
         else:
             importer = ClaudeImporter()
-            
-        conversations = importer.import_data(args.import_file)
-        print(f"Found {len(conversations)} conversations.")
         
-        print("Extracting facts (this may take a while)...")
-        
-        all_facts = []
-        for i, conv in enumerate(conversations):
-            print(f"Processing conversation {i+1}/{len(conversations)}: {conv.title}")
-            facts = extractor.extract_facts(conv.messages)
-            if facts:
-                print(f"  Found {len(facts)} facts.")
-                all_facts.extend(facts)
-            else:
-                print("  No facts found in this conversation.")
-        
-        if all_facts:
-            print(f"Storing {len(all_facts)} facts to Pinecone...")
-            try:
-                vector_store.add_facts(all_facts)
-                print("Done storing.")
-            except Exception as e:
-                print(f"Error storing facts: {e}")
+        if args.dry_run:
+            print(f"Estimating import of {args.import_file} (no LLM calls)...")
+            estimator = ImportEstimator(extractor, call_seconds=float(os.environ.get("ESTIMATE_LLM_CALL_SECONDS", "4")))
+            report = estimator.estimate_file(importer, args.import_file,
+                                             max_seconds=float(os.environ.get("ESTIMATE_MAX_SECONDS", "10")))
+            print(format_estimate(report))
         else:
-            print("No facts extracted from any conversation.")
+            vector_store = services['vector_store']
+            print(f"Importing from {args.import_file}...")
+            # Columnar, so a large export is held as a few buffers instead of
+            # millions of message objects while it is archived and extracted
+            conversations = ConversationBatch(importer.iter_conversations(args.import_file))
+            print(f"Found {len(conversations)} conversations.")
+            archived = services['transcript_store'].append(conversations, namespace=args.namespace, source=args.type)
+            print(f"Archived {archived} transcripts.")
+            
+            extract_and_store(conversations, extractor, vector_store, args.namespace)
+
+    # Snapshots move a memory between backends or restore a lost index
+    if args.export_snapshot:
+        manifest = services['vector_store'].export_snapshot(args.export_snapshot, namespace=args.namespace)
+        print(f"Exported {manifest['count']} facts in {len(manifest['chunks'])} chunks to {args.export_snapshot}")
+    
+    if args.import_snapshot:
+        result = services['vector_store'].import_snapshot(args.import_snapshot, namespace=args.namespace)
+        print(f"Imported {result['facts']} facts from {result['chunks']} chunks in {result['seconds']:.1f}s")
+
+    # Re-extract from the local transcript archive
+    if args.reextract:
+        transcript_store = services['transcript_store']
+        print(f"Re-extracting from {transcript_store.count(args.namespace)} archived conversations...")
+        extract_and_store(
+            transcript_store.iter_conversations(args.namespace),
+            services['extractor'],
+            services['vector_store'],
+            args.namespace
+        )
 
     # Query
     if args.query:
-        response = rag_engine.generate_response(args.query)
+        rag_engine = services['rag_engine']
+        response = rag_engine.generate_response(args.query, namespace=args.namespace)
         print(f"\nQuery: {args.query}")
         print(f"Response: {response.answer}")
         
     # Interactive mode
     if args.interactive:
+        rag_engine = services['rag_engine']
         print("\n--- Interactive Mode (type 'exit' to quit) ---")
         while True:
             q = input("\nUser: ")
             if q.lower() in ('exit', 'quit'):
                 break
-            response = rag_engine.generate_response(q)
+            response = rag_engine.generate_response(q, namespace=args.namespace)
             print(f"Assistant: {response.answer}")
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+import urllib.request
+import urllib.error
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def wait_for(url, start, timeout, expect_status=200):
+    """Polls url until it returns expect_status; returns seconds since start."""
+    deadline = start + timeout
+    while time.perf_counter() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=1) as resp:
+                if resp.status == expect_status:
+                    return time.perf_counter() - start
+        except (urllib.error.URLError, ConnectionError, OSError):
+            pass
+        time.sleep(0.02)
+    return None
+
+def post_json(url, payload, timeout):
+    req = urllib.request.Request(
+        url,
+        data=json.dumps(payload).encode(),
+        headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(req, timeout=timeout) as resp:
+        return resp.status
+
+def measure_server(port, query, timeout):
+    base = f"http://127.0.0.1:{port}"
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        result = {"first_health_s": wait_for(f"{base}/health/live", start, timeout)}
+
+        # First /query is sent as soon as the process is live, so it includes
+        # whatever warm-up is still outstanding.
+        query_start = time.perf_counter()
+        try:
+            post_json(f"{base}/query", {"query": query}, timeout)
+            result["first_query_s"] = time.perf_counter() - start
+            result["first_query_latency_s"] = time.perf_counter() - query_start
+        except Exception as e:
+            result["first_query_error"] = str(e)
+
+        result["ready_s"] = wait_for(f"{base}/health/ready", start, timeout)
+        return result
+    finally:
+        proc.terminate()
+        proc.wait()
+
+def measure_cli(query):
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, "main.py", "--query", query],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    return {"cli_query_s": time.perf_counter() - start}
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure time to first /health and first /query")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--query", default="What am I working on?")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--skip-cli", action="store_true", help="Only measure the server")
+    args = parser.parse_args()
+
+    report = {"server": measure_server(args.port, args.query, args.timeout)}
+    if not args.skip_cli:
+        report["cli"] = measure_cli(args.query)
+
+    print(json.dumps(report, indent=2))
+
+if __name__ == "__main__":
+    main()
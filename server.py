@@ -1,16 +1,28 @@
 import os
-import shutil
+import time
+import uuid
+import asyncio
+import secrets
 import tempfile
+import threading
+from itertools import islice
 from typing import List, Optional, Dict, Any
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, Response, PlainTextResponse
 from pydantic import BaseModel
 from dotenv import load_dotenv
 
-from unified_llm.factory import get_services
-from unified_llm.rag_engine import RAGEngine
+from unified_llm.factory import ServiceFactory, get_services
+from unified_llm.storage.vector_store import DEFAULT_NAMESPACE, validate_namespace
+from unified_llm.storage.local_index import parse_timestamp
+from unified_llm.utils import metrics
+from unified_llm.utils.admission import AdmissionController, Overloaded
+from unified_llm.utils.cache import LRUCache
+from unified_llm.utils.profiler import SamplingProfiler, Profile
 from unified_llm.importers.chatgpt_importer import ChatGPTImporter
 from unified_llm.importers.claude_importer import ClaudeImporter
+from unified_llm.memory.estimator import ImportEstimator
 
 # Load environment variables
 load_dotenv()
@@ -24,32 +36,160 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id"],
 )
 
 # --- Global State ---
+# Components are built lazily by the factory; the embedding model and vector
+# store are warmed up in a background thread so /health answers immediately.
 services = {}
-rag_engine = None
+_import_time = time.perf_counter()
+
+QUERY_BATCH_MAX = int(os.environ.get("QUERY_BATCH_MAX", "256"))
+FACTS_GET_MAX = 1000
+
+# Profiling is off unless ADMIN_TOKEN is set, and then only for callers
+# sending it as X-Admin-Token. One profiler runs at a time.
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN")
+PROFILE_MAX_SECONDS = float(os.environ.get("PROFILE_MAX_SECONDS", "60"))
+_profile_lock = threading.Lock()
+# Recent per-request profiles, fetched by the id in X-Profile-Id
+_request_profiles = LRUCache("profiles", maxsize=16)
+
+# Admission control per endpoint class: LLM-backed endpoints get few slots
+# since each holds a DeepSeek call; retrieval ones are cheap but CPU-bound.
+# Set ADMISSION_<CLASS>_CONCURRENCY=0 to disable a class.
+ADMISSION = {
+    "llm": AdmissionController.from_env("llm", max_concurrency=16, max_queue=64, max_queue_time=10.0),
+    "retrieval": AdmissionController.from_env("retrieval", max_concurrency=64, max_queue=256, max_queue_time=2.0),
+}
+ENDPOINT_CLASSES = {
+    "/query": "llm",
+    "/query/batch": "llm",
+    "/persona": "llm",
+    "/search": "retrieval",
+    "/graph": "retrieval",
+}
+
+def _is_admin(request: Request) -> bool:
+    token = request.headers.get("X-Admin-Token")
+    return bool(ADMIN_TOKEN) and token is not None and secrets.compare_digest(token, ADMIN_TOKEN)
+
+def require_admin(request: Request):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not _is_admin(request):
+        raise HTTPException(status_code=403, detail="Admin token required")
+
+# Registered first so it is innermost: only the handler's own work is timed
+@app.middleware("http")
+async def profile_requests(request: Request, call_next):
+    if "X-Profile" not in request.headers or not _is_admin(request) or not _profile_lock.acquire(blocking=False):
+        return await call_next(request)
+    # Samples every thread while the request runs, so concurrent requests show up too.
+    # A finer interval than /admin/profile, since most requests take milliseconds.
+    profiler = SamplingProfiler(interval=0.001).start()
+    try:
+        response = await call_next(request)
+    finally:
+        profile = profiler.stop()
+        _profile_lock.release()
+    profile_id = uuid.uuid4().hex[:16]
+    _request_profiles.put(profile_id, profile)
+    response.headers["X-Profile-Id"] = profile_id
+    return response
+
+# Registered before track_requests, so it runs inside it and shed requests are still measured
+@app.middleware("http")
+async def admission_control(request: Request, call_next):
+    endpoint_class = ENDPOINT_CLASSES.get(request.url.path)
+    if endpoint_class is None:
+        return await call_next(request)
+    try:
+        async with ADMISSION[endpoint_class].admit():
+            return await call_next(request)
+    except Overloaded as e:
+        return JSONResponse(
+            status_code=503,
+            content={"detail": f"Server overloaded ({e.reason}), retry later"},
+            headers={"Retry-After": str(e.retry_after)}
+        )
+
+@app.middleware("http")
+async def track_requests(request: Request, call_next):
+    endpoint = request.url.path
+    start = time.perf_counter()
+    status = 500
+    with metrics.INFLIGHT_REQUESTS.track_inprogress(endpoint):
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            metrics.HTTP_LATENCY.labels(endpoint, str(status)).observe(time.perf_counter() - start)
+
+# On Pinecone, namespace sizes come from describe_index_stats(), a network
+# call, so scrapes reuse the last answer for INDEX_SIZE_TTL seconds
+INDEX_SIZE_TTL = float(os.environ.get("INDEX_SIZE_TTL", "30"))
+_index_size_cache: Dict[str, Any] = {"at": None, "sizes": {}}
+_index_size_lock = threading.Lock()
+
+def _index_sizes():
+    # Only report on a store that already exists; a scrape must not build one
+    vector_store = ServiceFactory.get_instance().peek('vector_store')
+    if vector_store is None:
+        return {}
+    with _index_size_lock:
+        at = _index_size_cache["at"]
+        if at is None or time.monotonic() - at >= INDEX_SIZE_TTL:
+            try:
+                _index_size_cache["sizes"] = {(ns,): size for ns, size in vector_store.namespace_sizes().items()}
+            except Exception as e:
+                print(f"Error reading index sizes: {e}")
+            _index_size_cache["at"] = time.monotonic()
+        return _index_size_cache["sizes"]
+
+metrics.INDEX_SIZE.set_function(_index_sizes)
 
 @app.on_event("startup")
 async def startup_event():
-    global services, rag_engine
-    print("Initializing services via Factory...")
+    global services
     services = get_services()
-    rag_engine = RAGEngine(
-        retrieval_service=services['retriever'],
-        llm_client=services['llm_client']
-    )
-    print("Server ready.")
+    ServiceFactory.get_instance().start_warm_up()
+    print(f"Server accepting requests ({time.perf_counter() - _import_time:.2f}s after import), warming up services...")
+
+def get_namespace(namespace: str = DEFAULT_NAMESPACE) -> str:
+    """Query parameter selecting the user's memory partition."""
+    try:
+        return validate_namespace(namespace)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 # --- Data Models ---
 
 class QueryRequest(BaseModel):
     query: str
     top_k: int = 5
+    namespace: str = DEFAULT_NAMESPACE
 
 class QueryResponse(BaseModel):
     answer: str
     retrieved_facts: List[Any]
+    context_tokens: int = 0
+    tokens_saved: int = 0
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    top_k: int = 5
+    namespace: str = DEFAULT_NAMESPACE
+    concurrency: Optional[int] = None
+
+class BatchQueryItem(QueryResponse):
+    query: str
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchQueryItem]
 
 class FactResponse(BaseModel):
     id: str
@@ -58,127 +198,395 @@ class FactResponse(BaseModel):
     timestamp: Optional[str]
     metadata: Dict[str, Any]
 
+class FactUpdate(BaseModel):
+    content: Optional[str] = None
+    category: Optional[str] = None
+    metadata: Optional[Dict[str, Any]] = None
+
+class DeleteFactsRequest(BaseModel):
+    ids: List[str]
+
+class GetFactsRequest(BaseModel):
+    ids: List[str]
+
+class SearchResult(BaseModel):
+    id: str
+    content: str
+    category: str
+    timestamp: Optional[str]
+    distance: float
+    metadata: Dict[str, Any]
+
 class StatsResponse(BaseModel):
     total_facts: int
     storage_type: str
     index_name: Optional[str] = None
+    namespace: str = DEFAULT_NAMESPACE
 
 # --- Endpoints ---
 
 @app.get("/health")
+@app.get("/health/live")
 async def health_check():
+    """Liveness: the process is up and serving requests."""
     return {"status": "ok"}
 
+@app.get("/health/ready")
+async def readiness_check():
+    """Readiness: the embedding model is loaded and the vector store is connected."""
+    readiness = ServiceFactory.get_instance().readiness()
+    readiness["uptime_seconds"] = round(time.perf_counter() - _import_time, 3)
+    if not readiness["ready"]:
+        status = "failed" if readiness["error"] else "starting"
+        return JSONResponse(status_code=503, content={"status": status, **readiness})
+    return {"status": "ready", **readiness}
+
+@app.get("/metrics")
+def get_metrics():
+    """Prometheus text exposition of latency histograms, counters and gauges.
+    A plain def, so rendering (and any index size lookup) runs off the event loop."""
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
+
+def _profile_response(profile: Profile, output: str, top: int):
+    if output == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    return {**profile.summary(top=top), "collapsed": profile.collapsed()}
+
+@app.post("/admin/profile", dependencies=[Depends(require_admin)])
+async def run_profile(
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(10.0, ge=1, le=1000),
+    idle: bool = False,
+    output: str = Query("json", pattern="^(json|collapsed)$"),
+    top: int = Query(25, ge=1, le=500)
+):
+    """
+    Samples every thread's stack for `seconds` and returns per-function
+    summaries (overall and for the rag/retrieval/embedding/extraction code)
+    plus collapsed stacks for flamegraph tools; output=collapsed returns
+    only the latter as text. Parked threads are skipped unless idle=true.
+    """
+    if seconds > PROFILE_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be at most {PROFILE_MAX_SECONDS:g}")
+    if not _profile_lock.acquire(blocking=False):
+        raise HTTPException(status_code=409, detail="A profile is already running")
+    try:
+        profiler = SamplingProfiler(interval=interval_ms / 1000, include_idle=idle).start()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            profile = profiler.stop()
+    finally:
+        _profile_lock.release()
+    return _profile_response(profile, output, top)
+
+@app.get("/admin/profile/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_request_profile(
+    profile_id: str,
+    output: str = Query("json", pattern="^(json|collapsed)$"),
+    top: int = Query(25, ge=1, le=500)
+):
+    """A profile recorded for a request sent with the X-Profile header."""
+    profile = _request_profiles.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found or expired")
+    return _profile_response(profile, output, top)
+
 @app.get("/stats", response_model=StatsResponse)
-async def get_stats():
+async def get_stats(namespace: str = Depends(get_namespace)):
     vector_store = services.get('vector_store')
     
     count = 0
     storage_type = "unknown"
     
     if vector_store:
-        if vector_store.use_mock:
-            count = len(vector_store.mock_storage)
-            storage_type = "mock"
-        else:
-            storage_type = "pinecone"
-            try:
-                stats = vector_store.index.describe_index_stats()
-                count = stats.get('total_vector_count', 0)
-            except:
-                pass
+        storage_type = "local" if vector_store.use_mock else "pinecone"
+        try:
+            count = vector_store.count(namespace)
+        except:
+            pass
 
     return {
         "total_facts": count,
         "storage_type": storage_type,
-        "index_name": vector_store.index_name if vector_store else None
+        "index_name": vector_store.index_name if vector_store else None,
+        "namespace": namespace
     }
 
 @app.post("/query", response_model=QueryResponse)
 async def query_memory(request: QueryRequest):
+    rag_engine = services.get('rag_engine')
     if not rag_engine:
         raise HTTPException(status_code=503, detail="Components not initialized")
     
+    namespace = get_namespace(request.namespace)
+    
     # Use RAG Engine
-    response = await rag_engine.generate_response_async(request.query, top_k=request.top_k)
+    response = await rag_engine.generate_response_async(request.query, top_k=request.top_k, namespace=namespace)
     
     return {
         "answer": response.answer,
-        "retrieved_facts": response.retrieved_facts
+        "retrieved_facts": response.retrieved_facts,
+        "context_tokens": response.context_tokens,
+        "tokens_saved": response.tokens_saved
     }
 
+# A plain def runs in FastAPI's threadpool, so embedding the query never blocks the event loop
+@app.get("/search", response_model=List[SearchResult])
+def search_memory(
+    q: str,
+    top_k: int = Query(5, ge=1, le=100),
+    cache: bool = True,
+    namespace: str = Depends(get_namespace)
+):
+    """Retrieval only: the facts most relevant to q, with similarity scores. No LLM call."""
+    retriever = services.get('retriever')
+    if not retriever:
+        raise HTTPException(status_code=503, detail="Components not initialized")
+    
+    results = []
+    for item in retriever.search(q, k=top_k, namespace=namespace, use_cache=cache):
+        fact = _to_fact_response(item)
+        results.append(SearchResult(
+            id=fact.id,
+            content=fact.content,
+            category=fact.category,
+            timestamp=fact.timestamp,
+            distance=item['distance'],
+            metadata=fact.metadata
+        ))
+    return results
+
+@app.post("/query/batch", response_model=BatchQueryResponse)
+async def query_memory_batch(request: BatchQueryRequest):
+    """Answers many queries with one embedding pass and concurrent LLM calls."""
+    rag_engine = services.get('rag_engine')
+    if not rag_engine:
+        raise HTTPException(status_code=503, detail="Components not initialized")
+    if len(request.queries) > QUERY_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {QUERY_BATCH_MAX} queries per batch")
+    if request.concurrency is not None and request.concurrency < 1:
+        raise HTTPException(status_code=400, detail="concurrency must be at least 1")
+    
+    namespace = get_namespace(request.namespace)
+    responses = await rag_engine.generate_batch_async(
+        request.queries, top_k=request.top_k, namespace=namespace, concurrency=request.concurrency
+    )
+    
+    return {
+        "results": [
+            {
+                "query": query,
+                "answer": response.answer,
+                "retrieved_facts": response.retrieved_facts,
+                "context_tokens": response.context_tokens,
+                "tokens_saved": response.tokens_saved,
+                "error": response.error
+            }
+            for query, response in zip(request.queries, responses)
+        ]
+    }
+
+# Plain def: a (re)build computes the layout, which must not block the event loop
 @app.get("/graph")
-async def get_graph():
+def get_graph(namespace: str = Depends(get_namespace)):
     """Returns the knowledge graph data for visualization."""
     graph_service = services.get('graph_service')
     if not graph_service:
         raise HTTPException(status_code=503, detail="Graph service not initialized")
     
-    return graph_service.get_graph_data()
+    return graph_service.get_graph_data(namespace)
 
 @app.get("/persona")
-async def get_persona():
+async def get_persona(namespace: str = Depends(get_namespace)):
     """Generates and returns the digital persona."""
     persona_engine = services.get('persona_engine')
     if not persona_engine:
         raise HTTPException(status_code=503, detail="Persona engine not initialized")
     
-    return await persona_engine.generate_persona()
+    return await persona_engine.generate_persona(namespace)
+
+def _parse_time_param(value: Optional[str], name: str) -> Optional[float]:
+    if value is None:
+        return None
+    ts = parse_timestamp(value)
+    if ts != ts: # NaN
+        raise HTTPException(status_code=400, detail=f"Invalid '{name}': expected an ISO 8601 timestamp")
+    return ts
 
 @app.get("/facts", response_model=List[FactResponse])
-async def list_facts(limit: int = 50, offset: int = 0):
+def list_facts(
+    response: Response,
+    limit: int = Query(50, ge=1, le=1000),
+    offset: int = 0,
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    namespace: str = Depends(get_namespace)
+):
+    """
+    Lists facts in insertion order. Pass the X-Next-Cursor response header
+    back as ?cursor= to get the next page; it is absent on the last page.
+    since/until are ISO 8601 timestamps. offset is kept for older clients.
+    A plain def: listing blocks on the index (or Pinecone round trips).
+    """
     vector_store = services.get('vector_store')
     facts_list = []
-    
+    if not vector_store:
+        return facts_list
+    since_ts = _parse_time_param(since, "since")
+    until_ts = _parse_time_param(until, "until")
 
-    if vector_store and vector_store.use_mock:
-        all_facts = vector_store.mock_storage
-        sliced = all_facts[offset : offset + limit]
-        
-        for f_data in sliced:
-            # Parsing content stored as "Category: Content"
-            raw_content = f_data.get('content', '')
-            cat = 'general'
-            content = raw_content
-            if ':' in raw_content:
-                parts = raw_content.split(':', 1)
-                cat = parts[0].strip()
-                content = parts[1].strip()
-
-            facts_list.append(FactResponse(
-                id=f_data.get('id', 'mock_id'),
-                content=content,
-                category=cat,
-                timestamp=f_data.get('timestamp'),
-                metadata=f_data.get('metadata', {})
-            ))
-            
-    elif vector_store and not vector_store.use_mock:
-        try:
-            dummy_vector = [0.1] * 384
-            results = vector_store.index.query(
-                vector=dummy_vector,
-                top_k=limit,
-                include_metadata=True
-            )
-            
-            for match in results['matches']:
-                meta = match['metadata']
-                facts_list.append(FactResponse(
-                    id=match['id'],
-                    content=meta.get('content', ''),
-                    category=meta.get('category', 'general'),
-                    timestamp=meta.get('timestamp'),
-                    metadata=meta
-                ))
-        except Exception as e:
-            print(f"Error listing facts from Pinecone: {e}")
+    try:
+        facts, next_cursor = vector_store.list_facts(
+            limit=limit,
+            cursor=cursor,
+            namespace=namespace,
+            category=category,
+            since=since_ts,
+            until=until_ts,
+            offset=offset
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"Error listing facts: {e}")
+        return facts_list
+
+    for fact in facts:
+        facts_list.append(_to_fact_response(fact))
 
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
     return facts_list
 
-async def process_import_background(file_path: str, importer_type: str):
+def _to_fact_response(fact: Dict[str, Any]) -> FactResponse:
+    meta = fact['metadata']
+    # Parsing content stored as "Category: Content"
+    content = fact['content']
+    if ':' in content:
+        content = content.split(':', 1)[1].strip()
+
+    return FactResponse(
+        id=fact['id'],
+        content=content,
+        category=meta.get('category', 'general'),
+        timestamp=meta.get('timestamp'),
+        metadata=meta
+    )
+
+def _memory_changed(namespace: str):
+    # Cached graphs would otherwise keep showing deleted or stale facts
+    graph_service = ServiceFactory.get_instance().peek('graph_service')
+    if graph_service:
+        graph_service.invalidate(namespace)
+
+# Plain defs: a lookup reads the index (or calls Pinecone) and the source
+# message is a seek plus decompress in the transcript log
+@app.get("/facts/{fact_id}", response_model=FactResponse)
+def get_fact(fact_id: str, namespace: str = Depends(get_namespace)):
+    vector_store = services.get('vector_store')
+    if not vector_store:
+        raise HTTPException(status_code=503, detail="Vector store not initialized")
+
+    fact = vector_store.get_fact(fact_id, namespace=namespace)
+    if fact is None:
+        raise HTTPException(status_code=404, detail=f"Fact '{fact_id}' not found")
+    return _to_fact_response(fact)
+
+@app.post("/facts/get", response_model=List[Optional[FactResponse]])
+async def get_facts(request: GetFactsRequest, namespace: str = Depends(get_namespace)):
+    """Looks up several facts by id. Results follow the request order, with null for unknown ids."""
+    vector_store = services.get('vector_store')
+    if not vector_store:
+        raise HTTPException(status_code=503, detail="Vector store not initialized")
+    if len(request.ids) > FACTS_GET_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {FACTS_GET_MAX} ids per request")
+
+    facts = await asyncio.to_thread(vector_store.get_facts, request.ids, namespace)
+    return [_to_fact_response(fact) if fact is not None else None for fact in facts]
+
+@app.get("/facts/{fact_id}/source")
+def get_fact_source(fact_id: str, namespace: str = Depends(get_namespace)):
+    """Returns the archived message a fact was extracted from."""
+    vector_store = services.get('vector_store')
+    transcript_store = services.get('transcript_store')
+    if not vector_store or not transcript_store:
+        raise HTTPException(status_code=503, detail="Components not initialized")
+
+    fact = vector_store.get_fact(fact_id, namespace=namespace)
+    if fact is None:
+        raise HTTPException(status_code=404, detail=f"Fact '{fact_id}' not found")
+    message_id = fact['metadata'].get('source_message_id')
+    found = transcript_store.get_message(message_id, namespace=namespace) if message_id else None
+    if found is None:
+        raise HTTPException(status_code=404, detail="Source message not archived")
+
+    conversation_id, message = found
+    return {
+        "fact": _to_fact_response(fact),
+        "conversation_id": conversation_id,
+        "message_id": message_id,
+        "role": message.role,
+        "content": message.content,
+        "timestamp": message.timestamp.isoformat() if message.timestamp else None
+    }
+
+# Fact writes re-embed, take the index's file lock or call Pinecone with
+# retries, so these handlers are plain defs and run in the threadpool.
+
+@app.patch("/facts/{fact_id}", response_model=FactResponse)
+def update_fact(fact_id: str, update: FactUpdate, namespace: str = Depends(get_namespace)):
+    """Corrects a fact's content, category or metadata; the id stays the same."""
+    vector_store = services.get('vector_store')
+    if not vector_store:
+        raise HTTPException(status_code=503, detail="Vector store not initialized")
+
+    try:
+        fact = vector_store.update_fact(
+            fact_id,
+            content=update.content,
+            category=update.category,
+            metadata=update.metadata,
+            namespace=namespace
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if fact is None:
+        raise HTTPException(status_code=404, detail=f"Fact '{fact_id}' not found")
+    _memory_changed(namespace)
+    return _to_fact_response(fact)
+
+@app.delete("/facts/{fact_id}")
+def delete_fact(fact_id: str, namespace: str = Depends(get_namespace)):
+    vector_store = services.get('vector_store')
+    if not vector_store:
+        raise HTTPException(status_code=503, detail="Vector store not initialized")
+
+    if not vector_store.delete_facts([fact_id], namespace=namespace):
+        raise HTTPException(status_code=404, detail=f"Fact '{fact_id}' not found")
+    _memory_changed(namespace)
+    return {"deleted": 1}
+
+@app.post("/facts/delete")
+def delete_facts(request: DeleteFactsRequest, namespace: str = Depends(get_namespace)):
+    """Deletes several facts at once. Unknown ids are ignored."""
+    vector_store = services.get('vector_store')
+    if not vector_store:
+        raise HTTPException(status_code=503, detail="Vector store not initialized")
+
+    deleted = vector_store.delete_facts(request.ids, namespace=namespace)
+    _memory_changed(namespace)
+    return {"deleted": deleted}
+
+# Conversations parsed, archived and extracted per step of a streaming import
+IMPORT_BATCH = 32
+UPLOAD_CHUNK = 1 << 20
+
+async def process_import_background(file_path: str, importer_type: str, namespace: str = DEFAULT_NAMESPACE):
     """Background task to process the import."""
-    print(f"Starting background import for {file_path} ({importer_type})")
+    print(f"Starting background import for {file_path} ({importer_type}, namespace '{namespace}')")
     
     # We need to get services here as well, but they should be initialized by startup
     # However, if this runs in a separate thread/process, we might need to be careful.
@@ -191,6 +599,7 @@ async def process_import_background(file_path: str, importer_type: str):
         print("Services not ready for import.")
         return
 
+    conversations = None
     try:
         if importer_type == 'chatgpt':
             importer = ChatGPTImporter()
@@ -200,52 +609,119 @@ async def process_import_background(file_path: str, importer_type: str):
             print(f"Unknown importer type: {importer_type}")
             return
 
-        conversations = importer.import_data(file_path)
-        print(f"Imported {len(conversations)} conversations.")
-        
+        transcript_store = services.get('transcript_store')
+        conversations = importer.iter_conversations(file_path)
+        total_convs = 0
         total_facts = 0
-        for i, conv in enumerate(conversations):
-            filtered_msgs = [
-                m for m in conv.messages 
-                if m.content and len(m.content) > 20 
-                and m.role in ('user', 'assistant')
-            ]
+        
+        # Parse the export a batch at a time off the event loop, so extraction
+        # of the first conversations starts before the rest is even read
+        while True:
+            batch = await asyncio.to_thread(lambda: list(islice(conversations, IMPORT_BATCH)))
+            if not batch:
+                break
             
-            if not filtered_msgs:
-                continue
+            # Keep the raw transcripts so facts can link back to their source and
+            # a newer extractor can re-run without a re-upload
+            if transcript_store:
+                try:
+                    await asyncio.to_thread(transcript_store.append, batch, namespace, importer_type)
+                except Exception as e:
+                    print(f"Error archiving transcripts: {e}")
+            
+            batch_facts = []
+            for conv in batch:
+                total_convs += 1
+                filtered_msgs = [
+                    m for m in conv.messages 
+                    if m.content and len(m.content) > 20 
+                    and m.role in ('user', 'assistant')
+                ]
+                
+                if not filtered_msgs:
+                    continue
+                    
+                facts = await extractor.extract_facts_async(filtered_msgs, conversation_id=conv.id)
                 
-            facts = await extractor.extract_facts_async(filtered_msgs)
+                if facts:
+                    batch_facts.extend(facts)
+                    print(f"Conv {total_convs}: Extracted {len(facts)} facts.")
             
-            if facts:
-                vector_store.add_facts(facts)
-                total_facts += len(facts)
-                print(f"Conv {i+1}/{len(conversations)}: Extracted {len(facts)} facts.")
+            # Embedding and writing are blocking, so keep them off the event
+            # loop; one write per batch also means one local segment, not one
+            # per conversation
+            if batch_facts:
+                await asyncio.to_thread(vector_store.add_facts, batch_facts, namespace)
+                total_facts += len(batch_facts)
         
-        print(f"Import finished. Total facts: {total_facts}")
+        print(f"Import finished. {total_convs} conversations, total facts: {total_facts}")
         
     except Exception as e:
         print(f"Error during import: {e}")
     finally:
+        if conversations is not None:
+            conversations.close()
         if os.path.exists(file_path):
             os.remove(file_path)
 
+async def _spool_upload(file: UploadFile) -> str:
+    """Copies the upload to a temp file in chunks without blocking the event loop."""
+    suffix = ".zip" if (file.filename or "").lower().endswith(".zip") else ".json"
+    fd, path = tempfile.mkstemp(suffix=suffix, prefix="import-")
+    try:
+        with os.fdopen(fd, "wb") as tmp:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK)
+                if not chunk:
+                    break
+                await asyncio.to_thread(tmp.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+def _estimate_import(file_path: str, importer_type: str) -> Dict[str, Any]:
+    extractor = services.get('extractor')
+    if not extractor:
+        raise HTTPException(status_code=503, detail="Extractor not initialized")
+    importer = ChatGPTImporter() if importer_type == 'chatgpt' else ClaudeImporter()
+    estimator = ImportEstimator(extractor, call_seconds=float(os.environ.get("ESTIMATE_LLM_CALL_SECONDS", "4")))
+    try:
+        return estimator.estimate_file(importer, file_path, max_seconds=float(os.environ.get("ESTIMATE_MAX_SECONDS", "10")))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Could not read export: {e}")
+
 @app.post("/import")
 async def import_data(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...), 
-    type: str = "chatgpt"
+    type: str = "chatgpt",
+    namespace: str = Depends(get_namespace),
+    dry_run: bool = False
 ):
+    """
+    Imports an export in the background. With dry_run=true nothing is
+    imported: the response estimates the LLM calls, tokens and time the
+    import would take.
+    """
     if type not in ["chatgpt", "claude"]:
         raise HTTPException(status_code=400, detail="Invalid type. Must be 'chatgpt' or 'claude'")
     
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as tmp:
-        shutil.copyfileobj(file.file, tmp)
-        tmp_path = tmp.name
+    # A bare conversations.json or the export ZIP; zips are read in place, never extracted
+    tmp_path = await _spool_upload(file)
+    
+    if dry_run:
+        try:
+            return {"status": "estimate", **await asyncio.to_thread(_estimate_import, tmp_path, type)}
+        finally:
+            os.remove(tmp_path)
     
-    background_tasks.add_task(process_import_background, tmp_path, type)
+    background_tasks.add_task(process_import_background, tmp_path, type, namespace)
     
     return {"status": "processing_started", "message": "Import started in background"}
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Workers share the local index through its mmap'd segment files
+    workers = int(os.environ.get("UVICORN_WORKERS", "1"))
+    uvicorn.run("server:app", host="0.0.0.0", port=8000, workers=workers)
@@ -0,0 +1,56 @@
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(0)
+
+def unit_vectors(rng, n: int, dimension: int = 8) -> np.ndarray:
+    vectors = rng.standard_normal((n, dimension)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+@pytest.fixture
+def local_store(tmp_path, monkeypatch):
+    """A VectorStore on the local index, with a hashing embedder."""
+    from unified_llm.storage.vector_store import VectorStore
+    from benchmarks.fakes import HashingEmbeddingService
+    monkeypatch.delenv("PINECONE_API_KEY", raising=False)
+    monkeypatch.setenv("LOCAL_INDEX_DIR", str(tmp_path / "local_index"))
+    return VectorStore(HashingEmbeddingService())
+
+@pytest.fixture
+def pinecone_store(local_store):
+    """A VectorStore backed by the in-process Pinecone stand-in."""
+    from benchmarks.fakes import FakePineconeIndex
+    local_store.index = FakePineconeIndex()
+    local_store.use_mock = False
+    return local_store
+
+def make_facts(n: int, category: str = "general"):
+    from unified_llm.models import Fact
+    return [Fact(content=f"fact number {i}", category=category) for i in range(n)]
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    """A TestClient for server.app over a fresh factory with offline fakes."""
+    from fastapi.testclient import TestClient
+    from unified_llm.factory import ServiceFactory
+    from benchmarks.fakes import FakeLLMClient, HashingEmbeddingService
+    import server
+    for name in ("PINECONE_API_KEY", "DEEPSEEK_API_KEY", "OPENAI_API_KEY"):
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setenv("LOCAL_INDEX_DIR", str(tmp_path / "local_index"))
+    monkeypatch.setenv("TRANSCRIPT_DIR", str(tmp_path / "transcripts"))
+    factory = ServiceFactory()
+    monkeypatch.setattr(ServiceFactory, "_instance", factory)
+    factory.register("embedding_service", HashingEmbeddingService())
+    factory.register("llm_client", FakeLLMClient(latency=0))
+    monkeypatch.setitem(server._index_size_cache, "at", None)
+    with TestClient(server.app) as test_client:
+        test_client.factory = factory
+        yield test_client
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from unified_llm.utils.admission import AdmissionController, Overloaded
+
+def run(coro):
+    return asyncio.run(coro)
+
+def test_full_queue_sheds_with_a_retry_hint():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, max_queue=1, max_queue_time=5.0)
+        release = asyncio.Event()
+        order = []
+
+        async def request(name):
+            async with controller.admit():
+                order.append(name)
+                await release.wait()
+
+        first = asyncio.create_task(request("first"))
+        await asyncio.sleep(0)
+        queued = asyncio.create_task(request("queued"))
+        await asyncio.sleep(0)
+        assert (controller.active, controller.queued) == (1, 1)
+
+        with pytest.raises(Overloaded) as shed:
+            await request("shed")
+        assert shed.value.reason == "queue_full"
+        assert shed.value.retry_after >= 1
+
+        release.set()
+        await asyncio.gather(first, queued)
+        assert order == ["first", "queued"]
+        assert (controller.active, controller.queued) == (0, 0)
+
+    run(scenario())
+
+def test_waiting_past_max_queue_time_is_shed():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, max_queue=4, max_queue_time=0.05)
+        async with controller.admit():
+            with pytest.raises(Overloaded) as shed:
+                async with controller.admit():
+                    pass
+            assert shed.value.reason == "queue_timeout"
+            assert controller.queued == 0
+        assert controller.active == 0
+
+    run(scenario())
+
+def test_cancelled_waiter_does_not_leak_a_slot():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=1, max_queue=4, max_queue_time=5.0)
+        async with controller.admit():
+            waiter = asyncio.create_task(controller.admit().__aenter__())
+            await asyncio.sleep(0)
+            waiter.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await waiter
+        assert (controller.active, controller.queued) == (0, 0)
+        async with controller.admit():
+            assert controller.active == 1
+
+    run(scenario())
+
+def test_disabled_controller_admits_everything():
+    async def scenario():
+        controller = AdmissionController("test", max_concurrency=0)
+        async with controller.admit(), controller.admit():
+            assert controller.active == 0
+
+    run(scenario())
+
+def test_overloaded_endpoint_returns_503_with_retry_after(client, monkeypatch):
+    import server
+    controller = AdmissionController("retrieval", max_concurrency=1, max_queue=0)
+    monkeypatch.setitem(server.ADMISSION, "retrieval", controller)
+    controller.active = 1 # a request already holds the only slot
+
+    response = client.get("/search", params={"q": "tea"})
+    assert response.status_code == 503
+    assert "queue_full" in response.json()["detail"]
+    assert int(response.headers["Retry-After"]) >= 1
+    # Unclassified endpoints are never shed
+    assert client.get("/health").status_code == 200
+
+    controller.active = 0
+    assert client.get("/search", params={"q": "tea"}).status_code == 200
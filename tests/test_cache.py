@@ -0,0 +1,39 @@
+import time
+
+from unified_llm.utils.cache import LRUCache
+
+def test_hits_only_under_the_version_it_was_stored_with():
+    cache = LRUCache("test")
+    cache.put("q", "answer", version=1)
+    assert cache.get("q", version=1) == "answer"
+    # A write bumps the version: the entry is stale and dropped
+    assert cache.get("q", version=2) is None
+    assert cache.get("q", version=1) is None
+    assert len(cache) == 0
+
+def test_evicts_the_least_recently_used_entry():
+    cache = LRUCache("test", maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1 # a is now the most recent
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert (cache.get("a"), cache.get("c")) == (1, 3)
+    assert len(cache) == 2
+
+def test_ttl_bounds_how_long_an_entry_is_served(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    cache = LRUCache("test", ttl=5.0)
+    cache.put("a", 1)
+    now[0] += 4.9
+    assert cache.get("a") == 1
+    now[0] += 0.2
+    assert cache.get("a") is None
+
+def test_clear_drops_everything():
+    cache = LRUCache("test")
+    for i in range(5):
+        cache.put(i, i)
+    cache.clear()
+    assert len(cache) == 0 and cache.get(0) is None
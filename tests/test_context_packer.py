@@ -0,0 +1,29 @@
+import numpy as np
+
+from unified_llm.retrieval.context_packer import ContextPacker
+
+def candidate(content, vector, score):
+    return {"content": content, "values": np.asarray(vector, dtype=np.float32), "distance": score}
+
+def test_near_duplicates_are_dropped():
+    packer = ContextPacker(token_budget=100)
+    packed = packer.pack([
+        candidate("I live in Berlin", [1, 0, 0], 0.9),
+        candidate("I live in Berlin now", [1, 0.01, 0], 0.89),
+        candidate("I work on compilers", [0, 1, 0], 0.5),
+    ], max_facts=3)
+    assert [item["content"] for item in packed.items] == ["I live in Berlin", "I work on compilers"]
+    assert packed.dropped["redundant"] == 1
+
+def test_tokens_saved_is_never_negative():
+    # The short top hits are near-duplicates, so MMR swaps one for a longer fact
+    long_fact = "I have been writing a compiler for a small functional language in Rust for three years"
+    packer = ContextPacker(token_budget=1000)
+    packed = packer.pack([
+        candidate("I like tea", [1, 0, 0], 0.9),
+        candidate("I like tea a lot", [1, 0.01, 0], 0.89),
+        candidate(long_fact, [0, 1, 0], 0.5),
+    ], max_facts=2)
+    assert packed.items[-1]["content"] == long_fact
+    assert packed.tokens_used > 0
+    assert packed.tokens_saved == 0
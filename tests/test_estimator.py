@@ -0,0 +1,86 @@
+import asyncio
+import types
+
+import pytest
+
+from benchmarks.fakes import FakeLLMClient
+from benchmarks.synthetic import write_export
+from unified_llm.importers.chatgpt_importer import ChatGPTImporter
+from unified_llm.memory import estimator as estimator_module
+from unified_llm.memory.estimator import ImportEstimator, format_estimate
+from unified_llm.memory.extractor import MemoryExtractor
+
+class EveryOtherPreFilter:
+    def keep(self, texts):
+        return [i % 2 == 0 for i in range(len(texts))]
+
+@pytest.fixture(scope="module")
+def large_export(tmp_path_factory):
+    # Several read chunks (1 MiB each), so a cut-off read leaves most of it unread
+    return write_export(str(tmp_path_factory.mktemp("export") / "conversations.json"), "chatgpt", 1000, messages=20)
+
+def fake_clock(monkeypatch, step):
+    now = [0.0]
+
+    def perf_counter():
+        now[0] += step
+        return now[0]
+
+    monkeypatch.setattr(estimator_module, "time", types.SimpleNamespace(perf_counter=perf_counter))
+
+def test_full_estimate_counts_the_calls_an_import_makes(tmp_path):
+    path = write_export(str(tmp_path / "conversations.json"), "chatgpt", 40, messages=30)
+    conversations = ChatGPTImporter().import_data(path)
+    llm = FakeLLMClient(latency=0)
+    extractor = MemoryExtractor(llm_client=llm, batch_size=4)
+
+    report = ImportEstimator(extractor).estimate(conversations)
+    assert report["complete"] and report["scale"] == 1.0
+    assert report["conversations"] == 40
+    assert report["messages"] == sum(len(c.messages) for c in conversations)
+
+    async def run_import():
+        for conv in conversations:
+            await extractor.extract_facts_async(conv.messages, conversation_id=conv.id)
+
+    asyncio.run(run_import())
+    assert report["llm_calls"] == llm.calls
+    assert report["messages_to_llm"] == report["candidate_messages"]
+    assert "Projected time" in format_estimate(report)
+
+def test_prefilter_keep_rate_scales_what_reaches_the_llm(tmp_path):
+    path = write_export(str(tmp_path / "conversations.json"), "chatgpt", 40, messages=30)
+    conversations = ChatGPTImporter().import_data(path)
+    extractor = MemoryExtractor(llm_client=FakeLLMClient(latency=0), prefilter=EveryOtherPreFilter())
+    report = ImportEstimator(extractor).estimate(conversations)
+    assert report["prefilter_keep_rate"] == 0.5
+    assert report["messages_to_llm"] == pytest.approx(report["candidate_messages"] / 2, abs=1)
+
+    # In shadow mode every message is still sent
+    extractor.prefilter_shadow = True
+    assert ImportEstimator(extractor).estimate(conversations)["prefilter_keep_rate"] == 1.0
+
+def test_cut_off_read_is_extrapolated_by_bytes(large_export, monkeypatch):
+    extractor = MemoryExtractor(llm_client=FakeLLMClient(latency=0))
+    importer = ChatGPTImporter()
+    full = ImportEstimator(extractor).estimate_file(importer, large_export, max_seconds=None)
+
+    # Each clock read advances 1s, so the budget runs out about 600 conversations in
+    fake_clock(monkeypatch, step=1.0)
+    partial = ImportEstimator(extractor).estimate_file(importer, large_export, max_seconds=600)
+    assert not partial["complete"]
+    assert partial["bytes_read"] < partial["total_bytes"] == full["total_bytes"]
+    assert partial["scale"] == pytest.approx(partial["total_bytes"] / partial["bytes_read"], abs=1e-3)
+    # bytes_read runs up to one read chunk ahead of the parser, which biases a
+    # short read low; the tolerance covers that on this 9 MB export
+    for key in ("conversations", "messages", "candidate_messages", "llm_calls", "prompt_tokens"):
+        assert partial[key] == pytest.approx(full[key], rel=0.25), key
+    assert "extrapolated" in format_estimate(partial)
+
+def test_a_fully_read_export_is_never_extrapolated(tmp_path, monkeypatch):
+    path = write_export(str(tmp_path / "conversations.json"), "chatgpt", 20)
+    fake_clock(monkeypatch, step=1.0)
+    report = ImportEstimator(MemoryExtractor(llm_client=FakeLLMClient(latency=0))).estimate_file(
+        ChatGPTImporter(), path, max_seconds=0)
+    # The export fits in one read chunk, so it is parsed to the end despite the budget
+    assert report["complete"] and report["conversations"] == 20
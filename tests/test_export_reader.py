@@ -0,0 +1,75 @@
+import io
+import json
+import zipfile
+
+import pytest
+
+from benchmarks.synthetic import write_export
+from unified_llm.importers.chatgpt_importer import ChatGPTImporter
+from unified_llm.importers.export_reader import export_size, iter_json_array, open_export
+
+ITEMS = [
+    {"id": "a", "text": "commas, brackets ] [ and \"quotes\""},
+    [1, [2, [3]], {"nested": {"deep": True}}],
+    "a plain string",
+    {"id": "b", "text": "x" * 500, "unicode": "café ☃"},
+    None,
+    42,
+]
+
+class CountingReader(io.StringIO):
+    def __init__(self, text):
+        super().__init__(text)
+        self.chars_read = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.chars_read += len(chunk)
+        return chunk
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64, 1 << 20])
+def test_items_straddling_chunk_boundaries_parse_like_json_load(chunk_size):
+    text = "\n  " + json.dumps(ITEMS, indent=2) + "\n"
+    assert list(iter_json_array(io.StringIO(text), chunk_size=chunk_size)) == ITEMS
+
+def test_first_item_is_yielded_before_the_rest_is_read():
+    text = json.dumps([{"n": i, "pad": "y" * 100} for i in range(1000)])
+    reader = CountingReader(text)
+    items = iter_json_array(reader, chunk_size=256)
+    assert next(items)["n"] == 0
+    assert reader.chars_read < 1024
+    assert sum(1 for _ in items) == 999
+
+@pytest.mark.parametrize("text", ["", "  ", "{}", "[1, 2", "[1, {\"open\": "])
+def test_malformed_arrays_raise(text):
+    with pytest.raises(ValueError):
+        list(iter_json_array(io.StringIO(text), chunk_size=4))
+
+def test_empty_array_yields_nothing():
+    assert list(iter_json_array(io.StringIO(" [ ] "))) == []
+
+def test_zip_export_reads_like_the_bare_file(tmp_path):
+    path = write_export(str(tmp_path / "conversations.json"), "chatgpt", 30, messages=6)
+    archive = tmp_path / "export.zip"
+    with zipfile.ZipFile(archive, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("export/chat.html", "<html></html>")
+        zf.write(path, "export/conversations.json")
+        zf.writestr("export/archive/old/conversations.json", "[]")
+
+    # The top-level member is picked, and sized uncompressed
+    assert export_size(str(archive)) == export_size(path)
+    with open_export(str(archive)) as zipped, open_export(path) as bare:
+        assert zipped.read() == bare.read()
+
+    importer = ChatGPTImporter()
+    from_zip = importer.import_data(str(archive))
+    assert len(from_zip) == 30
+    assert from_zip == importer.import_data(path)
+
+def test_zip_without_conversations_is_rejected(tmp_path):
+    archive = tmp_path / "export.zip"
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("chat.html", "<html></html>")
+    with pytest.raises(ValueError, match="conversations.json"):
+        with open_export(str(archive)):
+            pass
@@ -0,0 +1,43 @@
+import asyncio
+import threading
+
+from unified_llm.memory.extractor import MemoryExtractor
+from unified_llm.models import Message
+from benchmarks.fakes import FakeLLMClient
+
+MESSAGES = [
+    Message(role="user", content="I prefer Python over Java for backend services.", id="m1"),
+    Message(role="user", content="I live in Lisbon and work remotely most days.", id="m2"),
+    Message(role="user", content="Can you explain how a B-tree rebalances itself?", id="m3"),
+]
+
+class RejectLisbon:
+    """Pre-filter stand-in that drops one fact-bearing message and records its thread."""
+
+    def __init__(self):
+        self.threads = []
+
+    def keep(self, texts):
+        self.threads.append(threading.get_ident())
+        return ["Lisbon" not in text for text in texts]
+
+def extract(extractor):
+    async def run():
+        facts = await extractor.extract_facts_async(MESSAGES)
+        return facts, threading.get_ident()
+    return asyncio.run(run())
+
+def test_prefilter_drops_messages_off_the_event_loop():
+    prefilter = RejectLisbon()
+    extractor = MemoryExtractor(llm_client=FakeLLMClient(latency=0), prefilter=prefilter)
+    facts, loop_thread = extract(extractor)
+    assert [fact.source_message_id for fact in facts] == ["m1"]
+    assert prefilter.threads and loop_thread not in prefilter.threads
+
+def test_shadow_mode_sends_everything_and_counts_would_be_losses():
+    extractor = MemoryExtractor(llm_client=FakeLLMClient(latency=0), prefilter=RejectLisbon(),
+                                prefilter_shadow=True)
+    facts, _ = extract(extractor)
+    assert sorted(fact.source_message_id for fact in facts) == ["m1", "m2"]
+    assert extractor.shadow_facts == {"kept": 1, "would_skip": 1}
+    assert extractor.llm_calls_avoided == 0
@@ -0,0 +1,25 @@
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+from benchmarks.fakes import HashingEmbeddingService
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPT = ("from benchmarks.fakes import HashingEmbeddingService; "
+          "print(HashingEmbeddingService().embed(['I live in Lisbon with my dog']).nonzero()[1].tolist())")
+
+def test_hashing_embeddings_are_stable_across_processes():
+    # Different hash seeds would move tokens between buckets if hash() were used
+    outputs = {
+        subprocess.run([sys.executable, "-c", SCRIPT], capture_output=True, text=True, check=True,
+                       env={**os.environ, "PYTHONHASHSEED": seed}, cwd=ROOT).stdout
+        for seed in ("1", "2", "3")
+    }
+    assert len(outputs) == 1
+
+def test_hashing_embeddings_are_unit_length():
+    vectors = HashingEmbeddingService().embed(["I prefer tea", ""])
+    np.testing.assert_allclose(np.linalg.norm(vectors[0]), 1.0, rtol=1e-6)
+    assert not vectors[1].any()
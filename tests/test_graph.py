@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+from unified_llm.graph import layout
+from unified_llm.graph.service import GraphService
+from conftest import make_facts, unit_vectors
+
+def brute_force_neighbours(vectors, k):
+    sims = vectors @ vectors.T
+    np.fill_diagonal(sims, -np.inf)
+    return np.sort(np.argsort(-sims, axis=1)[:, :k], axis=1)
+
+def test_knn_blocks_stay_bounded_and_match_brute_force(rng, monkeypatch):
+    vectors = unit_vectors(rng, 300)
+    shapes = []
+    matmul = np.ndarray.__matmul__
+
+    class Recording(np.ndarray):
+        def __matmul__(self, other):
+            result = matmul(np.asarray(self), other)
+            shapes.append(result.shape)
+            return result
+
+    monkeypatch.setattr(layout, "KNN_BLOCK_FLOATS", 300 * 16)
+    rows, cols, _ = layout.knn_edges(vectors.view(Recording), vectors, k=5)
+    assert max(a * b for a, b in shapes) <= 300 * 16
+    neighbours = np.sort(cols.reshape(300, 5), axis=1)
+    np.testing.assert_array_equal(neighbours, brute_force_neighbours(vectors, 5))
+    np.testing.assert_array_equal(rows, np.repeat(np.arange(300), 5))
+
+def test_get_graph_survives_invalidation_during_build(local_store):
+    local_store.add_facts(make_facts(50))
+    graphs = GraphService(local_store)
+    build = graphs.build_graph
+
+    def build_then_invalidate(**kwargs):
+        # A PATCH/DELETE landing between the build and get_graph returning
+        graph = build(**kwargs)
+        graphs.invalidate(kwargs.get("namespace", ""))
+        return graph
+
+    graphs.build_graph = build_then_invalidate
+    assert graphs.get_graph().number_of_nodes() == 50
+    # The next request rebuilds
+    assert graphs.get_graph().number_of_nodes() == 50
+
+def test_positions_are_pruned_to_the_current_facts(local_store):
+    local_store.add_facts(make_facts(40))
+    graphs = GraphService(local_store)
+    before = {node: (attrs["x"], attrs["y"]) for node, attrs in graphs.get_graph().nodes(data=True)}
+    deleted = sorted(before)[:15]
+    local_store.delete_facts(deleted)
+
+    graph = graphs.get_graph()
+    assert set(graphs._positions[""]) == set(graph.nodes) == set(before) - set(deleted)
+    # Survivors stay where they were drawn
+    for node, attrs in graph.nodes(data=True):
+        assert (attrs["x"], attrs["y"]) == pytest.approx(before[node])
+
+    local_store.delete_facts(list(graph.nodes))
+    assert graphs.get_graph().number_of_nodes() == 0
+    assert "" not in graphs._positions
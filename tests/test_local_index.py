@@ -0,0 +1,136 @@
+import numpy as np
+
+from unified_llm.storage.local_index import LocalIndex
+from conftest import unit_vectors
+
+def make_index(tmp_path, **kwargs):
+    return LocalIndex(str(tmp_path / "index"), dimension=8, auto_compact=False, **kwargs)
+
+def add_rows(index, rng, ids, replace=False, keep_seq=False, **meta):
+    vectors = unit_vectors(rng, len(ids))
+    index.add(ids, vectors, [{"content": fact_id, **meta} for fact_id in ids], replace=replace, keep_seq=keep_seq)
+    return vectors
+
+def test_add_get_and_search(tmp_path, rng):
+    index = make_index(tmp_path)
+    vectors = add_rows(index, rng, ["a", "b", "c"])
+    assert index.count() == 3
+    vector, meta = index.get("b")
+    np.testing.assert_allclose(vector, vectors[1])
+    assert meta == {"content": "b"}
+    assert index.get("missing") is None
+
+    hits = index.search(vectors[2], k=2)
+    assert [hit["id"] for hit in hits][0] == "c"
+    assert hits[0]["score"] > hits[1]["score"]
+
+def test_add_skips_existing_ids_unless_replace(tmp_path, rng):
+    index = make_index(tmp_path)
+    add_rows(index, rng, ["a", "b"], version=1)
+    assert index.add(["a"], unit_vectors(rng, 1), [{"content": "a", "version": 2}]) == 0
+    assert index.get("a")[1]["version"] == 1
+
+    add_rows(index, rng, ["a"], replace=True, version=2)
+    assert index.count() == 2
+    assert index.get("a")[1]["version"] == 2
+
+def test_deleted_rows_are_masked_from_search_and_lookups(tmp_path, rng):
+    index = make_index(tmp_path)
+    vectors = add_rows(index, rng, ["a", "b", "c"])
+    assert index.delete(["b", "missing"]) == 1
+    assert index.count() == 2
+    assert index.get("b") is None
+    assert "b" not in [hit["id"] for hit in index.search(vectors[1], k=3)]
+    assert index.get_many(["a", "b", "c"])[1] is None
+
+def test_compaction_keeps_live_rows_in_order(tmp_path, rng):
+    index = make_index(tmp_path, max_segments=2)
+    for batch in (["a", "b"], ["c", "d"], ["e", "f"]):
+        add_rows(index, rng, batch)
+    index.delete(["c"])
+    assert index.compact()
+    assert len(index._segments) <= 2
+    assert [fact_id for fact_id, _ in index.iter_rows()] == ["a", "b", "d", "e", "f"]
+
+    rows, _ = index.page(limit=2)
+    rows_after, _ = index.page(limit=10, after_seq=index._segments[0].seqs[1])
+    assert [fact_id for fact_id, _ in rows] == ["a", "b"]
+    assert [fact_id for fact_id, _ in rows_after] == ["d", "e", "f"]
+
+def test_second_instance_sees_writes(tmp_path, rng):
+    writer = make_index(tmp_path)
+    reader = make_index(tmp_path)
+    add_rows(writer, rng, ["a", "b"])
+    assert reader.count() == 2
+    writer.delete(["a"])
+    add_rows(writer, rng, ["b"], replace=True, version=2)
+    assert reader.get("a") is None
+    assert reader.get("b")[1]["version"] == 2
+
+def test_id_map_matches_segments_after_random_writes(tmp_path):
+    rng = np.random.default_rng(1)
+    writer = make_index(tmp_path, max_segments=4)
+    reader = make_index(tmp_path)
+    live = set()
+    for step in range(150):
+        op = rng.random()
+        ids = [f"f{i}" for i in rng.integers(0, 100, size=int(rng.integers(1, 10)))]
+        if op < 0.5:
+            replace = bool(rng.random() < 0.5)
+            add_rows(writer, rng, ids, replace=replace, keep_seq=replace and bool(rng.random() < 0.5))
+            live.update(ids)
+        elif op < 0.8:
+            writer.delete(ids)
+            live.difference_update(ids)
+        else:
+            writer.compact()
+        if rng.random() < 0.5:
+            reader.refresh()
+
+    reader.refresh()
+    for index in (writer, reader):
+        rebuilt = {}
+        for seg in index._segments:
+            for row in seg.live_rows().tolist():
+                rebuilt[seg.ids[row]] = (seg, row)
+        assert index._locations == rebuilt
+        assert set(index._locations) == live
+        listed = page_ids(index, 7)
+        assert sorted(listed) == sorted(live)
+
+def page_ids(index, limit, **kwargs):
+    seen, after = [], None
+    while True:
+        rows, after = index.page(limit, after_seq=after, **kwargs)
+        seen.extend(fact_id for fact_id, _ in rows)
+        if after is None:
+            return seen
+
+def test_keep_seq_replaces_a_row_in_place(tmp_path, rng):
+    index = make_index(tmp_path)
+    ids = [f"f{i}" for i in range(10)]
+    add_rows(index, rng, ids)
+    add_rows(index, rng, ["f3", "f7"], replace=True, keep_seq=True, version=2)
+    add_rows(index, rng, ["f10"])
+    for limit in (1, 3, 20):
+        assert page_ids(index, limit) == ids + ["f10"]
+    assert index.get("f3")[1]["version"] == 2
+
+    index.max_segments = 1
+    assert index.compact()
+    seqs = index._segments[0].seqs
+    assert (np.diff(seqs) > 0).all()
+    assert page_ids(index, 4) == ids + ["f10"]
+
+def test_cursor_sees_a_fact_edited_mid_walk_once(tmp_path, rng):
+    index = make_index(tmp_path)
+    ids = [f"f{i}" for i in range(12)]
+    add_rows(index, rng, ids, category="work")
+    rows, after = index.page(5)
+    seen = [fact_id for fact_id, _ in rows]
+    # One fact already returned and one still ahead are edited
+    add_rows(index, rng, ["f2", "f9"], replace=True, keep_seq=True, category="work")
+    while after is not None:
+        rows, after = index.page(5, after_seq=after, category="work")
+        seen.extend(fact_id for fact_id, _ in rows)
+    assert seen == ids
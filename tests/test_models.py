@@ -0,0 +1,59 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from unified_llm.models import Conversation, ConversationBatch, Fact, Message
+
+def make_conversations():
+    return [
+        Conversation(
+            id="c1",
+            title="Aware timestamps",
+            messages=[
+                Message("user", "I prefer tea ☕", datetime(2024, 5, 1, 9, 30, tzinfo=timezone.utc), id="m1"),
+                Message("assistant", "Noted.", datetime(2024, 5, 1, 9, 31, tzinfo=timezone.utc), {"model": "x"}, id="m2"),
+            ],
+            created_at=datetime(2024, 5, 1, tzinfo=timezone.utc),
+            metadata={"source": "chatgpt"}
+        ),
+        Conversation(id="c2", title=None, messages=[]),
+        Conversation(
+            id="c3",
+            title="Naive and missing timestamps",
+            messages=[
+                Message("system", "", datetime(2024, 5, 2, 8, 0, 0, 500000)),
+                Message("user", "no timestamp", None, id="m4"),
+            ]
+        ),
+    ]
+
+def test_batch_round_trips_conversations():
+    conversations = make_conversations()
+    batch = ConversationBatch(conversations)
+    assert len(batch) == 3
+    assert batch.message_count == 4
+    assert list(batch) == conversations
+    assert batch.conversation(1).messages == []
+    # Roles are stored once each, as small integer codes
+    assert batch.roles == ["user", "assistant", "system"]
+
+def test_batch_keeps_timezones_and_sparse_metadata():
+    batch = ConversationBatch(make_conversations())
+    assert batch.message(0).timestamp.tzinfo is timezone.utc
+    assert batch.message(2).timestamp == datetime(2024, 5, 2, 8, 0, 0, 500000)
+    assert batch.message(2).timestamp.tzinfo is None
+    assert batch.message(3).timestamp is None
+    assert batch.message_metadata == {1: {"model": "x"}}
+    assert batch.message(2).id is None and batch.message(2).content == ""
+
+def test_batch_accepts_a_generator_and_reports_column_bytes():
+    batch = ConversationBatch(c for c in make_conversations())
+    assert len(batch) == 3
+    assert batch.nbytes >= len("I prefer tea ☕".encode("utf-8"))
+
+def test_models_are_slotted_and_legacy_metadata_ids_are_lifted():
+    message = Message("user", "hi", metadata={"id": "m9", "lang": "en"})
+    assert (message.id, message.metadata) == ("m9", {"lang": "en"})
+    assert Message("user", "hi", metadata={"id": "m9"}).metadata is None
+    with pytest.raises(AttributeError):
+        Fact("I like tea", "preference").extra = 1
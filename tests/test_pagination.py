@@ -0,0 +1,60 @@
+import pytest
+
+from conftest import make_facts
+
+def list_all(store, limits, **filters):
+    """Walks every page, taking the page size for each call from limits in turn."""
+    seen, cursor, calls = [], None, 0
+    while True:
+        facts, cursor = store.list_facts(limit=limits[calls % len(limits)], cursor=cursor, **filters)
+        seen.extend(fact["id"] for fact in facts)
+        calls += 1
+        if cursor is None:
+            return seen
+
+def list_all_from(store, cursor):
+    seen = []
+    while cursor is not None:
+        facts, cursor = store.list_facts(limit=4, cursor=cursor)
+        seen.extend(fact["id"] for fact in facts)
+    return seen
+
+@pytest.mark.parametrize("backend", ["local_store", "pinecone_store"])
+@pytest.mark.parametrize("limits", [[7], [50], [3, 40, 1, 17], [150, 20]])
+def test_cursor_visits_every_fact_once(request, backend, limits):
+    # Limits over 100 leave the Pinecone cursor mid-way through a listing page
+    store = request.getfixturevalue(backend)
+    store.add_facts(make_facts(430))
+    seen = list_all(store, limits)
+    assert len(seen) == 430
+    assert len(set(seen)) == 430
+
+@pytest.mark.parametrize("backend", ["local_store", "pinecone_store"])
+def test_cursor_order_is_stable_across_page_sizes(request, backend):
+    store = request.getfixturevalue(backend)
+    store.add_facts(make_facts(60))
+    assert list_all(store, [5]) == list_all(store, [60]) == list_all(store, [9, 2, 31])
+
+@pytest.mark.parametrize("backend", ["local_store", "pinecone_store"])
+def test_filters_apply_across_pages(request, backend):
+    store = request.getfixturevalue(backend)
+    store.add_facts(make_facts(40, category="work") + make_facts(40, category="hobby"))
+    work = list_all(store, [6], category="work")
+    assert len(work) == len(set(work)) == 40
+    for facts in store.get_facts(work):
+        assert facts["metadata"]["category"] == "work"
+
+def test_local_cursor_survives_writes_and_compaction(local_store):
+    local_store.add_facts(make_facts(30))
+    first, cursor = local_store.list_facts(limit=10)
+    index = local_store.get_local_index()
+    index.delete([first[0]["id"]])
+    index.compact()
+    local_store.add_facts(make_facts(5, category="late"))
+    rest = list_all_from(local_store, cursor)
+    assert len(rest) == 25
+    assert not set(rest) & {fact["id"] for fact in first}
+
+def test_invalid_cursor_is_rejected(local_store):
+    with pytest.raises(ValueError):
+        local_store.list_facts(cursor="not-a-cursor")
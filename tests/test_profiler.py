@@ -0,0 +1,98 @@
+import time
+import threading
+from collections import Counter
+
+import pytest
+
+import server
+from unified_llm.utils.profiler import Profile, SamplingProfiler
+
+TOKEN = "test-admin-token"
+ADMIN = {"X-Admin-Token": TOKEN}
+
+@pytest.fixture
+def admin_client(client, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_TOKEN", TOKEN)
+    return client
+
+def test_profile_endpoints_are_hidden_without_a_token(client):
+    assert client.post("/admin/profile", params={"seconds": 0.01}).status_code == 404
+    assert client.get("/admin/profile/abc").status_code == 404
+
+def test_profile_endpoints_need_the_right_token(admin_client):
+    assert admin_client.post("/admin/profile", params={"seconds": 0.01}).status_code == 403
+    response = admin_client.post("/admin/profile", params={"seconds": 0.01}, headers={"X-Admin-Token": "wrong"})
+    assert response.status_code == 403
+
+def test_profile_run_summarises_sampled_stacks(admin_client):
+    response = admin_client.post("/admin/profile", params={"seconds": 0.2, "interval_ms": 2, "idle": True},
+                                 headers=ADMIN)
+    assert response.status_code == 200
+    body = response.json()
+    assert body["samples"] > 0
+    assert set(body["paths"]) == {"rag", "retrieval", "embedding", "extraction"}
+    assert body["top_functions"][0]["total_samples"] <= body["samples"]
+
+    collapsed = admin_client.post("/admin/profile", params={"seconds": 0.05, "interval_ms": 2, "idle": True,
+                                                            "output": "collapsed"}, headers=ADMIN)
+    assert collapsed.headers["content-type"].startswith("text/plain")
+    assert all(line.rsplit(" ", 1)[1].isdigit() for line in collapsed.text.splitlines())
+
+def test_profile_run_limits(admin_client):
+    too_long = server.PROFILE_MAX_SECONDS + 1
+    assert admin_client.post("/admin/profile", params={"seconds": too_long}, headers=ADMIN).status_code == 400
+    # One profiler at a time
+    with server._profile_lock:
+        assert admin_client.post("/admin/profile", params={"seconds": 0.01}, headers=ADMIN).status_code == 409
+
+def test_request_profiles_are_fetched_by_id(admin_client):
+    plain = admin_client.get("/search", params={"q": "tea"}, headers={"X-Profile": "1"})
+    assert "X-Profile-Id" not in plain.headers
+
+    profiled = admin_client.get("/search", params={"q": "tea"}, headers={"X-Profile": "1", **ADMIN})
+    assert profiled.status_code == 200
+    profile_id = profiled.headers["X-Profile-Id"]
+    body = admin_client.get(f"/admin/profile/{profile_id}", headers=ADMIN).json()
+    assert body["interval_seconds"] == 0.001
+    assert admin_client.get("/admin/profile/missing", headers=ADMIN).status_code == 404
+
+def test_summary_attributes_samples_to_code_paths():
+    stacks = Counter({
+        ("MainThread", "server:query", "unified_llm.rag_engine:generate", "numpy:dot"): 3,
+        ("MainThread", "server:query", "unified_llm.retrieval.retriever:search"): 1,
+        ("worker", "threading:run", "unified_llm.memory.extractor:extract", "unified_llm.memory.extractor:extract"): 2,
+    })
+    summary = Profile(stacks, interval=0.01, duration=1.0).summary()
+    assert summary["samples"] == 6
+    assert summary["paths"]["rag"]["samples"] == 3
+    assert summary["paths"]["rag"]["seconds"] == 0.03
+    assert summary["paths"]["retrieval"]["samples"] == 1
+    assert summary["paths"]["embedding"]["samples"] == 0
+    top = {f["function"]: f for f in summary["top_functions"]}
+    assert (top["numpy:dot"]["self_samples"], top["server:query"]["total_samples"]) == (3, 4)
+    # Recursion counts once per sample
+    assert top["unified_llm.memory.extractor:extract"]["total_samples"] == 2
+
+def test_sampler_sees_a_busy_thread_and_skips_parked_ones():
+    stop = threading.Event()
+
+    def spin():
+        while not stop.is_set():
+            sum(range(1000))
+
+    def park():
+        stop.wait(5)
+
+    threads = [threading.Thread(target=spin, name="spinner"), threading.Thread(target=park, name="parked")]
+    for thread in threads:
+        thread.start()
+    profiler = SamplingProfiler(interval=0.002).start()
+    time.sleep(0.1)
+    profile = profiler.stop()
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    sampled_threads = {stack[0] for stack in profile.stacks}
+    assert "spinner" in sampled_threads
+    assert "parked" not in sampled_threads
@@ -0,0 +1,127 @@
+import asyncio
+
+import numpy as np
+
+from conftest import make_facts
+
+class CountingStore:
+    def __init__(self):
+        self.calls = 0
+
+    def namespace_sizes(self):
+        self.calls += 1
+        return {"": 3, "alice": 5}
+
+def test_metrics_reuse_index_sizes_within_ttl(client):
+    store = CountingStore()
+    client.factory.register("vector_store", store)
+    for _ in range(3):
+        body = client.get("/metrics").text
+    assert 'unified_llm_index_size{namespace="alice"} 5' in body
+    assert store.calls == 1
+
+def test_facts_listing_pages_through_the_api(client):
+    store = client.factory.get("vector_store")
+    store.add_facts(make_facts(25))
+    seen, cursor = [], None
+    while True:
+        response = client.get("/facts", params={"limit": 10, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        seen.extend(fact["id"] for fact in response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert len(seen) == len(set(seen)) == 25
+    assert client.get("/facts", params={"cursor": "garbage"}).status_code == 400
+
+def list_ids(client):
+    return [fact["id"] for fact in client.get("/facts", params={"limit": 1000}).json()]
+
+def test_patch_keeps_the_fact_in_place_and_delete_removes_it(client):
+    client.factory.get("vector_store").add_facts(make_facts(5))
+    ids = list_ids(client)
+    response = client.patch(f"/facts/{ids[1]}", json={"content": "I prefer green tea"})
+    assert response.status_code == 200
+    assert response.json()["content"] == "I prefer green tea"
+    assert list_ids(client) == ids
+
+    assert client.delete(f"/facts/{ids[0]}").json() == {"deleted": 1}
+    assert client.delete(f"/facts/{ids[0]}").status_code == 404
+    assert client.post("/facts/delete", json={"ids": ids[2:4]}).json() == {"deleted": 2}
+    assert list_ids(client) == [ids[1], ids[4]]
+
+def test_patch_returns_503_when_embedding_fails(client):
+    store = client.factory.get("vector_store")
+    store.add_facts(make_facts(1))
+    fact_id = list_ids(client)[0]
+    store.embedding_service.embed = lambda texts: np.empty((0, 384), dtype=np.float32)
+    response = client.patch(f"/facts/{fact_id}", json={"content": "I moved to Porto"})
+    assert response.status_code == 503
+    assert "embed" in response.json()["detail"]
+
+def test_query_batch_answers_every_query_in_order(client):
+    client.factory.get("vector_store").add_facts(make_facts(10))
+    queries = [f"question {i}" for i in range(6)]
+    response = client.post("/query/batch", json={"queries": queries, "top_k": 3})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["query"] for r in results] == queries
+    assert all(r["error"] is None and r["answer"] and len(r["retrieved_facts"]) == 3 for r in results)
+
+    assert client.post("/query/batch", json={"queries": queries, "concurrency": 0}).status_code == 400
+    response = client.post("/query/batch", json={"queries": ["q"] * 1000})
+    assert response.status_code == 400
+
+class PeakTrackingLLM:
+    def __init__(self):
+        self.active = self.peak = 0
+
+    async def generate_async(self, messages):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(0.01)
+        self.active -= 1
+        return "Answer"
+
+def test_query_batch_concurrency_is_capped_at_the_server_budget(client):
+    client.factory.get("vector_store").add_facts(make_facts(10))
+    rag_engine = client.factory.get("rag_engine")
+    rag_engine.llm_client = llm = PeakTrackingLLM()
+    rag_engine.batch_concurrency = 2
+    queries = [f"question {i}" for i in range(8)]
+
+    response = client.post("/query/batch", json={"queries": queries, "concurrency": 100})
+    assert response.status_code == 200
+    assert all(r["answer"] == "Answer" for r in response.json()["results"])
+    assert llm.peak == 2
+
+    # Asking for less than the budget is honoured
+    llm.peak = 0
+    client.post("/query/batch", json={"queries": [q + "?" for q in queries], "concurrency": 1})
+    assert llm.peak == 1
+
+def test_fact_and_source_lookups(client):
+    import server
+    from unified_llm.models import Conversation, Fact, Message
+    # Both read the index and the transcript log, so they must run in the threadpool
+    assert not asyncio.iscoroutinefunction(server.get_fact)
+    assert not asyncio.iscoroutinefunction(server.get_fact_source)
+
+    client.factory.get("transcript_store").append([Conversation(id="c1", title=None, messages=[
+        Message("assistant", "What do you drink?", id="m1"),
+        Message("user", "I prefer green tea in the morning", id="m2"),
+    ])])
+    store = client.factory.get("vector_store")
+    store.add_facts([Fact("User prefers green tea", "preference", source_message_id="m2"),
+                     Fact("User lives in Porto", "user_info", source_message_id="unarchived")])
+    ids = {fact["content"]: fact["id"] for fact in client.get("/facts").json()}
+
+    fact_id = ids["User prefers green tea"]
+    assert client.get(f"/facts/{fact_id}").json()["content"] == "User prefers green tea"
+    source = client.get(f"/facts/{fact_id}/source").json()
+    assert (source["conversation_id"], source["message_id"], source["role"]) == ("c1", "m2", "user")
+    assert source["content"] == "I prefer green tea in the morning"
+
+    assert client.get(f"/facts/{ids['User lives in Porto']}/source").status_code == 404
+    assert client.get("/facts/missing").status_code == 404
+    assert client.get("/facts/missing/source").status_code == 404
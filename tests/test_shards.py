@@ -0,0 +1,84 @@
+import numpy as np
+import pytest
+
+from unified_llm.storage.local_index import LocalIndex
+from unified_llm.storage.shards import ShardPool
+from conftest import unit_vectors
+
+class CountingPool:
+    """Counts searches the workers answered; search_batch falls back in-process on errors."""
+
+    def __init__(self, shards):
+        self.shards = shards
+        self.answered = 0
+
+    def should_scatter(self, rows):
+        return self.shards.should_scatter(rows)
+
+    def search(self, *args):
+        result = self.shards.search(*args)
+        self.answered += 1
+        return result
+
+@pytest.fixture(scope="module")
+def workers():
+    # Scatter every search, however small the index
+    shards = ShardPool(3, min_rows=0)
+    yield shards
+    shards.close()
+
+@pytest.fixture
+def pool(workers):
+    counting = CountingPool(workers)
+    yield counting
+    assert counting.answered > 0
+
+def build_index(tmp_path, rng):
+    index = LocalIndex(str(tmp_path / "index"), dimension=8, auto_compact=False)
+    # Uneven segments, so shards cut across segment boundaries
+    for size in (37, 5, 120, 61):
+        start = index.count()
+        ids = [f"f{i}" for i in range(start, start + size)]
+        index.add(ids, unit_vectors(rng, size), [{"content": fact_id} for fact_id in ids])
+    index.delete([f"f{i}" for i in range(0, 223, 4)])
+    return index
+
+def test_plan_covers_every_row_once():
+    class Seg:
+        def __init__(self, name, n):
+            self.name, self.n, self.tombstones = name, n, None
+
+        def __len__(self):
+            return self.n
+
+    segments = [Seg("a", 10), Seg("b", 3), Seg("c", 25)]
+    # plan() only needs the worker count, so no processes are started
+    shards = ShardPool.__new__(ShardPool)
+    shards.workers = 4
+    plan = shards.plan(segments)
+    assert len(plan) == 4
+    covered = sorted((s, row) for slices in plan for s, _, _, lo, hi in slices for row in range(lo, hi))
+    assert covered == [(s, row) for s, seg in enumerate(segments) for row in range(len(seg))]
+    assert max(sum(hi - lo for *_, lo, hi in slices) for slices in plan) == 10
+
+def test_sharded_search_matches_in_process(tmp_path, rng, pool):
+    index = build_index(tmp_path, rng)
+    queries = unit_vectors(rng, 12)
+    for k in (1, 5, 200):
+        expected = index.search_batch(queries, k=k, include_vectors=True)
+        sharded = index.search_batch(queries, k=k, include_vectors=True, shards=pool)
+        assert [[m["id"] for m in ms] for ms in sharded] == [[m["id"] for m in ms] for ms in expected]
+        for got, want in zip(sharded, expected):
+            np.testing.assert_allclose([m["score"] for m in got], [m["score"] for m in want], rtol=1e-6)
+            assert [m["metadata"] for m in got] == [m["metadata"] for m in want]
+    # k beyond the live rows returns each live row once
+    assert len(sharded[0]) == index.count() == 223 - 56
+
+def test_sharded_search_sees_later_deletes_and_compaction(tmp_path, rng, pool):
+    index = build_index(tmp_path, rng)
+    queries = unit_vectors(rng, 4)
+    top = index.search_batch(queries, k=3, shards=pool)
+    index.delete([matches[0]["id"] for matches in top])
+    index.compact()
+    sharded = index.search_batch(queries, k=3, shards=pool)
+    assert [[m["id"] for m in ms] for ms in sharded] == [[m["id"] for m in ms] for ms in index.search_batch(queries, k=3)]
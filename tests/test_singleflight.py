@@ -0,0 +1,122 @@
+import time
+import asyncio
+import threading
+import uuid
+
+import pytest
+
+from unified_llm.utils.metrics import SINGLEFLIGHT_CALLS
+from unified_llm.utils.singleflight import SingleFlight
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.001)
+
+def shared_calls(flight):
+    return SINGLEFLIGHT_CALLS.labels(flight.name, "shared").value
+
+def run_threads(flight, key, fn, callers):
+    """Starts a leader, then callers - 1 more threads once it is in flight; returns their outcomes."""
+    outcomes = [None] * callers
+
+    def call(i):
+        try:
+            outcomes[i] = ("ok", flight.do(key, fn))
+        except Exception as e:
+            outcomes[i] = ("error", e)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+    threads[0].start()
+    wait_for(lambda: flight.in_flight == 1)
+    for thread in threads[1:]:
+        thread.start()
+    return threads, outcomes
+
+def test_concurrent_sync_calls_share_one_execution():
+    flight = SingleFlight(f"test-{uuid.uuid4().hex}")
+    release = threading.Event()
+    runs = []
+
+    def work():
+        runs.append(1)
+        release.wait(5)
+        return {"answer": 42}
+
+    threads, outcomes = run_threads(flight, "k", work, callers=5)
+    wait_for(lambda: shared_calls(flight) == 4)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(runs) == 1
+    assert all(status == "ok" for status, _ in outcomes)
+    # Every caller gets the very same object
+    assert all(value is outcomes[0][1] for _, value in outcomes)
+    assert flight.in_flight == 0
+    # Not a cache: the next call runs again, and other keys never wait
+    assert flight.do("k", lambda: "again") == "again"
+
+def test_sync_errors_reach_every_waiter():
+    flight = SingleFlight(f"test-{uuid.uuid4().hex}")
+    release = threading.Event()
+
+    def fail():
+        release.wait(5)
+        raise ValueError("backend down")
+
+    threads, outcomes = run_threads(flight, "k", fail, callers=3)
+    wait_for(lambda: shared_calls(flight) == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert [status for status, _ in outcomes] == ["error"] * 3
+    assert all(isinstance(e, ValueError) and str(e) == "backend down" for _, e in outcomes)
+    assert flight.in_flight == 0
+    assert flight.do("k", lambda: "recovered") == "recovered"
+
+def test_concurrent_async_calls_share_one_execution():
+    flight = SingleFlight(f"test-{uuid.uuid4().hex}")
+    runs = []
+
+    async def work(key):
+        runs.append(key)
+        await asyncio.sleep(0.01)
+        return [key]
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do_async(key, lambda key=key: work(key)) for key in "aaaab"))
+        assert results[:4] == [["a"]] * 4 and all(r is results[0] for r in results[:4])
+        assert results[4] == ["b"]
+        assert sorted(runs) == ["a", "b"]
+        assert flight.in_flight == 0
+
+    asyncio.run(scenario())
+
+def test_async_errors_reach_every_waiter_and_cancelling_one_spares_the_rest():
+    flight = SingleFlight(f"test-{uuid.uuid4().hex}")
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("backend down")
+
+    async def slow():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do_async("k", fail) for _ in range(3)), return_exceptions=True)
+        assert all(isinstance(r, ValueError) for r in results)
+
+        first = asyncio.ensure_future(flight.do_async("s", slow))
+        second = asyncio.ensure_future(flight.do_async("s", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        assert await second == "done"
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        assert flight.in_flight == 0
+
+    asyncio.run(scenario())
@@ -0,0 +1,112 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from unified_llm.storage.snapshot import MANIFEST, read_manifest
+from benchmarks.fakes import FakePineconeIndex
+from conftest import make_facts
+
+def facts_by_id(store, namespace=""):
+    ids = list(store.iter_fact_ids(namespace)) if store.index else [
+        fact_id for fact_id, _ in store.get_local_index(namespace).iter_rows()
+    ]
+    return {fact["id"]: fact for fact in store.get_facts(ids, namespace=namespace, include_values=True)}
+
+def assert_same_facts(a, b):
+    assert a.keys() == b.keys()
+    for fact_id, fact in a.items():
+        assert b[fact_id]["metadata"] == fact["metadata"]
+        np.testing.assert_allclose(b[fact_id]["values"], fact["values"], rtol=1e-6)
+
+def test_local_round_trip_keeps_ids_metadata_and_vectors(local_store, tmp_path):
+    local_store.add_facts(make_facts(120))
+    local_store.delete_facts([next(iter(facts_by_id(local_store)))])
+    snapshot = str(tmp_path / "snap")
+
+    manifest = local_store.export_snapshot(snapshot, chunk_size=50)
+    assert manifest["count"] == 119
+    assert [chunk["count"] for chunk in manifest["chunks"]] == [50, 50, 19]
+
+    result = local_store.import_snapshot(snapshot, namespace="restored")
+    assert result["facts"] == 119
+    assert_same_facts(facts_by_id(local_store), facts_by_id(local_store, "restored"))
+
+    # Restores upsert by id, so running one again changes nothing
+    local_store.import_snapshot(snapshot, namespace="restored")
+    assert local_store.count("restored") == 119
+
+def test_migrates_between_local_and_pinecone(local_store, tmp_path):
+    local_store.add_facts(make_facts(80))
+    local = facts_by_id(local_store)
+    local_store.export_snapshot(str(tmp_path / "from-local"))
+
+    local_store.index = FakePineconeIndex()
+    local_store.use_mock = False
+    local_store.import_snapshot(str(tmp_path / "from-local"))
+    assert_same_facts(local, facts_by_id(local_store))
+
+    manifest = local_store.export_snapshot(str(tmp_path / "from-pinecone"), chunk_size=30)
+    assert manifest["source"] == "pinecone" and manifest["count"] == 80
+    local_store.index = None
+    local_store.use_mock = True
+    local_store.import_snapshot(str(tmp_path / "from-pinecone"), namespace="back")
+    assert_same_facts(local, facts_by_id(local_store, "back"))
+
+def test_corrupt_chunk_is_rejected_before_writing(local_store, tmp_path):
+    local_store.add_facts(make_facts(10))
+    snapshot = str(tmp_path / "snap")
+    local_store.export_snapshot(snapshot)
+    with open(os.path.join(snapshot, "chunk-00000.jsonl"), "r+b") as f:
+        f.seek(10)
+        f.write(b"X")
+    with pytest.raises(ValueError, match="Checksum"):
+        local_store.import_snapshot(snapshot, namespace="restored")
+    assert local_store.count("restored") == 0
+
+def test_incomplete_or_existing_snapshots_are_refused(local_store, tmp_path):
+    local_store.add_facts(make_facts(5))
+    snapshot = str(tmp_path / "snap")
+    local_store.export_snapshot(snapshot)
+    with pytest.raises(FileExistsError):
+        local_store.export_snapshot(snapshot)
+
+    os.remove(os.path.join(snapshot, MANIFEST))
+    with pytest.raises(ValueError, match="incomplete"):
+        read_manifest(snapshot)
+
+def test_dimension_mismatch_is_refused(local_store, tmp_path):
+    local_store.add_facts(make_facts(5))
+    snapshot = str(tmp_path / "snap")
+    local_store.export_snapshot(snapshot)
+    path = os.path.join(snapshot, MANIFEST)
+    with open(path) as f:
+        manifest = json.load(f)
+    manifest["dimension"] = 768
+    with open(path, "w") as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError, match="dimension"):
+        local_store.import_snapshot(snapshot, namespace="restored")
+
+class PodIndex:
+    """A Pinecone index without list_paginated, like pod-based and legacy ones."""
+
+    def __init__(self, index):
+        self._index = index
+
+    def __getattr__(self, name):
+        if name == "list_paginated":
+            raise AttributeError(name)
+        return getattr(self._index, name)
+
+def test_export_from_an_index_that_cannot_list_ids_fails_cleanly(pinecone_store, tmp_path):
+    pinecone_store.add_facts(make_facts(10))
+    pinecone_store.index = PodIndex(pinecone_store.index)
+    snapshot = str(tmp_path / "snap")
+    with pytest.raises(NotImplementedError, match="cannot list ids"):
+        pinecone_store.export_snapshot(snapshot)
+    # Nothing was written, so the empty export cannot be mistaken for a backup
+    assert not os.path.exists(snapshot)
+    with pytest.raises(NotImplementedError):
+        pinecone_store.iter_fact_ids()
@@ -0,0 +1,60 @@
+from datetime import datetime, timezone
+
+from unified_llm.models import Conversation, Message
+from unified_llm.storage.transcripts import TranscriptLog
+
+def make_conversation(conv_id, n=3, prefix="message"):
+    return Conversation(
+        id=conv_id,
+        title=f"Conversation {conv_id}",
+        messages=[
+            Message(
+                role="user" if i % 2 == 0 else "assistant",
+                content=f"{prefix} {i} of {conv_id}",
+                timestamp=datetime(2024, 1, 1, 12, i, tzinfo=timezone.utc),
+                id=f"{conv_id}-m{i}"
+            )
+            for i in range(n)
+        ],
+        created_at=datetime(2024, 1, 1, tzinfo=timezone.utc)
+    )
+
+def test_offsets_point_at_each_conversation_and_message(tmp_path):
+    log = TranscriptLog(str(tmp_path))
+    assert log.append([make_conversation(f"c{i}", n=i + 1) for i in range(5)], source="test") == 5
+
+    assert log.count() == 5
+    assert "c3" in log and "missing" not in log
+    conv = log.get_conversation("c3")
+    assert conv.title == "Conversation c3"
+    assert [m.content for m in conv.messages] == [f"message {i} of c3" for i in range(4)]
+    assert conv.messages[2].timestamp == datetime(2024, 1, 1, 12, 2, tzinfo=timezone.utc)
+
+    conversation_id, message = log.get_message("c4-m3")
+    assert conversation_id == "c4"
+    assert (message.role, message.content, message.id) == ("assistant", "message 3 of c4", "c4-m3")
+    assert log.get_conversation("missing") is None
+    assert log.get_message("missing") is None
+
+def test_reimport_supersedes_the_old_record(tmp_path):
+    log = TranscriptLog(str(tmp_path))
+    log.append([make_conversation("a"), make_conversation("b")])
+    log.append([make_conversation("a", n=2, prefix="edited")])
+
+    assert log.count() == 2
+    assert [m.content for m in log.get_conversation("a").messages] == ["edited 0 of a", "edited 1 of a"]
+    assert log.get_message("a-m1")[1].content == "edited 1 of a"
+    # The sequential pass skips the superseded record
+    assert sorted(c.id for c in log.iter_conversations()) == ["a", "b"]
+    assert len(next(c for c in log.iter_conversations() if c.id == "a").messages) == 2
+
+def test_reopened_and_refreshed_logs_see_every_append(tmp_path):
+    writer = TranscriptLog(str(tmp_path))
+    writer.append([make_conversation("a")])
+    reader = TranscriptLog(str(tmp_path))
+    assert reader.get_message("a-m0")[1].content == "message 0 of a"
+
+    # Appends by another instance (another process) are picked up on the next lookup
+    writer.append([make_conversation("b"), make_conversation("c")])
+    assert reader.count() == 3
+    assert reader.get_message("c-m2") == ("c", writer.get_message("c-m2")[1])
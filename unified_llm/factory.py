@@ -1,90 +1,226 @@
 import os
-from typing import Optional, Tuple
+import time
+import threading
+from collections.abc import Mapping
+from typing import Dict, Any
 from dotenv import load_dotenv
 
-from unified_llm.storage.vector_store import VectorStore
-from unified_llm.storage.embeddings import LocalEmbeddingService
-from unified_llm.memory.extractor import MemoryExtractor, LLMClient
-from unified_llm.retrieval.retriever import RetrievalService
-
 # Load environment variables once
 load_dotenv()
 
+# Components are built on first access, so importing this module (and the
+# modules below it) stays cheap. Heavy dependencies such as
+# sentence-transformers, Pinecone and networkx are only pulled in by the
+# builders that need them.
+COMPONENTS = (
+    "embedding_service",
+    "vector_store",
+    "llm_client",
+    "extractor",
+    "retriever",
+    "graph_service",
+    "persona_engine",
+    "rag_engine",
+    "transcript_store",
+)
+
 class ServiceFactory:
     _instance = None
-    
+    _instance_lock = threading.Lock()
+
     def __init__(self):
-        self.embedding_service = None
-        self.vector_store = None
-        self.llm_client = None
-        self.extractor = None
-        self.retriever = None
-        self._initialized = False
+        self._components: Dict[str, Any] = {}
+        self._locks: Dict[str, threading.Lock] = {name: threading.Lock() for name in COMPONENTS}
+        self._ready = threading.Event()
+        self._warm_up_thread = None
+        self._warm_up_error = None
+        self.timings: Dict[str, float] = {}
 
     @classmethod
     def get_instance(cls):
         if cls._instance is None:
-            cls._instance = ServiceFactory()
+            with cls._instance_lock:
+                if cls._instance is None:
+                    cls._instance = ServiceFactory()
         return cls._instance
 
-    def initialize(self):
-        if self._initialized:
-            return
+    def get(self, name: str):
+        """Returns a component, building it (and its dependencies) on first use."""
+        if name not in self._locks:
+            raise KeyError(name)
+        component = self._components.get(name)
+        if component is not None:
+            return component
+
+        with self._locks[name]:
+            component = self._components.get(name)
+            if component is None:
+                start = time.perf_counter()
+                component = getattr(self, f"_build_{name}")()
+                self.timings[name] = time.perf_counter() - start
+                self._components[name] = component
+        return component
+
+    def peek(self, name: str):
+        """Returns a component only if it has already been built."""
+        return self._components.get(name)
+
+    def register(self, name: str, component):
+        """Installs a prebuilt component, e.g. a fake for benchmarks."""
+        if name not in self._locks:
+            raise KeyError(name)
+        self._components[name] = component
+
+    # --- Builders ---
+
+    def _build_embedding_service(self):
+        from unified_llm.storage.embeddings import LocalEmbeddingService
+        # The model itself is loaded lazily (or by warm_up)
+        return LocalEmbeddingService()
+
+    def _build_vector_store(self):
+        from unified_llm.storage.vector_store import VectorStore
+        return VectorStore(
+            embedding_service=self.get("embedding_service"),
+            search_shards=int(os.environ.get("SEARCH_SHARDS", "0"))
+        )
+
+    def _build_llm_client(self):
+        from unified_llm.memory.extractor import LLMClient
 
-        print("Initializing Unified LLM Services...")
-        
-        # 1. Embeddings
-        print("Loading Embedding Service (all-MiniLM-L6-v2)...")
-        self.embedding_service = LocalEmbeddingService()
-        
-        # 2. Vector Store
-        self.vector_store = VectorStore(embedding_service=self.embedding_service)
-        
-        # 3. LLM Client
         deepseek_key = os.environ.get("DEEPSEEK_API_KEY")
         if not deepseek_key:
             print("WARNING: DEEPSEEK_API_KEY not found. Using MOCK LLM.")
-            self.llm_client = LLMClient() # Mock
-        else:
-            print("Initializing DeepSeek LLM...")
-            self.llm_client = LLMClient(
-                api_key=deepseek_key,
-                base_url="https://api.deepseek.com",
-                model="deepseek-chat"
+            return LLMClient() # Mock
+
+        print("Initializing DeepSeek LLM...")
+        return LLMClient(
+            api_key=deepseek_key,
+            base_url="https://api.deepseek.com",
+            model="deepseek-chat"
+        )
+
+    def _build_extractor(self):
+        from unified_llm.memory.extractor import MemoryExtractor
+        # Off by default: it drops messages, so measure its recall first
+        # with EXTRACTOR_PREFILTER=shadow
+        mode = os.environ.get("EXTRACTOR_PREFILTER", "0").lower()
+        prefilter = None
+        if mode not in ("0", "", "false", "off"):
+            from unified_llm.memory.prefilter import FactPreFilter
+            # Reuses the embedding model the vector store loads anyway
+            prefilter = FactPreFilter(
+                embedding_service=self.get("embedding_service"),
+                threshold=float(os.environ.get("EXTRACTOR_PREFILTER_THRESHOLD", "0.3"))
             )
-            
-        # 4. Services
-        self.extractor = MemoryExtractor(llm_client=self.llm_client)
-        self.retriever = RetrievalService(vector_store=self.vector_store)
-        
-        # 5. Graph Services
+        return MemoryExtractor(
+            llm_client=self.get("llm_client"),
+            prefilter=prefilter,
+            prefilter_shadow=mode == "shadow",
+            batch_size=int(os.environ.get("EXTRACTOR_BATCH_SIZE", "10")),
+            max_concurrent=int(os.environ.get("EXTRACTOR_CONCURRENCY", "3"))
+        )
+
+    def _build_retriever(self):
+        from unified_llm.retrieval.retriever import RetrievalService
+        ttl = float(os.environ.get("SEARCH_CACHE_TTL", "60"))
+        return RetrievalService(
+            vector_store=self.get("vector_store"),
+            cache_size=int(os.environ.get("SEARCH_CACHE_SIZE", "1024")),
+            cache_ttl=ttl if ttl > 0 else None
+        )
+
+    def _build_graph_service(self):
         from unified_llm.graph.service import GraphService
+        return GraphService(vector_store=self.get("vector_store"))
+
+    def _build_persona_engine(self):
         from unified_llm.graph.persona import PersonaEngine
-        
-        self.graph_service = GraphService(vector_store=self.vector_store)
-        self.persona_engine = PersonaEngine(
-            graph_service=self.graph_service,
-            llm_client=self.llm_client
+        return PersonaEngine(
+            graph_service=self.get("graph_service"),
+            llm_client=self.get("llm_client")
         )
-        
-        self._initialized = True
-        print("Services Initialized.")
 
-    def get_components(self):
-        """Returns all initialized components."""
-        if not self._initialized:
-            self.initialize()
-            
+    def _build_rag_engine(self):
+        from unified_llm.rag_engine import RAGEngine
+        from unified_llm.retrieval.context_packer import ContextPacker
+        return RAGEngine(
+            retrieval_service=self.get("retriever"),
+            llm_client=self.get("llm_client"),
+            context_packer=ContextPacker(
+                token_budget=int(os.environ.get("CONTEXT_TOKEN_BUDGET", "1024")),
+                mmr_lambda=float(os.environ.get("CONTEXT_MMR_LAMBDA", "0.7"))
+            ),
+            batch_concurrency=int(os.environ.get("LLM_BATCH_CONCURRENCY", "8"))
+        )
+
+    def _build_transcript_store(self):
+        from unified_llm.storage.transcripts import TranscriptStore
+        return TranscriptStore()
+
+    # --- Warm-up / readiness ---
+
+    def warm_up(self):
+        """Loads the embedding model and connects the vector store."""
+        start = time.perf_counter()
+        try:
+            print("Loading Embedding Service (all-MiniLM-L6-v2)...")
+            self.get("embedding_service").warm_up()
+            self.get("vector_store")
+            self.timings["warm_up"] = time.perf_counter() - start
+            self._warm_up_error = None
+            self._ready.set()
+            print(f"Services warmed up in {self.timings['warm_up']:.2f}s.")
+        except Exception as e:
+            # Stay not-ready so /health/ready reports the failure instead of 200
+            self._warm_up_error = f"{type(e).__name__}: {e}"
+            print(f"Error warming up services: {e}")
+
+    def start_warm_up(self):
+        """Runs warm_up() in a daemon thread so the caller can start serving immediately."""
+        if self._warm_up_thread is None:
+            self._warm_up_thread = threading.Thread(target=self.warm_up, name="service-warm-up", daemon=True)
+            self._warm_up_thread.start()
+        return self._warm_up_thread
+
+    def is_ready(self) -> bool:
+        return self._ready.is_set()
+
+    def readiness(self) -> Dict[str, Any]:
         return {
-            "embedding_service": self.embedding_service,
-            "vector_store": self.vector_store,
-            "llm_client": self.llm_client,
-            "extractor": self.extractor,
-            "retriever": self.retriever,
-            "graph_service": self.graph_service,
-            "persona_engine": self.persona_engine
+            "ready": self.is_ready(),
+            "error": self._warm_up_error,
+            "components": sorted(self._components),
+            "timings": {k: round(v, 4) for k, v in self.timings.items()}
         }
 
+    def initialize(self):
+        """Eagerly builds every component."""
+        print("Initializing Unified LLM Services...")
+        self.warm_up()
+        for name in COMPONENTS:
+            self.get(name)
+        print("Services Initialized.")
+
+    def get_components(self):
+        """Returns a lazy mapping of all components."""
+        return LazyComponents(self)
+
+class LazyComponents(Mapping):
+    """Read-only mapping that builds each component on first lookup."""
+
+    def __init__(self, factory: ServiceFactory):
+        self._factory = factory
+
+    def __getitem__(self, name: str):
+        return self._factory.get(name)
+
+    def __iter__(self):
+        return iter(COMPONENTS)
+
+    def __len__(self):
+        return len(COMPONENTS)
+
 def get_services():
     """Convenience function to get all services."""
     factory = ServiceFactory.get_instance()
@@ -0,0 +1,147 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Nearest neighbours that pull on each node, and random nodes that push it
+# away per iteration (negative sampling instead of all-pairs repulsion).
+NEIGHBORS = 8
+NEGATIVE_SAMPLES = 8
+ITERATIONS = 120
+INCREMENTAL_ITERATIONS = 40
+# Upper bound on the similarity block knn_edges holds at once (16 MB of float32)
+KNN_BLOCK_FLOATS = 4 * 1024 * 1024
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def knn_edges(queries: np.ndarray, vectors: np.ndarray, k: int = NEIGHBORS,
+              offset: Optional[int] = 0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Top-k cosine neighbours in vectors for each query row, one block of
+    queries per matrix product. Blocks are sized so the similarity matrix
+    stays under KNN_BLOCK_FLOATS however many vectors there are. offset is
+    the row of queries[0] within
+    vectors (excluded as its own neighbour), or None if queries are not in it.
+    Returns (rows, cols, weights) with rows indexing queries.
+    """
+    n = len(vectors)
+    k = min(k, n - (1 if offset is not None else 0))
+    if k <= 0 or not len(queries):
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+    block = max(1, KNN_BLOCK_FLOATS // n)
+    rows, cols, weights = [], [], []
+    for start in range(0, len(queries), block):
+        sims = queries[start:start + block] @ vectors.T
+        local = np.arange(len(sims))
+        if offset is not None:
+            sims[local, offset + start + local] = -np.inf
+        nearest = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        rows.append(np.repeat(start + local, k))
+        cols.append(nearest.ravel())
+        weights.append(np.take_along_axis(sims, nearest, axis=1).ravel())
+    # Dissimilar "neighbours" still attract a little so no node drifts off
+    return np.concatenate(rows), np.concatenate(cols), np.clip(np.concatenate(weights), 0.05, 1.0)
+
+def principal_plane(vectors: np.ndarray) -> np.ndarray:
+    """Projects vectors onto their top two principal components."""
+    centered = vectors - vectors.mean(axis=0)
+    if len(vectors) < 3:
+        return np.zeros((len(vectors), 2), dtype=np.float32)
+    _, eigvecs = np.linalg.eigh(centered.T @ centered)
+    axes = eigvecs[:, -2:][:, ::-1]
+    # eigh's sign is arbitrary; fix it so repeated builds agree
+    axes *= np.where(np.abs(axes).max(axis=0) == axes.max(axis=0), 1.0, -1.0)
+    return (centered @ axes).astype(np.float32)
+
+def scale_to(positions: np.ndarray, radius: float) -> np.ndarray:
+    spread = np.abs(positions - positions.mean(axis=0)).max() if len(positions) else 0.0
+    return positions * (radius / spread) if spread else positions
+
+def refine(positions: np.ndarray, rows: np.ndarray, cols: np.ndarray, weights: np.ndarray,
+           movable: np.ndarray, iterations: int = ITERATIONS, seed: int = 0) -> np.ndarray:
+    """Force-directed refinement, vectorized over all nodes per iteration.
+
+    Edges (rows -> cols) pull like springs of strength weight, and every
+    pair repels with 1/d. Repulsion is exact for each node's neighbours
+    and estimated for everything else from NEGATIVE_SAMPLES random nodes,
+    so an iteration is O(n * (k + samples)) instead of O(n^2). Only movable
+    nodes are updated, and the step size cools linearly.
+    """
+    rng = np.random.default_rng(seed)
+    positions = positions.astype(np.float32).copy()
+    n = len(positions)
+    moving = np.flatnonzero(movable)
+    if not len(moving) or n < 2:
+        return positions
+
+    # Edges only matter for the nodes they move
+    keep = movable[rows]
+    rows, cols, weights = rows[keep], cols[keep], weights[keep]
+    sample_scale = max(n - 1 - NEIGHBORS, 0) / NEGATIVE_SAMPLES
+    temperature = 0.1 * np.sqrt(n)
+
+    for i in range(iterations):
+        force = np.zeros_like(positions)
+        delta = positions[cols] - positions[rows]
+        dist = np.sqrt((delta ** 2).sum(axis=1, keepdims=True)) + 1e-3
+        # Spring pull minus the exact neighbour repulsion; settles at 1/sqrt(weight)
+        np.add.at(force, rows, (weights[:, None] - 1.0 / dist ** 2) * delta)
+
+        others = rng.integers(0, n, size=(len(moving), NEGATIVE_SAMPLES))
+        delta = positions[moving, None, :] - positions[others]
+        dist2 = (delta ** 2).sum(axis=2, keepdims=True) + 1e-3
+        step = force[moving] + sample_scale * (delta / dist2).sum(axis=1)
+
+        length = np.linalg.norm(step, axis=1, keepdims=True)
+        limit = temperature * (1.0 - i / iterations)
+        step *= np.minimum(1.0, limit / np.maximum(length, 1e-9))
+        positions[moving] += step
+    return positions
+
+def compute_layout(ids: List[str], vectors: np.ndarray,
+                   previous: Optional[Dict[str, np.ndarray]] = None,
+                   full_threshold: float = 0.5) -> Dict[str, np.ndarray]:
+    """Returns {id: [x, y]} for exactly the given ids; previous entries for other ids are dropped.
+
+    Without previous positions (or when more than full_threshold of the
+    nodes are new) everything is laid out from a PCA start. Otherwise
+    existing nodes keep their positions, new nodes start at the weighted
+    centre of their nearest placed neighbours, and only they are refined.
+    """
+    n = len(ids)
+    if n == 0:
+        return {}
+    vectors = normalize(vectors)
+    radius = float(np.sqrt(n))
+    previous = previous or {}
+    placed = np.array([fact_id in previous for fact_id in ids], dtype=bool)
+    new_rows = np.flatnonzero(~placed)
+
+    if not len(new_rows):
+        return {fact_id: previous[fact_id] for fact_id in ids}
+
+    if placed.sum() < (1 - full_threshold) * n:
+        rows, cols, weights = knn_edges(vectors, vectors)
+        start = scale_to(principal_plane(vectors), radius)
+        positions = refine(start, rows, cols, weights, np.ones(n, dtype=bool))
+    else:
+        positions = np.zeros((n, 2), dtype=np.float32)
+        placed_rows = np.flatnonzero(placed)
+        positions[placed_rows] = np.array([previous[ids[r]] for r in placed_rows], dtype=np.float32)
+
+        # New nodes attach to placed nodes only, so nothing already drawn moves
+        r, c, w = knn_edges(vectors[new_rows], vectors[placed_rows], offset=None)
+        rows, cols = new_rows[r], placed_rows[c]
+        weight_sum = np.bincount(r, weights=w, minlength=len(new_rows))[:, None]
+        weight_sum[weight_sum == 0] = 1.0
+        anchor = np.zeros((len(new_rows), 2), dtype=np.float64)
+        np.add.at(anchor, r, w[:, None] * positions[cols])
+        # Jitter so new nodes sharing neighbours do not start on one point
+        jitter = np.random.default_rng(n).normal(scale=0.5, size=anchor.shape)
+        positions[new_rows] = anchor / weight_sum + jitter
+        positions = refine(positions, rows, cols, w, ~placed, iterations=INCREMENTAL_ITERATIONS)
+
+    return {fact_id: positions[i] for i, fact_id in enumerate(ids)}
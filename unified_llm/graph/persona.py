@@ -1,22 +1,30 @@
+import asyncio
 from typing import Dict, Any
 from unified_llm.memory.extractor import LLMClient
 from unified_llm.graph.service import GraphService
+from unified_llm.storage.vector_store import DEFAULT_NAMESPACE
+from unified_llm.utils.singleflight import SingleFlight
 
 class PersonaEngine:
     def __init__(self, graph_service: GraphService, llm_client: LLMClient):
         self.graph_service = graph_service
         self.llm_client = llm_client
+        # Dashboards opened together share one LLM call per memory version
+        self._flight = SingleFlight("persona")
 
-    async def generate_persona(self) -> Dict[str, Any]:
+    async def generate_persona(self, namespace: str = DEFAULT_NAMESPACE) -> Dict[str, Any]:
         """
         Generates a persona summary (Bio, Traits) based on the current graph.
         """
+        version = self.graph_service.vector_store.memory_version(namespace)
+        return await self._flight.do_async((namespace, version), lambda: self._generate_persona(namespace))
+
+    async def _generate_persona(self, namespace: str) -> Dict[str, Any]:
         # 1. Get Graph Data
         # We'll use the nodes' content to summarize.
-        if not self.graph_service._built:
-            self.graph_service.build_graph()
-            
-        nodes = self.graph_service.graph.nodes(data=True)
+        # A rebuild is CPU-bound; keep it off the event loop
+        graph = await asyncio.to_thread(self.graph_service.get_graph, namespace)
+        nodes = graph.nodes(data=True)
         
         # Collect content by category
         categories = {}
@@ -68,7 +76,7 @@ class PersonaEngine:
         import json
         import re
         
-        content = response.content
+        content = response
         try:
             # Try to find JSON block
             match = re.search(r'\{.*\}', content, re.DOTALL)
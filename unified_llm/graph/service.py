@@ -1,38 +1,95 @@
+import time
 import networkx as nx
-from typing import List, Dict, Any, Optional
+import numpy as np
+from typing import List, Dict, Any, Optional, Tuple
 from unified_llm.models import Fact
-from unified_llm.storage.vector_store import VectorStore
+from unified_llm.storage.vector_store import VectorStore, DEFAULT_NAMESPACE
+from unified_llm.graph.layout import compute_layout
+from unified_llm.utils.singleflight import SingleFlight
+
+# Facts fetched per get_facts() call when building from Pinecone
+FETCH_BATCH = 1000
+
+def _to_fact(fact_id: str, meta: Dict[str, Any]) -> Fact:
+    content = meta.get('content', '')
+    # Content is stored as "Category: Content"
+    if ':' in content:
+        content = content.split(':', 1)[1].strip()
+    return Fact(
+        content=content,
+        category=meta.get('category', 'general'),
+        metadata=meta,
+        id=fact_id
+    )
 
 class GraphService:
     def __init__(self, vector_store: VectorStore):
         self.vector_store = vector_store
-        self.graph = nx.Graph()
-        self._built = False
+        # One graph per namespace, built on first use
+        self._graphs: Dict[str, nx.Graph] = {}
+        # Memory version each cached graph was built from
+        self._versions: Dict[str, Any] = {}
+        # Node positions outlive the graph, so a rebuild only lays out new facts
+        self._positions: Dict[str, Dict[str, np.ndarray]] = {}
+        # Concurrent requests for a stale graph share one rebuild
+        self._builds = SingleFlight("graph_build")
+
+    def get_graph(self, namespace: str = DEFAULT_NAMESPACE) -> nx.Graph:
+        """Returns the graph for a namespace, rebuilding it if its facts changed."""
+        version = self.vector_store.memory_version(namespace)
+        # invalidate() may drop the cached graph at any time, so read it
+        # once and return the graph a build hands back, never the dict entry
+        graph = self._graphs.get(namespace)
+        if graph is None or self._versions.get(namespace) != version:
+            graph = self._builds.do((namespace, version), lambda: self.build_graph(force_refresh=True, namespace=namespace))
+        return graph
 
-    def build_graph(self, force_refresh: bool = False):
+    def invalidate(self, namespace: str = DEFAULT_NAMESPACE):
+        """Drops the cached graph so the next request rebuilds it."""
+        self._graphs.pop(namespace, None)
+        self._versions.pop(namespace, None)
+
+    def build_graph(self, force_refresh: bool = False, namespace: str = DEFAULT_NAMESPACE) -> nx.Graph:
         """
-        Builds the graph from facts in the vector store.
+        Builds the graph from facts in the vector store and returns it.
         For MVP, we rebuild from scratch or update.
         """
-        if self._built and not force_refresh:
-            return
+        cached = self._graphs.get(namespace)
+        if cached is not None and not force_refresh:
+            return cached
 
-        print("Building Knowledge Graph...")
-        self.graph.clear()
+        print(f"Building Knowledge Graph (namespace '{namespace}')...")
+        graph = nx.Graph()
+        # Read before fetching, so a write during the build triggers another one
+        version = self.vector_store.memory_version(namespace)
         
         # 1. Fetch all facts
         # Note: In a real large-scale system, we wouldn't fetch all.
         # We'd use a graph DB or build incrementally.
-        facts = self._fetch_all_facts()
+        facts, vectors = self._fetch_all_facts(namespace)
+        
+        # Lay nodes out here so clients can draw them without simulating.
+        # Facts already placed keep their positions; only new ones are laid out.
+        start = time.perf_counter()
+        positions = compute_layout([fact.id for fact in facts], vectors, self._positions.get(namespace))
+        # Only current facts are kept, so positions of deleted ones do not pile up
+        if positions:
+            self._positions[namespace] = positions
+        else:
+            self._positions.pop(namespace, None)
+        layout_s = time.perf_counter() - start
         
         # 2. Add Nodes
         for fact in facts:
-            self.graph.add_node(
+            x, y = positions[fact.id]
+            graph.add_node(
                 fact.id, 
                 label=fact.content[:50] + "...", 
                 full_content=fact.content,
                 category=fact.category,
-                type="fact"
+                type="fact",
+                x=float(x),
+                y=float(y)
             )
             
         # 3. Add Edges (Similarity-based)
@@ -57,72 +114,80 @@ class GraphService:
         # Since we can't easily get all vectors from Pinecone to compute similarity locally without cost,
         # we will just visualize the nodes and maybe cluster by category.
         
-        print(f"Graph built with {self.graph.number_of_nodes()} nodes.")
-        self._built = True
+        print(f"Graph built with {graph.number_of_nodes()} nodes (layout {layout_s:.2f}s).")
+        self._graphs[namespace] = graph
+        self._versions[namespace] = version
+        return graph
 
-    def _fetch_all_facts(self) -> List[Fact]:
-        """Helper to get all facts from storage."""
+    def _fetch_all_facts(self, namespace: str = DEFAULT_NAMESPACE) -> Tuple[List[Fact], np.ndarray]:
+        """Helper to get all facts from storage, with their vectors row-aligned."""
         facts = []
+        vectors = []
         if self.vector_store.use_mock:
-            # mock_storage is a List[Dict]
-            for f_data in self.vector_store.mock_storage:
-                facts.append(Fact(
-                    content=f_data.get('content', ''),
-                    # Try to retrieve category from content string if not stored separately
-                    # The mock storage stores 'content' as "Category: Content"
-                    category=f_data.get('content', '').split(':')[0] if ':' in f_data.get('content', '') else 'general',
-                    metadata=f_data.get('metadata', {}),
-                    id=str(uuid.uuid4()) # storage doesn't keep IDs in mock mode easily
-                ))
-                # Try to clean up content
-                if ':' in facts[-1].content:
-                     facts[-1].content = facts[-1].content.split(':', 1)[1].strip()
+            for fact_id, meta, vector in self.vector_store.get_local_index(namespace).iter_rows(include_vectors=True):
+                facts.append(_to_fact(fact_id, meta))
+                vectors.append(vector)
+        elif hasattr(self.vector_store.index, "list_paginated"):
+            # List every id and fetch facts by id, a batch at a time
+            try:
+                ids = list(self.vector_store.iter_fact_ids(namespace))
+                for start in range(0, len(ids), FETCH_BATCH):
+                    for fact in self.vector_store.get_facts(ids[start:start + FETCH_BATCH], namespace=namespace,
+                                                            include_values=True):
+                        if fact is not None and fact.get('values') is not None:
+                            facts.append(_to_fact(fact['id'], fact['metadata']))
+                            vectors.append(fact['values'])
+            except Exception as e:
+                print(f"Error fetching facts for graph: {e}")
+                facts, vectors = [], []
         else:
-            # Pinecone - fetch dummy query to get some
+            # Pod-based indexes cannot list ids - fetch dummy query to get some
             try:
                 dummy_vector = [0.1] * 384
                 results = self.vector_store.index.query(
                     vector=dummy_vector,
                     top_k=100, # Limit for graph viz
-                    include_metadata=True
+                    include_metadata=True,
+                    include_values=True,
+                    namespace=namespace
                 )
                 for match in results['matches']:
-                    meta = match['metadata']
-                    f = Fact(
-                        content=meta.get('content', ''),
-                        category=meta.get('category', 'general'),
-                        metadata=meta
-                    )
-                    f.id = match['id']
-                    facts.append(f)
+                    facts.append(_to_fact(match['id'], match['metadata']))
+                    vectors.append(match['values'])
             except Exception as e:
                 print(f"Error fetching facts for graph: {e}")
+                facts, vectors = [], []
                 
-        return facts
+        if not vectors:
+            return facts, np.empty((0, 384), dtype=np.float32)
+        return facts, np.vstack(vectors).astype(np.float32)
 
-    def get_graph_data(self) -> Dict[str, List[Any]]:
+    def get_graph_data(self, namespace: str = DEFAULT_NAMESPACE) -> Dict[str, List[Any]]:
         """
         Returns data in format suitable for react-force-graph-2d.
+        Nodes carry precomputed x/y positions, so clients can render
+        without running the force simulation (e.g. cooldownTicks=0).
         {
-            "nodes": [{ "id": "1", "group": 1 }, ...],
+            "nodes": [{ "id": "1", "group": 1, "x": 0.0, "y": 0.0 }, ...],
             "links": [{ "source": "1", "target": "2" }, ...]
         }
         """
-        if not self._built:
-            self.build_graph()
+        graph = self.get_graph(namespace)
             
         nodes = []
-        for node_id, attrs in self.graph.nodes(data=True):
+        for node_id, attrs in graph.nodes(data=True):
             nodes.append({
                 "id": node_id,
                 "name": attrs.get('label', 'Unknown'),
                 "val": 1,
                 "group": attrs.get('category', 'other'),
-                "full_content": attrs.get('full_content', '')
+                "full_content": attrs.get('full_content', ''),
+                "x": attrs.get('x'),
+                "y": attrs.get('y')
             })
             
         links = []
-        for u, v in self.graph.edges():
+        for u, v in graph.edges():
             links.append({
                 "source": u,
                 "target": v
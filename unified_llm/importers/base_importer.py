@@ -1,11 +1,32 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from unified_llm.models import Conversation
+from unified_llm.importers.export_reader import open_export, iter_json_array
 
 class BaseImporter(ABC):
     """Abstract base class for chat history importers."""
 
-    @abstractmethod
+    def iter_conversations(self, file_path: str) -> Iterator[Conversation]:
+        """
+        Streams Conversation objects out of an export file.
+        
+        Args:
+            file_path: Path to conversations.json or to the export ZIP containing it.
+            
+        Yields:
+            Conversations in file order, parsed one at a time.
+        """
+        for conversation, _ in self.iter_with_offsets(file_path):
+            yield conversation
+
+    def iter_with_offsets(self, file_path: str) -> Iterator[Tuple[Conversation, int]]:
+        """iter_conversations(), paired with how many bytes of the export have been read."""
+        with open_export(file_path) as f:
+            for item in iter_json_array(f):
+                conversation = self._parse_conversation(item)
+                if conversation:
+                    yield conversation, f.buffer.tell()
+
     def import_data(self, file_path: str) -> List[Conversation]:
         """
         Parses an export file and returns a list of Conversation objects.
@@ -16,4 +37,8 @@ class BaseImporter(ABC):
         Returns:
             List of Conversation objects.
         """
+        return list(self.iter_conversations(file_path))
+
+    @abstractmethod
+    def _parse_conversation(self, data: Dict[str, Any]) -> Optional[Conversation]:
         pass
@@ -1,23 +1,10 @@
-import json
-from typing import List, Dict, Any
+from typing import Dict, Any
 from datetime import datetime
 from unified_llm.models import Conversation, Message
 from unified_llm.importers.base_importer import BaseImporter
 
 class ChatGPTImporter(BaseImporter):
-    """Importer for ChatGPT data exports (conversations.json)."""
-
-    def import_data(self, file_path: str) -> List[Conversation]:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-
-        conversations = []
-        for item in data:
-            conversation = self._parse_conversation(item)
-            if conversation:
-                conversations.append(conversation)
-        
-        return conversations
+    """Importer for ChatGPT data exports (conversations.json, or the export ZIP)."""
 
     def _parse_conversation(self, data: Dict[str, Any]) -> Conversation:
         conv_id = data.get('id')
@@ -87,7 +74,7 @@ class ChatGPTImporter(BaseImporter):
                             role=role,
                             content=text_content,
                             timestamp=timestamp,
-                            metadata={'id': msg_data.get('id')}
+                            id=msg_data.get('id')
                         ))
             
             parent_id = current_node.get('parent')
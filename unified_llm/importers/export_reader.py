@@ -0,0 +1,100 @@
+import io
+import os
+import json
+import zipfile
+from contextlib import contextmanager
+from typing import Any, Iterator, TextIO
+
+EXPORT_MEMBER = "conversations.json"
+READ_CHUNK = 1 << 20
+
+_WHITESPACE = " \t\n\r"
+
+def _export_member(archive: zipfile.ZipFile, file_path: str) -> str:
+    members = [name for name in archive.namelist()
+               if name.rsplit("/", 1)[-1] == EXPORT_MEMBER]
+    if not members:
+        raise ValueError(f"No {EXPORT_MEMBER} found in {file_path}")
+    # The top-level one if the archive nests several
+    return min(members, key=lambda name: name.count("/"))
+
+def export_size(file_path: str) -> int:
+    """Uncompressed size in bytes of the export's conversations.json."""
+    if zipfile.is_zipfile(file_path):
+        with zipfile.ZipFile(file_path) as archive:
+            return archive.getinfo(_export_member(archive, file_path)).file_size
+    return os.path.getsize(file_path)
+
+@contextmanager
+def open_export(file_path: str) -> Iterator[TextIO]:
+    """Opens an export as text: a bare conversations.json, or the
+    conversations.json inside a ChatGPT/Claude zip archive.
+
+    Zip members are decompressed on the fly as they are read, so the
+    archive is never extracted to disk.
+    """
+    if zipfile.is_zipfile(file_path):
+        with zipfile.ZipFile(file_path) as archive:
+            with archive.open(_export_member(archive, file_path)) as raw:
+                yield io.TextIOWrapper(raw, encoding="utf-8-sig")
+    else:
+        with open(file_path, "r", encoding="utf-8-sig") as f:
+            yield f
+
+def iter_json_array(fp: TextIO, chunk_size: int = READ_CHUNK) -> Iterator[Any]:
+    """Yields the items of a top-level JSON array one at a time.
+
+    Only the current item and one read chunk are held in memory, so a
+    multi-gigabyte export is parsed in constant space and the first
+    conversation is available as soon as its bytes have been read.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill(min_size: int) -> bool:
+        nonlocal buf, pos, eof
+        if eof:
+            return False
+        buf = buf[pos:]
+        pos = 0
+        while not eof and len(buf) < min_size:
+            chunk = fp.read(max(chunk_size, min_size - len(buf)))
+            if not chunk:
+                eof = True
+            buf += chunk
+        return True
+
+    def skip(chars: str):
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in chars:
+                pos += 1
+            if pos < len(buf) or not fill(chunk_size):
+                return
+
+    skip(_WHITESPACE)
+    if pos >= len(buf) or buf[pos] != "[":
+        raise ValueError("Expected a JSON array of conversations")
+    pos += 1
+
+    while True:
+        skip(_WHITESPACE + ",")
+        if pos >= len(buf):
+            raise ValueError("Unterminated JSON array")
+        if buf[pos] == "]":
+            return
+        # An item may straddle the chunk boundary: read more and retry,
+        # doubling the window so one huge item costs O(n) re-parses, not O(n^2)
+        want = len(buf) - pos + chunk_size
+        while True:
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+                break
+            except json.JSONDecodeError:
+                if not fill(want):
+                    raise
+                want *= 2
+        pos = end
+        yield item
@@ -0,0 +1,157 @@
+import math
+import time
+import random
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from unified_llm.models import Conversation
+from unified_llm.memory.extractor import MemoryExtractor
+from unified_llm.retrieval.context_packer import estimate_tokens
+
+# Assumed per-call figures for the projection; real numbers vary by model and load
+DEFAULT_CALL_SECONDS = 4.0
+DEFAULT_COMPLETION_TOKENS = 150
+# Candidate messages the pre-filter actually scores to estimate its keep rate
+PREFILTER_SAMPLE = 256
+
+class ImportEstimator:
+    """Projects the LLM cost and duration of an import without calling the LLM.
+
+    Conversations go through the extractor's own message selection and
+    batching, and every prompt line is built and token-counted as it
+    would be sent. The pre-filter is only run on a random sample of
+    candidate messages, and its keep rate is applied to the rest, so a
+    large export is not embedded message by message. Given a time budget,
+    estimate_file() reads the head of the export and scales the counts up
+    by the share of bytes it covered.
+    """
+
+    def __init__(self, extractor: MemoryExtractor, call_seconds: float = DEFAULT_CALL_SECONDS,
+                 completion_tokens: int = DEFAULT_COMPLETION_TOKENS, seed: int = 0):
+        self.extractor = extractor
+        self.call_seconds = call_seconds
+        self.completion_tokens = completion_tokens
+        self._rng = random.Random(seed)
+        # The fixed part of every batch prompt
+        self._prompt_overhead = estimate_tokens(MemoryExtractor.build_batch_prompt([]))
+
+    def _keep_rate(self, sample: List[str]) -> float:
+        if self.extractor.prefilter is None or self.extractor.prefilter_shadow or not sample:
+            return 1.0
+        keep = self.extractor.prefilter.keep(sample)
+        return sum(keep) / len(keep)
+
+    def estimate(self, conversations: Iterable[Conversation]) -> Dict[str, Any]:
+        """Estimates an import of all of these conversations."""
+        return self._estimate(conversations, max_seconds=None)
+
+    def estimate_file(self, importer, file_path: str, max_seconds: Optional[float] = 10.0) -> Dict[str, Any]:
+        """Streams an export through the importer; past max_seconds, the rest is extrapolated."""
+        from unified_llm.importers.export_reader import export_size
+        return self._estimate(importer.iter_with_offsets(file_path), max_seconds=max_seconds,
+                              total_bytes=export_size(file_path))
+
+    def _estimate(self, items: Iterable[Any], max_seconds: Optional[float],
+                  total_bytes: Optional[int] = None) -> Dict[str, Any]:
+        start = time.perf_counter()
+        batch_size = self.extractor.batch_size
+        # Per conversation: (candidate count, candidate prompt tokens)
+        per_conversation: List[Tuple[int, int]] = []
+        counts = {"conversations": 0, "messages": 0, "user_messages": 0}
+        sample: List[str] = []
+        seen_candidates = 0
+        bytes_read = 0
+        complete = True
+
+        # Conversations, or (conversation, bytes read) pairs from iter_with_offsets()
+        for item in items:
+            conv, bytes_read = item if isinstance(item, tuple) else (item, bytes_read)
+            counts["conversations"] += 1
+            counts["messages"] += len(conv.messages)
+            counts["user_messages"] += sum(1 for m in conv.messages if m.role == 'user')
+
+            candidates = self.extractor.select_messages(conv.messages)
+            lines = MemoryExtractor.build_batch_prompt(candidates) if candidates else ""
+            per_conversation.append((len(candidates), estimate_tokens(lines) - self._prompt_overhead if candidates else 0))
+
+            # Reservoir sample of candidates for the pre-filter
+            for c in candidates:
+                seen_candidates += 1
+                if len(sample) < PREFILTER_SAMPLE:
+                    sample.append(c['message'].content)
+                else:
+                    j = self._rng.randrange(seen_candidates)
+                    if j < PREFILTER_SAMPLE:
+                        sample[j] = c['message'].content
+
+            # bytes_read runs up to one read chunk ahead of the parser, so once
+            # the whole export has been read the rest is parsed anyway
+            if (max_seconds is not None and time.perf_counter() - start > max_seconds
+                    and (not total_bytes or bytes_read < total_bytes)):
+                complete = False
+                break
+
+        keep_rate = self._keep_rate(sample)
+        concurrency = max(self.extractor.max_concurrent, 1)
+        sent = calls = rounds = 0.0
+        prompt_tokens = 0.0
+        for candidates, line_tokens in per_conversation:
+            if not candidates:
+                continue
+            kept = candidates * keep_rate
+            # A conversation with under one expected message costs a fraction of a call on average
+            batches = math.ceil(kept / batch_size) if kept >= 1 else kept
+            sent += kept
+            calls += batches
+            # Conversations are extracted one after another, max_concurrent batches at a time
+            rounds += math.ceil(batches / concurrency) if batches >= 1 else batches
+            prompt_tokens += line_tokens * keep_rate + batches * self._prompt_overhead
+
+        scale = 1.0
+        if not complete and bytes_read and total_bytes:
+            scale = total_bytes / bytes_read
+        completion_tokens = calls * self.completion_tokens
+        projected_seconds = rounds * self.call_seconds * scale
+        return {
+            "complete": complete,
+            "scale": round(scale, 3),
+            "bytes_read": bytes_read,
+            "total_bytes": total_bytes,
+            "conversations": round(counts["conversations"] * scale),
+            "messages": round(counts["messages"] * scale),
+            "user_messages": round(counts["user_messages"] * scale),
+            "candidate_messages": round(sum(c for c, _ in per_conversation) * scale),
+            "prefilter_keep_rate": round(keep_rate, 3),
+            "messages_to_llm": round(sent * scale),
+            "batch_size": batch_size,
+            "llm_calls": round(calls * scale),
+            "prompt_tokens": round(prompt_tokens * scale),
+            "completion_tokens": round(completion_tokens * scale),
+            "total_tokens": round((prompt_tokens + completion_tokens) * scale),
+            "concurrency": concurrency,
+            "seconds_per_call": self.call_seconds,
+            "projected_seconds": round(projected_seconds, 1),
+            "projected_hours": round(projected_seconds / 3600, 2),
+            "elapsed_seconds": round(time.perf_counter() - start, 3),
+        }
+
+def format_estimate(report: Dict[str, Any]) -> str:
+    """Human-readable summary of an ImportEstimator report."""
+    lines = []
+    if not report["complete"]:
+        lines.append(f"Read {report['bytes_read']:,} of {report['total_bytes']:,} bytes; "
+                     f"counts below are extrapolated x{report['scale']}.")
+    rows = [
+        ("Conversations", f"{report['conversations']:,}"),
+        ("Messages", f"{report['messages']:,} ({report['user_messages']:,} from the user)"),
+        ("Extraction candidates", f"{report['candidate_messages']:,}"),
+        ("Pre-filter keep rate", f"{report['prefilter_keep_rate']:.0%}"),
+        ("Messages sent to LLM", f"{report['messages_to_llm']:,}"),
+        ("LLM calls", f"{report['llm_calls']:,} (batches of up to {report['batch_size']})"),
+        ("Prompt tokens", f"~{report['prompt_tokens']:,}"),
+        ("Completion tokens", f"~{report['completion_tokens']:,}"),
+        ("Total tokens", f"~{report['total_tokens']:,}"),
+        ("Projected time", f"~{report['projected_hours']} h ({report['concurrency']} calls in flight "
+                           f"at {report['seconds_per_call']}s per call)"),
+    ]
+    lines += [f"{label + ':':<23}{value}" for label, value in rows]
+    return "\n".join(lines)
@@ -1,6 +1,11 @@
 import os
-from typing import List
+import asyncio
+from typing import List, Any, Optional
 from unified_llm.models import Message, Fact
+from unified_llm.utils.event_loop import get_background_loop, run_sync
+from unified_llm.utils.metrics import (
+    stage, LLM_REQUESTS, LLM_TOKENS, EXTRACTOR_MESSAGES, FACTS_EXTRACTED, LLM_CALLS_AVOIDED, PREFILTER_SHADOW_FACTS
+)
 
 # Placeholder for LLM client
 # In a real app, we'd use openai or anthropic libraries
@@ -11,11 +16,33 @@ class LLMClient:
         self.model = model
         
         if self.api_key:
+            import httpx
             from openai import AsyncOpenAI
-            self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url)
+            # One long-lived pool. Every request runs on the background loop,
+            # which owns these connections, so TLS sessions stay warm across
+            # CLI queries, imports and server requests alike. Built directly
+            # (with the SDK's own timeout and redirect defaults) because
+            # DefaultAsyncHttpxClient only exists in newer openai releases.
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=int(os.environ.get("LLM_MAX_CONNECTIONS", "32")),
+                    max_keepalive_connections=int(os.environ.get("LLM_MAX_CONNECTIONS", "32")),
+                    keepalive_expiry=float(os.environ.get("LLM_KEEPALIVE_EXPIRY", "120"))
+                ),
+                timeout=httpx.Timeout(600.0, connect=5.0),
+                follow_redirects=True
+            )
+            self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, http_client=http_client)
         else:
             self.client = None
 
+    async def _on_client_loop(self, coro):
+        """Awaits coro on the background loop that owns the client's connections."""
+        background = get_background_loop()
+        if background.is_current():
+            return await coro
+        return await asyncio.wrap_future(background.submit(coro))
+
     async def generate_async(self, messages: Any) -> str:
         # Support both string prompt and messages list for backward compatibility
         if isinstance(messages, str):
@@ -31,37 +58,48 @@ class LLMClient:
             return "[MOCK MODE] I cannot generate real responses without a DEEPSEEK_API_KEY. Please set it and restart."
         
         try:
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=messages_payload,
-                temperature=0
-            )
+            with stage("llm.request"):
+                response = await self._on_client_loop(self.client.chat.completions.create(
+                    model=self.model,
+                    messages=messages_payload,
+                    temperature=0
+                ))
+            LLM_REQUESTS.labels("ok").inc()
+            usage = getattr(response, "usage", None)
+            if usage:
+                LLM_TOKENS.labels("prompt").inc(usage.prompt_tokens or 0)
+                LLM_TOKENS.labels("completion").inc(usage.completion_tokens or 0)
             return response.choices[0].message.content
         except Exception as e:
+            LLM_REQUESTS.labels("error").inc()
             print(f"Error calling LLM: {e}")
             return "None"
     
     def generate(self, messages: Any) -> str:
         """Synchronous wrapper for backward compatibility."""
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop.run_until_complete(self.generate_async(prompt))
+        return run_sync(self.generate_async(messages))
 
 class MemoryExtractor:
     """Extracts structured facts from chat messages."""
 
-    def __init__(self, llm_client=None):
+    def __init__(self, llm_client=None, prefilter=None, batch_size: int = 10, max_concurrent: int = 3,
+                 prefilter_shadow: bool = False):
         self.llm_client = llm_client or LLMClient()
+        # Optional FactPreFilter; messages it rejects never reach the LLM.
+        # In shadow mode every message is still sent, and facts are counted
+        # by whether the pre-filter would have kept their message, which
+        # measures its recall before it is allowed to drop anything.
+        self.prefilter = prefilter
+        self.prefilter_shadow = prefilter_shadow
+        self.llm_calls_avoided = 0
+        self.shadow_facts = {"kept": 0, "would_skip": 0}
+        # Messages per LLM call, and calls in flight per conversation
+        self.batch_size = batch_size
+        self.max_concurrent = max_concurrent
 
-    async def extract_facts_async(self, messages: List[Message], max_concurrent: int = 3, batch_size: int = 10) -> List[Fact]:
-        """Async version with batching and smart filtering."""
-        import asyncio
-        
-        # Filter messages that are unlikely to have facts
+    @staticmethod
+    def select_messages(messages: List[Message]) -> List[dict]:
+        """User messages that may carry facts, each with its preceding assistant reply as context."""
         filtered_messages = []
         skip_phrases = {'hi', 'hello', 'thanks', 'ok', 'thank you', 'bye', 'goodbye'}
         
@@ -82,7 +120,41 @@ class MemoryExtractor:
                 'context': context_content,
                 'index': i
             })
+        return filtered_messages
+
+    async def extract_facts_async(self, messages: List[Message], max_concurrent: Optional[int] = None,
+                                  batch_size: Optional[int] = None,
+                                  conversation_id: Optional[str] = None) -> List[Fact]:
+        """Async version with batching and smart filtering. conversation_id is recorded on each fact."""
+        max_concurrent = max_concurrent or self.max_concurrent
+        batch_size = batch_size or self.batch_size
         
+        # Filter messages that are unlikely to have facts
+        filtered_messages = self.select_messages(messages)
+        
+        EXTRACTOR_MESSAGES.labels("filtered").inc(len(messages) - len(filtered_messages))
+        
+        if self.prefilter and filtered_messages:
+            with stage("extractor.prefilter"):
+                # Embedding is CPU-bound; keep it off the event loop
+                keep = await asyncio.to_thread(self.prefilter.keep, [item['message'].content for item in filtered_messages])
+            if self.prefilter_shadow:
+                # Remember the verdict; _extract_from_batch_async counts facts by it
+                for item, k in zip(filtered_messages, keep):
+                    item['prefilter_keep'] = k
+                keep = [True] * len(filtered_messages)
+            kept = [item for item, k in zip(filtered_messages, keep) if k]
+            calls_before = -(-len(filtered_messages) // batch_size)
+            avoided = calls_before - -(-len(kept) // batch_size)
+            EXTRACTOR_MESSAGES.labels("prefiltered").inc(len(filtered_messages) - len(kept))
+            LLM_CALLS_AVOIDED.inc(avoided)
+            self.llm_calls_avoided += avoided
+            if len(kept) < len(filtered_messages):
+                print(f"Pre-filter skipped {len(filtered_messages) - len(kept)} of {len(filtered_messages)} messages "
+                      f"({avoided} LLM calls avoided).")
+            filtered_messages = kept
+        
+        EXTRACTOR_MESSAGES.labels("sent").inc(len(filtered_messages))
         if not filtered_messages:
             return []
         
@@ -105,6 +177,9 @@ class MemoryExtractor:
         for facts in batch_results:
             all_facts.extend(facts)
         
+        if conversation_id:
+            for fact in all_facts:
+                fact.metadata = {**(fact.metadata or {}), 'conversation_id': conversation_id}
         return all_facts
     
     async def _extract_from_batch_async(self, batch: List[dict]) -> List[Fact]:
@@ -112,27 +187,10 @@ class MemoryExtractor:
         if not batch:
             return []
         
-        # Build a batch prompt
-        batch_prompt = """
-        Analyze the following user messages and extract any permanent facts about the user.
-        For each message, return facts in this format:
-        [MESSAGE_INDEX] Fact: <fact>. Category: <category>
-        
-        Categories: preference, project, user_info, goal, other.
-        If a message has no facts, skip it.
+        batch_prompt = self.build_batch_prompt(batch)
         
-        Messages:
-        """
-        
-        for item in batch:
-            msg = item['message']
-            ctx = item['context']
-            idx = item['index']
-            batch_prompt += f"\n[{idx}] Context: {ctx[:100]}... | User: {msg.content[:200]}..."
-        
-        batch_prompt += "\n\nExtract facts:"
-        
-        response = await self.llm_client.generate_async(batch_prompt)
+        with stage("extractor.batch"):
+            response = await self.llm_client.generate_async(batch_prompt)
         
         # Parse batch response
         facts = []
@@ -161,21 +219,43 @@ class MemoryExtractor:
                     facts.append(Fact(
                         content=content,
                         category=category,
-                        source_message_id=msg_item['message'].metadata.get('id') if msg_item['message'].metadata else None,
+                        source_message_id=msg_item['message'].id,
                         timestamp=msg_item['message'].timestamp
                     ))
+                    if 'prefilter_keep' in msg_item:
+                        outcome = "kept" if msg_item['prefilter_keep'] else "would_skip"
+                        self.shadow_facts[outcome] += 1
+                        PREFILTER_SHADOW_FACTS.labels(outcome).inc()
             except Exception as e:
                 # Skip malformed lines
                 continue
         
+        FACTS_EXTRACTED.inc(len(facts))
         return facts
+
+    @staticmethod
+    def build_batch_prompt(batch: List[dict]) -> str:
+        """The extraction prompt for one batch of select_messages() items."""
+        batch_prompt = """
+        Analyze the following user messages and extract any permanent facts about the user.
+        For each message, return facts in this format:
+        [MESSAGE_INDEX] Fact: <fact>. Category: <category>
+        
+        Categories: preference, project, user_info, goal, other.
+        If a message has no facts, skip it.
+        
+        Messages:
+        """
+        
+        for item in batch:
+            msg = item['message']
+            ctx = item['context']
+            idx = item['index']
+            batch_prompt += f"\n[{idx}] Context: {ctx[:100]}... | User: {msg.content[:200]}..."
+        
+        batch_prompt += "\n\nExtract facts:"
+        return batch_prompt
     
-    def extract_facts(self, messages: List[Message]) -> List[Fact]:
+    def extract_facts(self, messages: List[Message], conversation_id: Optional[str] = None) -> List[Fact]:
         """Synchronous wrapper that uses async internally."""
-        import asyncio
-        try:
-            loop = asyncio.get_event_loop()
-        except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-        return loop.run_until_complete(self.extract_facts_async(messages))
+        return run_sync(self.extract_facts_async(messages, conversation_id=conversation_id))
@@ -0,0 +1,108 @@
+import re
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from unified_llm.storage.embeddings import EmbeddingService
+
+# Messages that state something lasting about the user. Their embeddings
+# act as prototypes: a message close to any of them likely carries a fact.
+FACT_PROTOTYPES = [
+    "I prefer Python over Java for backend work.",
+    "My name is Sam and I work as a data scientist.",
+    "I live in Toronto with my partner and two kids.",
+    "I'm currently building a side project called Atlas.",
+    "My goal this year is to learn Rust and ship my app.",
+    "I always use Neovim and a dark theme.",
+    "I'm allergic to peanuts and I don't eat meat.",
+    "I work at a fintech startup as a backend engineer.",
+    "I studied computer science at university.",
+    "I usually work remotely and start early in the morning.",
+    "I have a dog named Max.",
+    "My team uses Kubernetes and Postgres in production.",
+]
+
+_FIRST_PERSON = re.compile(r"\b(i|i'm|i've|i'd|i'll|im|my|mine|me|myself)\b", re.IGNORECASE)
+_FACT_CUES = re.compile(
+    r"\b(prefer|like|love|hate|enjoy|favou?rite|usually|always|never|work(ing)? (at|on|as)|job|"
+    r"live|living|moved|born|name is|years old|building|project|goal|plan|learning|studying|"
+    r"allergic|vegetarian|vegan|family|wife|husband|partner|kids?|team|company|startup)\b",
+    re.IGNORECASE
+)
+_CODE_FENCE = re.compile(r"```.*?(```|$)", re.DOTALL)
+_TRACEBACK = re.compile(r"Traceback \(most recent call last\)|^\s*File \".*\", line \d+|\b\w+(Error|Exception):", re.MULTILINE)
+_CODE_LINE = re.compile(r"[{};=<>()\[\]]|^\s*(def|class|import|from|return|for|if|const|let|var|function)\b")
+
+class FactPreFilter:
+    """Scores messages by how likely they are to contain a personal fact.
+
+    The score mixes cheap text heuristics (first-person prose, fact cue
+    words, penalties for code and tracebacks) with the highest cosine
+    similarity to FACT_PROTOTYPES under the shared embedding model.
+    Messages below threshold are never sent to the LLM. Without an
+    embedding service, the heuristic score is used alone.
+    """
+
+    def __init__(self, embedding_service: Optional[EmbeddingService] = None, threshold: float = 0.3,
+                 heuristic_weight: float = 0.5, prototypes: Optional[List[str]] = None):
+        self.embedding_service = embedding_service
+        self.threshold = threshold
+        self.heuristic_weight = heuristic_weight
+        self.prototypes = prototypes or FACT_PROTOTYPES
+        self._prototype_vectors = None
+        self._lock = threading.Lock()
+
+    def heuristic_score(self, text: str) -> float:
+        prose = _CODE_FENCE.sub(" ", text)
+        lines = [line for line in prose.splitlines() if line.strip()]
+        code_lines = sum(1 for line in lines if _CODE_LINE.search(line))
+        score = 0.0
+        if _FIRST_PERSON.search(prose):
+            score += 0.5
+        if _FACT_CUES.search(prose):
+            score += 0.3
+        if _TRACEBACK.search(text):
+            score -= 0.5
+        if lines and code_lines / len(lines) > 0.5:
+            score -= 0.3
+        if len(prose.strip()) < 0.3 * len(text):
+            # Mostly fenced code
+            score -= 0.3
+        return float(min(max(score, 0.0), 1.0))
+
+    def _prototypes(self) -> np.ndarray:
+        if self._prototype_vectors is None:
+            with self._lock:
+                if self._prototype_vectors is None:
+                    self._prototype_vectors = self._normalize(self.embedding_service.embed(self.prototypes))
+        return self._prototype_vectors
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def score(self, texts: List[str]) -> np.ndarray:
+        """Scores in [0, 1]; one embedding call for the whole list."""
+        if not texts:
+            return np.empty(0, dtype=np.float32)
+        heuristic = np.array([self.heuristic_score(t) for t in texts], dtype=np.float32)
+        if self.embedding_service is None:
+            return heuristic
+
+        try:
+            # The extractor only ever sends the first 200 characters
+            vectors = self._normalize(self.embedding_service.embed([t[:200] for t in texts]))
+            if len(vectors) != len(texts):
+                raise ValueError("embedding service returned no vectors")
+            similarity = np.clip((vectors @ self._prototypes().T).max(axis=1), 0.0, 1.0)
+        except Exception as e:
+            print(f"Pre-filter embedding failed, using heuristics only: {e}")
+            return heuristic
+        return self.heuristic_weight * heuristic + (1 - self.heuristic_weight) * similarity
+
+    def keep(self, texts: List[str]) -> List[bool]:
+        return (self.score(texts) >= self.threshold).tolist()
@@ -1,15 +1,34 @@
+import sys
 from dataclasses import dataclass
-from typing import Optional, Dict, Any
-from datetime import datetime
+from typing import Optional, Dict, Any, Iterable, Iterator, List
+from datetime import datetime, timezone
 
-@dataclass
+import numpy as np
+
+# Slotted dataclasses have no per-instance __dict__, and role/category
+# strings are interned so millions of messages share a handful of objects.
+# metadata stays None unless there is something beyond the id to keep.
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if isinstance(value, str) else value
+
+@dataclass(slots=True)
 class Message:
     role: str  # 'user', 'assistant', 'system'
     content: str
     timestamp: Optional[datetime] = None
     metadata: Optional[Dict[str, Any]] = None
+    id: Optional[str] = None
+
+    def __post_init__(self):
+        self.role = _intern(self.role)
+        # Older callers and archived records carry the id inside metadata
+        if self.id is None and self.metadata and 'id' in self.metadata:
+            metadata = dict(self.metadata)
+            self.id = metadata.pop('id')
+            self.metadata = metadata or None
 
-@dataclass
+@dataclass(slots=True)
 class Conversation:
     id: str
     title: Optional[str]
@@ -17,7 +36,7 @@ class Conversation:
     created_at: Optional[datetime] = None
     metadata: Optional[Dict[str, Any]] = None
 
-@dataclass
+@dataclass(slots=True)
 class Fact:
     content: str
     category: str  # 'preference', 'project', 'user_info', 'other'
@@ -26,3 +45,113 @@ class Fact:
     timestamp: Optional[datetime] = None
     metadata: Optional[Dict[str, Any]] = None
 
+    def __post_init__(self):
+        self.category = _intern(self.category)
+
+class _StringColumn:
+    """Strings packed into one UTF-8 buffer plus an offsets array."""
+
+    __slots__ = ("buffer", "offsets", "present")
+
+    def __init__(self, values: List[Optional[str]]):
+        encoded = [v.encode("utf-8") if v is not None else b"" for v in values]
+        self.buffer = b"".join(encoded)
+        self.offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in encoded], out=self.offsets[1:])
+        self.present = np.array([v is not None for v in values], dtype=bool)
+
+    def __getitem__(self, i: int) -> Optional[str]:
+        if not self.present[i]:
+            return None
+        return self.buffer[self.offsets[i]:self.offsets[i + 1]].decode("utf-8")
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.buffer) + self.offsets.nbytes + self.present.nbytes
+
+class ConversationBatch:
+    """Columnar, read-only form of many conversations for bulk pipelines.
+
+    Message contents and ids live in single UTF-8 buffers addressed by
+    offset arrays; roles are small integer codes and timestamps a float
+    array. A message costs a few dozen bytes of overhead instead of
+    several Python objects, and Message/Conversation objects are only
+    materialized while a caller iterates.
+    """
+
+    def __init__(self, conversations: Iterable[Conversation]):
+        contents, message_ids, role_codes, stamps, aware = [], [], [], [], []
+        conv_offsets = [0]
+        self.roles: List[str] = []
+        role_index: Dict[str, int] = {}
+        self.ids: List[Optional[str]] = []
+        self.titles: List[Optional[str]] = []
+        self.created_at: List[Optional[datetime]] = []
+        self.conversation_metadata: List[Optional[Dict[str, Any]]] = []
+        # Sparse: only messages with extra metadata
+        self.message_metadata: Dict[int, Dict[str, Any]] = {}
+
+        for conv in conversations:
+            self.ids.append(conv.id)
+            self.titles.append(conv.title)
+            self.created_at.append(conv.created_at)
+            self.conversation_metadata.append(conv.metadata)
+            for m in conv.messages:
+                if m.role not in role_index:
+                    role_index[m.role] = len(self.roles)
+                    self.roles.append(m.role)
+                role_codes.append(role_index[m.role])
+                contents.append(m.content)
+                message_ids.append(m.id)
+                stamps.append(m.timestamp.timestamp() if m.timestamp else np.nan)
+                aware.append(m.timestamp is not None and m.timestamp.tzinfo is not None)
+                if m.metadata:
+                    self.message_metadata[len(contents) - 1] = m.metadata
+            conv_offsets.append(len(contents))
+
+        self.conv_offsets = np.array(conv_offsets, dtype=np.int64)
+        self.contents = _StringColumn(contents)
+        self.message_ids = _StringColumn(message_ids)
+        self.role_codes = np.array(role_codes, dtype=np.uint8)
+        self.timestamps = np.array(stamps, dtype=np.float64)
+        self.tz_aware = np.array(aware, dtype=bool)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def message_count(self) -> int:
+        return len(self.role_codes)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the message columns (conversation-level lists excluded)."""
+        return (self.contents.nbytes + self.message_ids.nbytes + self.conv_offsets.nbytes
+                + self.role_codes.nbytes + self.timestamps.nbytes + self.tz_aware.nbytes)
+
+    def message(self, i: int) -> Message:
+        timestamp = None
+        if not np.isnan(self.timestamps[i]):
+            tz = timezone.utc if self.tz_aware[i] else None
+            timestamp = datetime.fromtimestamp(self.timestamps[i], tz)
+        return Message(
+            role=self.roles[self.role_codes[i]],
+            content=self.contents[i],
+            timestamp=timestamp,
+            metadata=self.message_metadata.get(i),
+            id=self.message_ids[i]
+        )
+
+    def conversation(self, j: int) -> Conversation:
+        start, end = self.conv_offsets[j], self.conv_offsets[j + 1]
+        return Conversation(
+            id=self.ids[j],
+            title=self.titles[j],
+            messages=[self.message(i) for i in range(start, end)],
+            created_at=self.created_at[j],
+            metadata=self.conversation_metadata[j]
+        )
+
+    def __iter__(self) -> Iterator[Conversation]:
+        for j in range(len(self)):
+            yield self.conversation(j)
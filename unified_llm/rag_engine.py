@@ -1,80 +1,141 @@
+import asyncio
 from typing import List, Dict, Any, Optional
 from dataclasses import dataclass
 
 from unified_llm.memory.extractor import LLMClient
 from unified_llm.retrieval.retriever import RetrievalService
+from unified_llm.retrieval.context_packer import ContextPacker
+from unified_llm.storage.vector_store import DEFAULT_NAMESPACE
 from unified_llm.models import Fact
+from unified_llm.utils.metrics import stage
+from unified_llm.utils.singleflight import SingleFlight
 
 @dataclass
 class RAGResponse:
     answer: str
     retrieved_facts: List[Fact]
+    context_tokens: int = 0
+    tokens_saved: int = 0
+    error: Optional[str] = None
 
 class RAGEngine:
-    def __init__(self, retrieval_service: RetrievalService, llm_client: LLMClient):
+    def __init__(self, retrieval_service: RetrievalService, llm_client: LLMClient,
+                 context_packer: Optional[ContextPacker] = None, batch_concurrency: int = 8):
         self.retrieval_service = retrieval_service
         self.llm_client = llm_client
+        self.context_packer = context_packer or ContextPacker()
+        # Max LLM calls in flight for one generate_batch_async call
+        self.batch_concurrency = batch_concurrency
+        # Identical questions in flight against the same memory are answered once
+        self._flight = SingleFlight("query")
 
-    def generate_response(self, user_query: str, top_k: int = 5) -> RAGResponse:
-        """
-        Generates a response to the user query using RAG.
-        1. Retrieve relevant facts.
-        2. Generate answer using LLM.
-        """
-        # 1. Retrieve relevant facts
-        facts = self.retrieval_service.retrieve(user_query, top_k=top_k)
-        
-        # 2. Construct prompt
-        context_str = "\n".join(f"- {fact.content}" for fact in facts)
-        
-        system_prompt = f"""You are a helpful assistant with access to the user's external memory.
+    def _retrieve(self, user_query: str, top_k: int, namespace: str):
+        """Over-fetches candidates and packs at most top_k of them into the token budget."""
+        with stage("rag.retrieve"):
+            candidates = self.retrieval_service.retrieve_candidates(
+                user_query, k=self.context_packer.candidate_count(top_k), namespace=namespace
+            )
+        return self._pack(candidates, top_k)
+
+    def _pack(self, candidates: List[Dict[str, Any]], top_k: int):
+        with stage("rag.pack"):
+            packed = self.context_packer.pack(candidates, max_facts=top_k)
+        return self.retrieval_service.to_facts(packed.items), packed
+
+    @staticmethod
+    def _build_messages(user_query: str, facts: List[Fact]) -> List[Dict[str, str]]:
+        with stage("rag.prompt"):
+            context_str = "\n".join(f"- {fact.content}" for fact in facts)
+            
+            system_prompt = f"""You are a helpful assistant with access to the user's external memory.
 Use the following retrieved facts to answer the user's question. 
 If the facts don't contain the answer, say you don't know based on the memory.
 
 Retrieved Facts:
 {context_str}
 """
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_query}
+        ]
+
+    def generate_response(self, user_query: str, top_k: int = 5, namespace: str = DEFAULT_NAMESPACE) -> RAGResponse:
+        """
+        Generates a response to the user query using RAG.
+        1. Retrieve relevant facts and pack them into the context budget.
+        2. Generate answer using LLM.
+        """
+        facts, packed = self._retrieve(user_query, top_k, namespace)
+        messages = self._build_messages(user_query, facts)
         
-        # 3. Generate response
-        # Using the synchronous generate method for simplicity in CLI/Scripts, 
-        # but we can add async support if needed.
-        response_text = self.llm_client.generate(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_query}
-            ]
-        )
+        # Using the synchronous generate method for simplicity in CLI/Scripts
+        with stage("rag.generate"):
+            response_text = self.llm_client.generate(messages=messages)
         
         return RAGResponse(
             answer=response_text,
-            retrieved_facts=facts
+            retrieved_facts=facts,
+            context_tokens=packed.tokens_used,
+            tokens_saved=packed.tokens_saved
         )
 
-    async def generate_response_async(self, user_query: str, top_k: int = 5) -> RAGResponse:
-        """Async version for FastAPI"""
-        # 1. Retrieve (sync for now as Pinecone/Local is sync in this codebase)
-        facts = self.retrieval_service.retrieve(user_query, top_k=top_k)
-        
-        # 2. Construct prompt
-        context_str = "\n".join(f"- {fact.content}" for fact in facts)
-        
-        system_prompt = f"""You are a helpful assistant with access to the user's external memory.
-Use the following retrieved facts to answer the user's question. 
-If the facts don't contain the answer, say you don't know based on the memory.
+    async def generate_response_async(self, user_query: str, top_k: int = 5, namespace: str = DEFAULT_NAMESPACE) -> RAGResponse:
+        """Async version for FastAPI. Concurrent identical calls share one response."""
+        version = self.retrieval_service.vector_store.memory_version(namespace)
+        key = (namespace, user_query, top_k, version)
+        return await self._flight.do_async(key, lambda: self._generate_response_async(user_query, top_k, namespace))
 
-Retrieved Facts:
-{context_str}
-"""
+    async def _generate_response_async(self, user_query: str, top_k: int, namespace: str) -> RAGResponse:
+        # Retrieval is sync for now as Pinecone/Local is sync in this codebase
+        facts, packed = self._retrieve(user_query, top_k, namespace)
+        messages = self._build_messages(user_query, facts)
         
-        # 3. Generate response
-        response_msg = await self.llm_client.generate_async(
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_query}
-            ]
-        )
+        with stage("rag.generate"):
+            response_msg = await self.llm_client.generate_async(messages=messages)
         
         return RAGResponse(
-            answer=response_msg.content,
-            retrieved_facts=facts
+            answer=response_msg,
+            retrieved_facts=facts,
+            context_tokens=packed.tokens_used,
+            tokens_saved=packed.tokens_saved
         )
+
+    async def generate_batch_async(self, queries: List[str], top_k: int = 5, namespace: str = DEFAULT_NAMESPACE,
+                                   concurrency: Optional[int] = None) -> List[RAGResponse]:
+        """
+        Answers several queries. Retrieval embeds and searches all of them in
+        one pass; generation runs with at most `concurrency` LLM calls in flight,
+        capped at batch_concurrency so one request cannot take more LLM slots
+        than admission control budgets for it.
+        A failed generation sets `error` on its response instead of failing the batch.
+        """
+        if not queries:
+            return []
+        
+        with stage("rag.retrieve_batch"):
+            # Embedding the whole batch is CPU-bound; keep it off the event loop
+            candidate_lists = await asyncio.to_thread(
+                self.retrieval_service.retrieve_candidates_batch,
+                queries, self.context_packer.candidate_count(top_k), namespace
+            )
+        
+        semaphore = asyncio.Semaphore(min(concurrency or self.batch_concurrency, self.batch_concurrency))
+        
+        async def answer(query: str, candidates: List[Dict[str, Any]]) -> RAGResponse:
+            facts, packed = self._pack(candidates, top_k)
+            messages = self._build_messages(query, facts)
+            response = RAGResponse(
+                answer="",
+                retrieved_facts=facts,
+                context_tokens=packed.tokens_used,
+                tokens_saved=packed.tokens_saved
+            )
+            async with semaphore:
+                try:
+                    with stage("rag.generate"):
+                        response.answer = await self.llm_client.generate_async(messages=messages)
+                except Exception as e:
+                    response.error = str(e)
+            return response
+        
+        return await asyncio.gather(*(answer(q, c) for q, c in zip(queries, candidate_lists)))
@@ -0,0 +1,97 @@
+import re
+from dataclasses import dataclass, field
+from typing import List, Dict, Any
+
+import numpy as np
+
+from unified_llm.utils.metrics import CONTEXT_TOKENS, CONTEXT_FACTS
+
+# Words and individual punctuation marks; close to BPE token counts for
+# English prose without shipping the LLM's tokenizer.
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+def estimate_tokens(text: str) -> int:
+    return len(_TOKEN_RE.findall(text))
+
+@dataclass
+class PackedContext:
+    items: List[Dict[str, Any]]
+    tokens_used: int = 0
+    # Tokens the plain top_k list would have cost, minus tokens_used (never negative)
+    tokens_saved: int = 0
+    dropped: Dict[str, int] = field(default_factory=dict)
+
+class ContextPacker:
+    """Chooses which retrieved facts go into the prompt.
+
+    Candidates (search results with 'values') are picked greedily by
+    maximal marginal relevance: lambda * similarity to the query minus
+    (1 - lambda) * the highest similarity to an already picked fact. All
+    pairwise similarities come from one matrix product, and each pick
+    updates the redundancy scores with a single vectorized maximum.
+    Candidates nearly identical to a picked fact are dropped outright,
+    and picking stops when the token budget or max_facts is reached.
+    """
+
+    def __init__(self, token_budget: int = 1024, overfetch: int = 4, mmr_lambda: float = 0.7,
+                 duplicate_threshold: float = 0.95):
+        self.token_budget = token_budget
+        self.overfetch = overfetch
+        self.mmr_lambda = mmr_lambda
+        self.duplicate_threshold = duplicate_threshold
+
+    def candidate_count(self, top_k: int) -> int:
+        return max(top_k, top_k * self.overfetch)
+
+    def pack(self, candidates: List[Dict[str, Any]], max_facts: int) -> PackedContext:
+        """candidates are ordered by relevance; 'distance' is the cosine similarity to the query."""
+        if not candidates or max_facts <= 0:
+            return PackedContext(items=[])
+
+        tokens = np.array([estimate_tokens(c['content']) + 2 for c in candidates]) # "- " prefix and newline
+        baseline = int(tokens[:max_facts].sum())
+
+        relevance = np.array([c['distance'] for c in candidates], dtype=np.float32)
+        vectors = np.vstack([c['values'] for c in candidates]).astype(np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        vectors /= norms
+        similarity = vectors @ vectors.T
+
+        n = len(candidates)
+        redundancy = np.full(n, -np.inf, dtype=np.float32)
+        available = np.ones(n, dtype=bool)
+        picked = []
+        used = 0
+        dropped = {"redundant": 0, "over_budget": 0}
+
+        while len(picked) < max_facts and available.any():
+            scores = self.mmr_lambda * relevance - (1 - self.mmr_lambda) * np.maximum(redundancy, 0)
+            scores[~available] = -np.inf
+            best = int(np.argmax(scores))
+            available[best] = False
+
+            if redundancy[best] >= self.duplicate_threshold:
+                dropped["redundant"] += 1
+                continue
+            if used + tokens[best] > self.token_budget:
+                dropped["over_budget"] += 1
+                continue
+
+            picked.append(best)
+            used += int(tokens[best])
+            redundancy = np.maximum(redundancy, similarity[:, best])
+
+        packed = PackedContext(
+            items=[candidates[i] for i in picked],
+            tokens_used=used,
+            # MMR can pick longer facts than the plain top-k; that is not a saving
+            tokens_saved=max(baseline - used, 0),
+            dropped=dropped
+        )
+        CONTEXT_TOKENS.labels("packed").inc(used)
+        CONTEXT_TOKENS.labels("saved").inc(packed.tokens_saved)
+        CONTEXT_FACTS.labels("packed").inc(len(picked))
+        for outcome, count in dropped.items():
+            CONTEXT_FACTS.labels(outcome).inc(count)
+        return packed
@@ -1,16 +1,50 @@
-from typing import List, Dict, Any
-from unified_llm.storage.vector_store import VectorStore
+from typing import List, Dict, Any, Optional
+from unified_llm.storage.vector_store import VectorStore, DEFAULT_NAMESPACE
+from unified_llm.utils.cache import LRUCache
+from unified_llm.utils.metrics import stage
+from unified_llm.utils.singleflight import SingleFlight
 
 class RetrievalService:
-    def __init__(self, vector_store: VectorStore):
+    def __init__(self, vector_store: VectorStore, cache_size: int = 0, cache_ttl: Optional[float] = None):
         self.vector_store = vector_store
+        # Search results keyed by (namespace, query, k), valid for one memory version
+        self.cache = LRUCache("search", maxsize=cache_size, ttl=cache_ttl) if cache_size > 0 else None
+        # Concurrent misses for the same entry run one search
+        self._flight = SingleFlight("search")
 
-    def retrieve_context(self, query: str, k: int = 5) -> List[str]:
+    def search(self, query: str, k: int = 5, namespace: str = DEFAULT_NAMESPACE,
+               use_cache: bool = True) -> List[Dict[str, Any]]:
+        """
+        Scored facts for a query, without generation.
+        Returns dicts with 'id', 'content', 'metadata' and 'distance'.
+        """
+        if self.cache is None or not use_cache:
+            with stage("retrieval.search"):
+                return self.vector_store.search(query, k=k, namespace=namespace)
+        
+        # Read the version before searching: a write that lands mid-search
+        # leaves the entry tagged with the old version, so it is never served.
+        key = (namespace, query, k)
+        version = self.vector_store.memory_version(namespace)
+        results = self.cache.get(key, version)
+        if results is None:
+            results = self._flight.do(key + (version,), lambda: self._search_and_cache(key, version))
+        return results
+
+    def _search_and_cache(self, key, version) -> List[Dict[str, Any]]:
+        namespace, query, k = key
+        with stage("retrieval.search"):
+            results = self.vector_store.search(query, k=k, namespace=namespace)
+        self.cache.put(key, results, version)
+        return results
+
+    def retrieve_context(self, query: str, k: int = 5, namespace: str = DEFAULT_NAMESPACE) -> List[str]:
         """
         Retrieves relevant facts for a given query.
         Returns a list of formatted fact strings.
         """
-        results = self.vector_store.search(query, k=k)
+        with stage("retrieval.search"):
+            results = self.vector_store.search(query, k=k, namespace=namespace)
         
         # Format results for context
         context_items = []
@@ -22,15 +56,37 @@ class RetrievalService:
             
         return context_items
 
-    def retrieve(self, query: str, top_k: int = 5) -> List[Any]:
+    def retrieve_candidates(self, query: str, k: int = 20, namespace: str = DEFAULT_NAMESPACE) -> List[Dict[str, Any]]:
+        """
+        Retrieves raw search results including embeddings ('values'),
+        for callers that re-rank or pack them.
+        """
+        with stage("retrieval.search"):
+            return self.vector_store.search(query, k=k, namespace=namespace, include_values=True)
+
+    def retrieve_candidates_batch(self, queries: List[str], k: int = 20,
+                                  namespace: str = DEFAULT_NAMESPACE) -> List[List[Dict[str, Any]]]:
+        """retrieve_candidates() for many queries with one embedding pass."""
+        with stage("retrieval.search_batch"):
+            return self.vector_store.search_batch(queries, k=k, namespace=namespace, include_values=True)
+
+    def retrieve(self, query: str, top_k: int = 5, namespace: str = DEFAULT_NAMESPACE) -> List[Any]:
         """
         Retrieves relevant facts as Fact objects.
         """
+        with stage("retrieval.search"):
+            results = self.vector_store.search(query, k=top_k, namespace=namespace)
+        return self.to_facts(results)
+
+    def get_facts(self, ids: List[str], namespace: str = DEFAULT_NAMESPACE) -> List[Any]:
+        """Facts by id, in order, skipping unknown ids. Uses no similarity search."""
+        return self.to_facts([r for r in self.vector_store.get_facts(ids, namespace=namespace) if r is not None])
+
+    def to_facts(self, results: List[Dict[str, Any]]) -> List[Any]:
+        """Converts search results to Fact objects."""
         from unified_llm.models import Fact
         
-        results = self.vector_store.search(query, k=top_k)
         facts = []
-        
         for item in results:
             content = item['content']
             metadata = item.get('metadata', {})
@@ -40,14 +96,10 @@ class RetrievalService:
             fact = Fact(
                 content=content,
                 category=metadata.get('category', 'general'),
+                id=item.get('id'),
+                source_message_id=metadata.get('source_message_id'),
                 metadata=metadata
             )
-            # If search returns ID, set it (not standard in search result dict currently but good to have)
-            # Current search returns: content, metadata, distance.
-            # We can't easily recover ID unless we added it to metadata or searched by ID.
-            # But graph service needs it. Let's see if vector_store.search can return ID.
-            # Looking at vector_store.py:115... it doesn't return ID.
-            # For now, we just return the Fact objects.
             facts.append(fact)
             
         return facts
@@ -1,54 +1,141 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import List, Optional
 import os
+import threading
+
+import numpy as np
+
+from unified_llm.utils.metrics import stage, TEXTS_EMBEDDED
 
 class EmbeddingService(ABC):
+    dimension = 384
+
     @abstractmethod
-    def embed(self, texts: List[str]) -> List[List[float]]:
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Returns a (len(texts), dimension) float32 array."""
+        pass
+
+    def warm_up(self):
+        """Prepares the service ahead of the first request. No-op by default."""
         pass
 
 class MockEmbeddingService(EmbeddingService):
-    def embed(self, texts: List[str]) -> List[List[float]]:
+    def embed(self, texts: List[str]) -> np.ndarray:
         # Return dummy vectors of dimension 384
-        return [[0.1] * 384 for _ in texts]
+        return np.full((len(texts), self.dimension), 0.1, dtype=np.float32)
 
 class OpenAIEmbeddingService(EmbeddingService):
+    # text-embedding-ada-002
+    dimension = 1536
+
     def __init__(self, api_key: str = None):
         self.api_key = api_key or os.environ.get("OPENAI_API_KEY")
         if self.api_key:
             from openai import OpenAI
             self.client = OpenAI(api_key=self.api_key)
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
+    def embed(self, texts: List[str]) -> np.ndarray:
         if not texts:
-            return []
+            return np.empty((0, self.dimension), dtype=np.float32)
         try:
             response = self.client.embeddings.create(
                 input=texts,
                 model="text-embedding-ada-002"
             )
-            return [data.embedding for data in response.data]
+            return np.asarray([data.embedding for data in response.data], dtype=np.float32)
         except Exception as e:
             print(f"Error generating embeddings: {e}")
-            return []
+            return np.empty((0, self.dimension), dtype=np.float32)
 
 class LocalEmbeddingService(EmbeddingService):
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", batch_size: int = 64,
+                 bucket_size: int = 256, num_threads: Optional[int] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        # Inputs are sorted by length and encoded bucket by bucket so each
+        # batch only pads up to its own longest text.
+        self.bucket_size = max(bucket_size, batch_size)
+        self.num_threads = num_threads or int(os.environ.get("EMBEDDING_NUM_THREADS", "0"))
+        self.dimension = 384
+
+        # The model is loaded on first use (or by warm_up) so constructing the
+        # service does not import torch.
+        self._model = None
+        self._model_loaded = False
+        self._model_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if not self._model_loaded:
+            with self._model_lock:
+                if not self._model_loaded:
+                    self._model = self._load_model()
+                    self._model_loaded = True
+        return self._model
+
+    def _load_model(self):
+        # Torch defaults to one intra-op thread per core, which oversubscribes
+        # the CPU when uvicorn or the extractor run work alongside it.
+        if self.num_threads > 0:
+            try:
+                import torch
+                torch.set_num_threads(self.num_threads)
+            except ImportError:
+                pass
+
         try:
             from sentence_transformers import SentenceTransformer
-            self.model = SentenceTransformer(model_name)
+            model = SentenceTransformer(self.model_name, device="cpu")
+            self.dimension = model.get_sentence_embedding_dimension() or self.dimension
+            return model
         except ImportError:
             print("Error: sentence-transformers not installed. Please run 'pip install sentence-transformers'")
-            self.model = None
+            return None
+
+    @property
+    def is_ready(self) -> bool:
+        return self._model_loaded
+
+    def warm_up(self):
+        """Loads the model and runs one encode so the first request is not slow.
+
+        Raises if the model cannot be loaded or fails to encode, so the
+        service is not reported ready when it cannot embed.
+        """
+        if self.model is None:
+            raise RuntimeError(f"Embedding model {self.model_name} could not be loaded")
+        if len(self.embed(["warm up"])) != 1:
+            raise RuntimeError(f"Embedding model {self.model_name} failed to encode")
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
-        if not texts or not self.model:
-            return []
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """Returns a (len(texts), dimension) float32 array of unit-length vectors."""
+        if not texts:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        model = self.model
+        if model is None:
+            return np.empty((0, self.dimension), dtype=np.float32)
+        TEXTS_EMBEDDED.inc(len(texts))
         try:
-            # encode returns numpy array, convert to list
-            embeddings = self.model.encode(texts)
-            return embeddings.tolist()
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            embeddings = np.empty((len(texts), self.dimension), dtype=np.float32)
+
+            for start in range(0, len(order), self.bucket_size):
+                bucket = order[start:start + self.bucket_size]
+                with stage("embedding.encode"):
+                    encoded = model.encode(
+                        [texts[i] for i in bucket],
+                        batch_size=self.batch_size,
+                        convert_to_numpy=True,
+                        normalize_embeddings=False,
+                        show_progress_bar=False
+                    )
+                # Scatter back into the caller's order
+                embeddings[bucket] = encoded
+
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            np.maximum(norms, 1e-12, out=norms)
+            embeddings /= norms
+            return embeddings
         except Exception as e:
             print(f"Error generating local embeddings: {e}")
-            return []
-
+            return np.empty((0, self.dimension), dtype=np.float32)
@@ -0,0 +1,787 @@
+import os
+import json
+import mmap
+import uuid
+import time
+import threading
+from datetime import datetime
+from contextlib import contextmanager
+from typing import List, Dict, Any, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: writes are only serialized within one process
+    fcntl = None
+
+MANIFEST = "manifest.json"
+WRITE_LOCK = "write.lock"
+
+# Compaction rewrites a segment once this share of its rows is deleted, and
+# merges trailing segments once a namespace has more than MAX_SEGMENTS.
+COMPACT_TOMBSTONE_RATIO = 0.2
+MAX_SEGMENTS = 32
+# Rows copied per step while merging, bounding compaction memory
+MERGE_CHUNK = 65536
+# Max floats in one segment x queries score matrix during batch search
+SCORE_BLOCK = 16 * 1024 * 1024
+
+# Per-row columns kept next to the vectors so listing and filtering never
+# parse metadata: insertion sequence (the pagination order), timestamp as
+# epoch seconds (NaN if unknown) and an index into the segment's category list.
+ROW_DTYPE = np.dtype([("seq", "<i8"), ("ts", "<f8"), ("cat", "<u2")])
+
+def parse_timestamp(value: Any) -> float:
+    """Converts a stored timestamp string to epoch seconds, NaN if absent or invalid."""
+    if not value:
+        return float("nan")
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return float("nan")
+
+def _build_rows(seqs: np.ndarray, metadatas: List[Dict[str, Any]]) -> Tuple[np.ndarray, List[str]]:
+    categories: List[str] = []
+    codes: Dict[str, int] = {}
+    rows = np.empty(len(metadatas), dtype=ROW_DTYPE)
+    rows["seq"] = seqs
+    for i, meta in enumerate(metadatas):
+        category = meta.get("category", "")
+        if category not in codes:
+            codes[category] = len(categories)
+            categories.append(category)
+        rows["cat"][i] = codes[category]
+        rows["ts"][i] = parse_timestamp(meta.get("timestamp"))
+    return rows, categories
+
+def top_k_scores(vectors: np.ndarray, deleted: Optional[np.ndarray], queries: np.ndarray,
+                 k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Top-k (scores, rows) of vectors for each query, each shaped (top, n_queries).
+
+    Queries are scored in blocks so the score matrix stays under
+    SCORE_BLOCK floats. Deleted rows score -inf.
+    """
+    n_queries = len(queries)
+    top = min(k, len(vectors))
+    block = max(1, SCORE_BLOCK // max(len(vectors), 1))
+    top_scores = np.empty((top, n_queries), dtype=np.float32)
+    top_rows = np.empty((top, n_queries), dtype=np.int64)
+    for lo in range(0, n_queries, block):
+        scores = vectors @ queries[lo:lo + block].T
+        if deleted is not None:
+            # Dead rows can never outrank a live one
+            scores[deleted] = -np.inf
+        rows = np.argpartition(-scores, top - 1, axis=0)[:top]
+        top_rows[:, lo:lo + block] = rows
+        top_scores[:, lo:lo + block] = np.take_along_axis(scores, rows, axis=0)
+    return top_scores, top_rows
+
+class Segment:
+    """An immutable block of vectors plus their ids and metadata.
+
+    Vectors are memory-mapped read-only from a .npy file, so every process
+    that opens the segment shares the same page-cache pages. Metadata is a
+    JSONL file, also mmap'd, with a row -> byte offset table.
+
+    Deletes never touch these files: a separate boolean tombstone array,
+    named by the manifest, marks dead rows until compaction drops them.
+    """
+
+    def __init__(self, path: str, name: str, first_seq: int = 0):
+        self.name = name
+        self.deleted = None
+        self.deleted_count = 0
+        self.tombstones = None
+        base = os.path.join(path, name)
+        self.vectors = np.load(f"{base}.npy", mmap_mode="r")
+        self.offsets = np.load(f"{base}.offsets.npy", mmap_mode="r")
+        with open(f"{base}.ids", "r", encoding="utf-8") as f:
+            self.ids = f.read().split("\n")
+        with open(f"{base}.jsonl", "rb") as f:
+            self._meta = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if os.path.exists(f"{base}.rows.npy"):
+            self.rows = np.load(f"{base}.rows.npy", mmap_mode="r")
+            with open(f"{base}.cats", "r", encoding="utf-8") as f:
+                self.categories = json.load(f)
+        else:
+            # Segments written before row columns existed: derive them once
+            seqs = np.arange(first_seq, first_seq + len(self.ids), dtype=np.int64)
+            self.rows, self.categories = _build_rows(seqs, [self.metadata(i) for i in range(len(self.ids))])
+
+    @property
+    def seqs(self) -> np.ndarray:
+        return self.rows["seq"]
+
+    def category_code(self, category: str) -> Optional[int]:
+        try:
+            return self.categories.index(category)
+        except ValueError:
+            return None
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def live_count(self) -> int:
+        return len(self.ids) - self.deleted_count
+
+    def live_rows(self) -> np.ndarray:
+        if self.deleted is None:
+            return np.arange(len(self.ids))
+        return np.flatnonzero(~self.deleted)
+
+    def load_tombstones(self, path: str, tombstones: Optional[str]):
+        """Swaps in the tombstone array named by the manifest (None clears it)."""
+        deleted = np.load(os.path.join(path, tombstones), mmap_mode="r") if tombstones else None
+        self.deleted_count = int(np.count_nonzero(deleted)) if deleted is not None else 0
+        self.deleted = deleted
+        self.tombstones = tombstones
+
+    def raw_metadata(self, row: int) -> bytes:
+        start, end = int(self.offsets[row]), int(self.offsets[row + 1])
+        return self._meta[start:end]
+
+    def metadata(self, row: int) -> Dict[str, Any]:
+        return json.loads(self.raw_metadata(row))
+
+    @staticmethod
+    def write(path: str, ids: List[str], vectors: np.ndarray, metadatas: List[Dict[str, Any]],
+              seqs: np.ndarray) -> str:
+        """Writes a new segment and returns its name. Files are renamed into place last."""
+        name = f"seg-{uuid.uuid4().hex[:12]}"
+        base = os.path.join(path, name)
+
+        offsets = np.zeros(len(ids) + 1, dtype=np.uint64)
+        with open(f"{base}.jsonl.tmp", "wb") as f:
+            for i, meta in enumerate(metadatas):
+                line = json.dumps(meta, separators=(",", ":")).encode("utf-8") + b"\n"
+                f.write(line)
+                offsets[i + 1] = offsets[i] + len(line)
+        with open(f"{base}.ids.tmp", "w", encoding="utf-8") as f:
+            f.write("\n".join(ids))
+        with open(f"{base}.npy.tmp", "wb") as f:
+            np.save(f, np.ascontiguousarray(vectors, dtype=np.float32))
+        with open(f"{base}.offsets.npy.tmp", "wb") as f:
+            np.save(f, offsets)
+        rows, categories = _build_rows(seqs, metadatas)
+        with open(f"{base}.rows.npy.tmp", "wb") as f:
+            np.save(f, rows)
+        with open(f"{base}.cats.tmp", "w", encoding="utf-8") as f:
+            json.dump(categories, f)
+
+        Segment._rename_into_place(base)
+        return name
+
+    @staticmethod
+    def merge(path: str, segments: List["Segment"]) -> str:
+        """Writes the live rows of segments, in seq order, as one new segment.
+
+        Rows keep their seq, timestamp and metadata bytes, so cursors stay
+        valid. Vectors and row columns are streamed into preallocated .npy
+        files, so memory stays bounded by MERGE_CHUNK plus the row order
+        (two int64s per row) rather than the total.
+        """
+        name = f"seg-{uuid.uuid4().hex[:12]}"
+        base = os.path.join(path, name)
+        live = [(seg, seg.live_rows()) for seg in segments]
+        total = sum(len(rows) for _, rows in live)
+        dimension = segments[0].vectors.shape[1]
+
+        # Rows go out in seq order: a replaced row can carry an old seq in a
+        # newer segment, and page() relies on seqs ascending within a segment
+        src_seg = np.concatenate([np.full(len(rows), i, dtype=np.int64) for i, (_, rows) in enumerate(live)])
+        src_row = np.concatenate([rows for _, rows in live])
+        order = np.argsort(np.concatenate([seg.seqs[rows] for seg, rows in live]), kind="stable")
+        src_seg, src_row = src_seg[order], src_row[order]
+
+        vectors = np.lib.format.open_memmap(f"{base}.npy.tmp", mode="w+", dtype=np.float32, shape=(total, dimension))
+        rows_out = np.lib.format.open_memmap(f"{base}.rows.npy.tmp", mode="w+", dtype=ROW_DTYPE, shape=(total,))
+        offsets = np.zeros(total + 1, dtype=np.uint64)
+        ids: List[str] = []
+        categories: List[str] = []
+        codes: Dict[str, int] = {}
+
+        # Category codes are per segment; map them onto the merged list
+        remaps = []
+        for seg, _ in live:
+            remap = np.empty(max(len(seg.categories), 1), dtype=np.uint16)
+            for code, category in enumerate(seg.categories):
+                if category not in codes:
+                    codes[category] = len(categories)
+                    categories.append(category)
+                remap[code] = codes[category]
+            remaps.append(remap)
+
+        with open(f"{base}.jsonl.tmp", "wb") as meta_out:
+            for lo in range(0, total, MERGE_CHUNK):
+                chunk_segs = src_seg[lo:lo + MERGE_CHUNK]
+                chunk_rows = src_row[lo:lo + MERGE_CHUNK]
+                for i in np.unique(chunk_segs).tolist():
+                    seg = live[i][0]
+                    picked = np.flatnonzero(chunk_segs == i)
+                    src = chunk_rows[picked]
+                    vectors[lo + picked] = seg.vectors[src]
+                    cols = seg.rows[src]
+                    cols["cat"] = remaps[i][cols["cat"]]
+                    rows_out[lo + picked] = cols
+
+                for j, (i, row) in enumerate(zip(chunk_segs.tolist(), chunk_rows.tolist())):
+                    seg = live[i][0]
+                    line = seg.raw_metadata(row)
+                    meta_out.write(line)
+                    offsets[lo + j + 1] = offsets[lo + j] + len(line)
+                    ids.append(seg.ids[row])
+
+        vectors.flush()
+        rows_out.flush()
+        del vectors, rows_out
+        with open(f"{base}.ids.tmp", "w", encoding="utf-8") as f:
+            f.write("\n".join(ids))
+        with open(f"{base}.offsets.npy.tmp", "wb") as f:
+            np.save(f, offsets)
+        with open(f"{base}.cats.tmp", "w", encoding="utf-8") as f:
+            json.dump(categories, f)
+
+        Segment._rename_into_place(base)
+        return name
+
+    @staticmethod
+    def _rename_into_place(base: str):
+        for suffix in (".jsonl", ".ids", ".npy", ".offsets.npy", ".rows.npy", ".cats"):
+            os.replace(f"{base}{suffix}.tmp", f"{base}{suffix}")
+
+class LocalIndex:
+    """On-disk vector index shared by every process that opens the same directory.
+
+    The index is a list of immutable segments named by a manifest. Writers
+    take an exclusive file lock, write a new segment and atomically replace
+    the manifest with a bumped version. Readers map segments read-only and
+    pick up new versions by stat-ing the manifest before each read, so
+    several uvicorn workers serve queries from one copy of the vectors.
+
+    Deleting or replacing a row writes a new tombstone array for its segment.
+    Once tombstones or small segments pile up, a background compaction
+    rewrites the affected segments without the dead rows.
+    """
+
+    def __init__(self, path: str, dimension: int = 384, compact_ratio: float = COMPACT_TOMBSTONE_RATIO,
+                 max_segments: int = MAX_SEGMENTS, auto_compact: bool = True):
+        self.path = path
+        self.dimension = dimension
+        self.compact_ratio = compact_ratio
+        self.max_segments = max_segments
+        self.auto_compact = auto_compact
+        self.version = 0
+        self.next_seq = 0
+        self._segments: List[Segment] = []
+        # id -> (segment, row) for live rows
+        self._locations: Dict[str, Tuple[Segment, int]] = {}
+        self._manifest_stamp = None
+        self._lock = threading.Lock()
+        self._write_mutex = threading.Lock()
+        self._compactor = None
+
+        os.makedirs(path, exist_ok=True)
+        self.refresh()
+
+    # --- Reading ---
+
+    def _stat_manifest(self):
+        try:
+            st = os.stat(os.path.join(self.path, MANIFEST))
+        except FileNotFoundError:
+            return None
+        # The manifest is replaced (new inode) on every publish, which catches
+        # writes that land within the filesystem's mtime granularity.
+        return (st.st_ino, st.st_mtime_ns)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Reloads the manifest if another process published a new version."""
+        stamp = self._stat_manifest()
+        if stamp is None or (stamp == self._manifest_stamp and not force):
+            return False
+
+        with self._lock:
+            if stamp == self._manifest_stamp and not force:
+                return False
+            for attempt in range(5):
+                try:
+                    self._load_manifest(stamp)
+                    return True
+                except FileNotFoundError:
+                    # A compaction removed files named by the manifest we read;
+                    # the manifest that replaced it no longer references them.
+                    if attempt == 4:
+                        raise
+                    time.sleep(0.01)
+                    stamp = self._stat_manifest()
+
+    def _load_manifest(self, stamp):
+        with open(os.path.join(self.path, MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+
+        # Keep already-mapped segments; only open the new ones
+        current = {seg.name: seg for seg in self._segments}
+        segments = []
+        added, retombstoned = [], []
+        next_seq = 0
+        for entry in manifest["segments"]:
+            seg = current.pop(entry["name"], None)
+            reused = seg is not None
+            if not reused:
+                seg = Segment(self.path, entry["name"], first_seq=next_seq)
+                added.append(seg)
+            tombstones = entry.get("tombstones")
+            if tombstones != seg.tombstones:
+                if reused:
+                    retombstoned.append(seg)
+                seg.load_tombstones(self.path, tombstones)
+            segments.append(seg)
+            if len(seg):
+                next_seq = max(next_seq, int(seg.seqs[-1]) + 1)
+
+        # Patch the id map rather than rebuilding it, so a publish costs
+        # O(rows changed) instead of O(index). Readers may still hold the
+        # old map, so work on a copy.
+        locations = dict(self._locations)
+        for seg in list(current.values()) + retombstoned:
+            if seg.name in current:
+                rows = range(len(seg))
+            else:
+                rows = np.flatnonzero(seg.deleted).tolist() if seg.deleted is not None else []
+            for row in rows:
+                if locations.get(seg.ids[row]) == (seg, row):
+                    del locations[seg.ids[row]]
+        for seg in added:
+            for row in seg.live_rows().tolist():
+                locations[seg.ids[row]] = (seg, row)
+
+        self._segments = segments
+        self._locations = locations
+        self.version = manifest["version"]
+        self.next_seq = max(manifest.get("next_seq", 0), next_seq)
+        self.dimension = manifest.get("dimension", self.dimension)
+        self._manifest_stamp = stamp
+
+    def count(self) -> int:
+        self.refresh()
+        return sum(seg.live_count for seg in self._segments)
+
+    def __contains__(self, fact_id: str) -> bool:
+        return fact_id in self._locations
+
+    def get(self, fact_id: str) -> Optional[Tuple[np.ndarray, Dict[str, Any]]]:
+        """Returns (vector, metadata) for a live row, or None."""
+        self.refresh()
+        location = self._locations.get(fact_id)
+        if location is None:
+            return None
+        seg, row = location
+        return np.array(seg.vectors[row]), seg.metadata(row)
+
+    def get_many(self, fact_ids: List[str],
+                 include_vectors: bool = False) -> List[Optional[Tuple[Dict[str, Any], Optional[np.ndarray]]]]:
+        """get() for many ids: one hash lookup per id and one vector gather per segment.
+        Returns (metadata, vector or None) for each id, or None where it is not live."""
+        self.refresh()
+        locations = self._locations
+        results: List[Optional[Tuple[Dict[str, Any], Optional[np.ndarray]]]] = [None] * len(fact_ids)
+        by_segment: Dict[str, Tuple[Segment, List[int], List[int]]] = {}
+        for i, fact_id in enumerate(fact_ids):
+            location = locations.get(fact_id)
+            if location is None:
+                continue
+            seg, row = location
+            _, positions, rows = by_segment.setdefault(seg.name, (seg, [], []))
+            positions.append(i)
+            rows.append(row)
+
+        for seg, positions, rows in by_segment.values():
+            vectors = np.asarray(seg.vectors[np.array(rows)]) if include_vectors else None
+            for j, (i, row) in enumerate(zip(positions, rows)):
+                results[i] = (seg.metadata(row), vectors[j] if include_vectors else None)
+        return results
+
+    def search(self, query: np.ndarray, k: int = 5, include_vectors: bool = False) -> List[Dict[str, Any]]:
+        """Returns the k rows with the highest cosine similarity to query."""
+        query = np.asarray(query, dtype=np.float32).reshape(1, -1)
+        return self.search_batch(query, k=k, include_vectors=include_vectors)[0]
+
+    def search_batch(self, queries: np.ndarray, k: int = 5, include_vectors: bool = False,
+                     shards=None) -> List[List[Dict[str, Any]]]:
+        """Searches several queries at once with one matrix-matrix product per segment.
+
+        With a ShardPool (see storage/shards.py) and enough rows, the
+        segments are instead scored by its worker processes in parallel and
+        only their per-shard top-k candidates are merged here.
+        """
+        self.refresh()
+        segments = self._segments
+        queries = np.asarray(queries, dtype=np.float32)
+        if queries.ndim == 1:
+            queries = queries.reshape(1, -1)
+        n_queries = len(queries)
+        if not segments or k <= 0 or not n_queries:
+            return [[] for _ in range(n_queries)]
+
+        # Top-k candidates per segment (or shard), stacked: (candidates, queries)
+        candidates = None
+        if shards is not None and shards.should_scatter(sum(len(seg) for seg in segments)):
+            try:
+                candidates = shards.search(self.path, segments, queries, k)
+            except Exception as e:
+                # e.g. a worker opening a segment that compaction just removed
+                print(f"Sharded search failed, searching in-process: {e}")
+        if candidates is not None:
+            cand_scores, cand_segs, cand_rows = candidates
+        else:
+            cand_scores, cand_segs, cand_rows = [], [], []
+            for s, seg in enumerate(segments):
+                if not seg.live_count:
+                    continue
+                seg_scores, seg_rows = top_k_scores(seg.vectors, seg.deleted, queries, min(k, seg.live_count))
+                cand_scores.append(seg_scores)
+                cand_rows.append(seg_rows)
+                cand_segs.append(np.full(seg_rows.shape, s))
+
+        if not cand_scores:
+            return [[] for _ in range(n_queries)]
+        scores = np.concatenate(cand_scores)
+        rows = np.concatenate(cand_rows)
+        segs = np.concatenate(cand_segs)
+        order = np.argsort(-scores, axis=0, kind="stable")[:k]
+
+        results = []
+        for q in range(n_queries):
+            matches = []
+            for c in order[:, q]:
+                if scores[c, q] == -np.inf:
+                    # A shard with fewer live rows than k
+                    break
+                seg, row = segments[segs[c, q]], int(rows[c, q])
+                match = {"id": seg.ids[row], "metadata": seg.metadata(row), "score": float(scores[c, q])}
+                if include_vectors:
+                    match["vector"] = np.array(seg.vectors[row])
+                matches.append(match)
+            results.append(matches)
+        return results
+
+    def iter_rows(self, include_vectors: bool = False):
+        """Yields (id, metadata) for every live row, oldest segment first,
+        or (id, metadata, vector) with include_vectors."""
+        self.refresh()
+        for seg in self._segments:
+            for row in seg.live_rows().tolist():
+                if include_vectors:
+                    yield seg.ids[row], seg.metadata(row), np.asarray(seg.vectors[row])
+                else:
+                    yield seg.ids[row], seg.metadata(row)
+
+    def export_chunks(self, chunk_size: int) -> Iterator[Tuple[List[str], np.ndarray, List[bytes]]]:
+        """Yields (ids, vectors, raw metadata JSON) for up to chunk_size live
+        rows at a time, oldest first. Vectors are gathered a segment slice at
+        a time and metadata is passed through without parsing."""
+        self.refresh()
+        ids: List[str] = []
+        vectors: List[np.ndarray] = []
+        metadatas: List[bytes] = []
+        for seg in self._segments:
+            live = seg.live_rows()
+            start = 0
+            while start < len(live):
+                rows = live[start:start + chunk_size - len(ids)]
+                start += len(rows)
+                ids.extend(seg.ids[r] for r in rows.tolist())
+                vectors.append(np.asarray(seg.vectors[rows]))
+                metadatas.extend(seg.raw_metadata(r) for r in rows.tolist())
+                if len(ids) == chunk_size:
+                    yield ids, np.concatenate(vectors), metadatas
+                    ids, vectors, metadatas = [], [], []
+        if ids:
+            yield ids, np.concatenate(vectors), metadatas
+
+    def page(self, limit: int, after_seq: Optional[int] = None, skip: int = 0,
+             category: Optional[str] = None, since: Optional[float] = None,
+             until: Optional[float] = None) -> Tuple[List[Tuple[str, Dict[str, Any]]], Optional[int]]:
+        """Returns up to limit (id, metadata) rows in seq order after after_seq.
+
+        Seqs ascend within a segment but not always across them (a replaced
+        row can keep its seq in a newer segment), so each segment offers its
+        next matches and the page takes the lowest seqs. Filters are
+        evaluated on the row columns a window at a time, and a segment whose
+        next seq cannot make the page is skipped, so a page costs O(limit)
+        reads plus a vectorized scan of the rows it skips. The second value
+        is the seq to resume after, or None when exhausted.
+        """
+        self.refresh()
+        want = limit + skip
+        window = max(4 * want, 1024)
+        # (seq, segment index, row), lowest seqs first, at most want of them
+        candidates: List[Tuple[int, int, int]] = []
+        segments = self._segments
+        for s, seg in enumerate(segments):
+            n = len(seg)
+            if not seg.live_count or (after_seq is not None and int(seg.seqs[-1]) <= after_seq):
+                continue
+            code = None
+            if category is not None:
+                code = seg.category_code(category)
+                if code is None:
+                    continue
+
+            deleted = seg.deleted
+            start = 0 if after_seq is None else int(np.searchsorted(seg.seqs, after_seq, side="right"))
+            matches = []
+            while start < n and len(matches) < want:
+                if len(candidates) >= want and int(seg.seqs[start]) > candidates[-1][0]:
+                    break
+                cols = seg.rows[start:start + window]
+                if deleted is not None:
+                    mask = ~deleted[start:start + window]
+                else:
+                    mask = np.ones(len(cols), dtype=bool)
+                if code is not None:
+                    mask &= cols["cat"] == code
+                if since is not None:
+                    mask &= cols["ts"] >= since
+                if until is not None:
+                    mask &= cols["ts"] < until
+                for offset in np.flatnonzero(mask)[:want - len(matches)].tolist():
+                    matches.append((int(cols["seq"][offset]), s, start + offset))
+                start += window
+            if matches:
+                candidates = sorted(candidates + matches)[:want]
+
+        rows = candidates[skip:]
+        results = [(segments[s].ids[row], segments[s].metadata(row)) for _, s, row in rows]
+        return results, (rows[-1][0] if len(rows) >= limit else None)
+
+    # --- Writing ---
+
+    @contextmanager
+    def _write_lock(self):
+        """Serializes writers across threads and processes sharing the directory."""
+        with self._write_mutex, open(os.path.join(self.path, WRITE_LOCK), "a") as lock_file:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                # Another process may have published since our last read
+                self.refresh(force=True)
+                yield
+            finally:
+                if fcntl:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _publish(self, segments: List[Dict[str, Any]]):
+        manifest = {
+            "version": self.version + 1,
+            "dimension": self.dimension,
+            "next_seq": self.next_seq,
+            "segments": segments
+        }
+        tmp_path = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, os.path.join(self.path, MANIFEST))
+
+    @staticmethod
+    def _entry(seg: Segment) -> Dict[str, Any]:
+        entry = {"name": seg.name, "count": len(seg)}
+        if seg.tombstones:
+            entry["tombstones"] = seg.tombstones
+        return entry
+
+    def _tombstone(self, fact_ids) -> Tuple[List[Dict[str, Any]], List[str], int]:
+        """Manifest entries for the current segments with fact_ids marked deleted.
+
+        Returns (entries, superseded tombstone files, rows deleted). Must be
+        called under the write lock.
+        """
+        doomed: Dict[str, List[int]] = {}
+        for fact_id in fact_ids:
+            location = self._locations.get(fact_id)
+            if location is not None:
+                doomed.setdefault(location[0].name, []).append(location[1])
+
+        entries = []
+        stale = []
+        for seg in self._segments:
+            entry = self._entry(seg)
+            rows = doomed.get(seg.name)
+            if rows:
+                deleted = np.zeros(len(seg), dtype=bool) if seg.deleted is None else np.array(seg.deleted)
+                deleted[rows] = True
+                tombstones = f"{seg.name}.del-{uuid.uuid4().hex[:8]}.npy"
+                tmp_path = os.path.join(self.path, tombstones + ".tmp")
+                with open(tmp_path, "wb") as f:
+                    np.save(f, deleted)
+                os.replace(tmp_path, os.path.join(self.path, tombstones))
+                entry["tombstones"] = tombstones
+                if seg.tombstones:
+                    stale.append(seg.tombstones)
+            entries.append(entry)
+        return entries, stale, sum(len(rows) for rows in doomed.values())
+
+    def _remove_files(self, names: List[str]):
+        for name in names:
+            try:
+                os.remove(os.path.join(self.path, name))
+            except FileNotFoundError:
+                pass
+
+    def add(self, ids: List[str], vectors: np.ndarray, metadatas: List[Dict[str, Any]],
+            replace: bool = False, keep_seq: bool = False) -> int:
+        """Appends rows whose ids are not already present. Returns the number added.
+
+        With replace=True existing rows with the same id are tombstoned and
+        the new row is appended, i.e. an upsert. keep_seq=True gives a
+        replaced row the seq of the row it replaces, so an edited fact keeps
+        its place in page() order instead of moving to the end.
+        """
+        with self._write_lock():
+            seen = set()
+            keep = []
+            for i, fact_id in enumerate(ids):
+                if fact_id in seen or (fact_id in self._locations and not replace):
+                    continue
+                seen.add(fact_id)
+                keep.append(i)
+            if not keep:
+                return 0
+
+            seqs = np.arange(self.next_seq, self.next_seq + len(keep), dtype=np.int64)
+            self.next_seq += len(keep)
+            if keep_seq:
+                for j, i in enumerate(keep):
+                    location = self._locations.get(ids[i])
+                    if location is not None:
+                        seqs[j] = location[0].seqs[location[1]]
+                # Rows within a segment stay in seq order
+                order = np.argsort(seqs, kind="stable")
+                keep, seqs = [keep[j] for j in order], seqs[order]
+
+            vectors = np.asarray(vectors, dtype=np.float32)[keep]
+            kept_ids = [ids[i] for i in keep]
+            name = Segment.write(
+                self.path,
+                kept_ids,
+                vectors,
+                [metadatas[i] for i in keep],
+                seqs
+            )
+            if replace:
+                entries, stale, _ = self._tombstone(kept_ids)
+            else:
+                entries, stale = [self._entry(seg) for seg in self._segments], []
+            entries.append({"name": name, "count": len(keep)})
+            self._publish(entries)
+
+        self.refresh()
+        self._remove_files(stale)
+        self.maybe_compact()
+        return len(keep)
+
+    def delete(self, ids: List[str]) -> int:
+        """Tombstones the rows with these ids. Returns the number deleted."""
+        with self._write_lock():
+            entries, stale, deleted = self._tombstone(set(ids))
+            if not deleted:
+                return 0
+            self._publish(entries)
+
+        self.refresh()
+        self._remove_files(stale)
+        self.maybe_compact()
+        return deleted
+
+    # --- Compaction ---
+
+    def tombstone_ratio(self) -> float:
+        total = sum(len(seg) for seg in self._segments)
+        if not total:
+            return 0.0
+        return sum(seg.deleted_count for seg in self._segments) / total
+
+    def _compaction_plan(self) -> List[Tuple[int, int]]:
+        """Returns [start, end) runs of segments to rewrite, in order.
+
+        A segment is rewritten on its own once its tombstone ratio passes
+        compact_ratio. With too many segments, the trailing run starting at
+        the first segment no bigger than everything after it is merged, so
+        big segments are rewritten rarely. Runs are contiguous, which keeps
+        segments sorted by seq.
+        """
+        segments = self._segments
+        tail_start = len(segments)
+        if len(segments) > self.max_segments:
+            remaining = sum(len(seg) for seg in segments)
+            tail_start = 0
+            for i, seg in enumerate(segments):
+                remaining -= len(seg)
+                if len(seg) <= remaining:
+                    tail_start = i
+                    break
+
+        runs = [
+            (i, i + 1) for i, seg in enumerate(segments[:tail_start])
+            if len(seg) and seg.deleted_count / len(seg) >= self.compact_ratio
+        ]
+        if tail_start < len(segments):
+            runs.append((tail_start, len(segments)))
+        return runs
+
+    def needs_compaction(self) -> bool:
+        return bool(self._compaction_plan())
+
+    def compact(self) -> bool:
+        """Rewrites segments per the compaction plan. Returns False if there was nothing to do.
+
+        Holds the write lock throughout, so writers wait while readers keep
+        serving from the old segments until the new manifest is published.
+        """
+        with self._write_lock():
+            runs = self._compaction_plan()
+            if not runs:
+                return False
+
+            segments = self._segments
+            ends = dict(runs)
+            entries = []
+            replaced: List[Segment] = []
+            i = 0
+            while i < len(segments):
+                if i not in ends:
+                    entries.append(self._entry(segments[i]))
+                    i += 1
+                    continue
+                group = segments[i:ends[i]]
+                live = sum(seg.live_count for seg in group)
+                if live:
+                    entries.append({"name": Segment.merge(self.path, group), "count": live})
+                replaced.extend(group)
+                i = ends[i]
+            self._publish(entries)
+            print(f"Compacted {len(replaced)} segments in {self.path}; {len(entries)} remain")
+
+        self.refresh()
+        prefixes = tuple(seg.name + "." for seg in replaced)
+        self._remove_files([f for f in os.listdir(self.path) if f.startswith(prefixes)])
+        return True
+
+    def maybe_compact(self):
+        """Starts a background compaction when the plan is non-empty and none is running."""
+        if not self.auto_compact or not self.needs_compaction():
+            return
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            self._compactor = threading.Thread(target=self._compact_quietly, name="index-compaction", daemon=True)
+            self._compactor.start()
+
+    def _compact_quietly(self):
+        try:
+            self.compact()
+        except Exception as e:
+            print(f"Error compacting {self.path}: {e}")
@@ -0,0 +1,130 @@
+import os
+import atexit
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from unified_llm.storage.local_index import top_k_scores
+
+# Below this many rows one in-process matrix product beats the IPC round trip
+SHARD_MIN_ROWS = 200_000
+
+# A slice of one segment: (segment position, segment name, tombstone file, lo, hi)
+ShardSlice = Tuple[int, str, Any, int, int]
+
+# --- Worker side ---
+
+_vectors: Dict[Tuple[str, str], np.ndarray] = {}
+_tombstones: Dict[Tuple[str, str], np.ndarray] = {}
+
+def _init_worker():
+    # The pool is the parallelism; a multi-threaded BLAS per worker would oversubscribe
+    try:
+        from threadpoolctl import threadpool_limits
+        threadpool_limits(1)
+    except ImportError:
+        pass
+
+def _search_shard(path: str, slices: List[ShardSlice], queries: np.ndarray,
+                  k: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Top-k (scores, segment positions, rows) over this worker's slices, each (top, n_queries)."""
+    names = {name for _, name, _, _, _ in slices}
+    # Drop mappings of segments that compaction has replaced
+    for key in [key for key in _vectors if key[0] == path and key[1] not in names]:
+        del _vectors[key]
+    tombstones = {t for _, _, t, _, _ in slices if t}
+    for key in [key for key in _tombstones if key[0] == path and key[1] not in tombstones]:
+        del _tombstones[key]
+
+    cand_scores, cand_segs, cand_rows = [], [], []
+    for s, name, tombstone, lo, hi in slices:
+        vectors = _vectors.get((path, name))
+        if vectors is None:
+            vectors = _vectors[(path, name)] = np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+        deleted = None
+        if tombstone:
+            deleted = _tombstones.get((path, tombstone))
+            if deleted is None:
+                deleted = _tombstones[(path, tombstone)] = np.load(os.path.join(path, tombstone), mmap_mode="r")
+            deleted = deleted[lo:hi]
+        scores, rows = top_k_scores(vectors[lo:hi], deleted, queries, k)
+        cand_scores.append(scores)
+        cand_rows.append(rows + lo)
+        cand_segs.append(np.full(rows.shape, s))
+
+    scores = np.concatenate(cand_scores)
+    order = np.argsort(-scores, axis=0, kind="stable")[:k]
+    return (np.take_along_axis(scores, order, axis=0),
+            np.take_along_axis(np.concatenate(cand_segs), order, axis=0),
+            np.take_along_axis(np.concatenate(cand_rows), order, axis=0))
+
+# --- Parent side ---
+
+class ShardPool:
+    """Scatter-gather search over worker processes that each own a shard of the index.
+
+    The rows of an index's segments are split into `workers` contiguous,
+    equally sized shards. Shard i always runs on worker i, which keeps only
+    its own slices of the segment files mapped, scores the queries against
+    them and returns its top-k. The caller merges the per-shard candidates.
+    Workers are spawned (not forked) so they never inherit the server's
+    threads or the embedding model.
+    """
+
+    def __init__(self, workers: int, min_rows: int = SHARD_MIN_ROWS):
+        self.workers = workers
+        self.min_rows = min_rows
+        self._executors = [self._start_worker() for _ in range(workers)]
+        atexit.register(self.close)
+
+    @staticmethod
+    def _start_worker() -> ProcessPoolExecutor:
+        executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"),
+                                       initializer=_init_worker)
+        # Spawn it now rather than on the first large query
+        executor.submit(_init_worker)
+        return executor
+
+    def should_scatter(self, rows: int) -> bool:
+        return self.workers > 1 and rows >= self.min_rows
+
+    def plan(self, segments: List[Any]) -> List[List[ShardSlice]]:
+        """Splits all segment rows into one list of slices per worker."""
+        total = sum(len(seg) for seg in segments)
+        per_shard = -(-total // self.workers)
+        shards: List[List[ShardSlice]] = [[] for _ in range(self.workers)]
+        shard, room = 0, per_shard
+        for s, seg in enumerate(segments):
+            lo, n = 0, len(seg)
+            while lo < n:
+                hi = min(n, lo + room)
+                shards[shard].append((s, seg.name, seg.tombstones, lo, hi))
+                room -= hi - lo
+                lo = hi
+                if room == 0 and shard < self.workers - 1:
+                    shard, room = shard + 1, per_shard
+        return [slices for slices in shards if slices]
+
+    def search(self, path: str, segments: List[Any], queries: np.ndarray,
+               k: int) -> Tuple[List[np.ndarray], List[np.ndarray], List[np.ndarray]]:
+        """Per-shard (scores, segment positions, rows) candidate arrays."""
+        futures = [
+            self._executors[i].submit(_search_shard, path, slices, queries, k)
+            for i, slices in enumerate(self.plan(segments))
+        ]
+        results = []
+        for i, future in enumerate(futures):
+            try:
+                results.append(future.result())
+            except BrokenProcessPool:
+                # The worker died (e.g. OOM-killed); replace it for the next query
+                self._executors[i] = self._start_worker()
+                raise
+        return [r[0] for r in results], [r[1] for r in results], [r[2] for r in results]
+
+    def close(self):
+        for executor in self._executors:
+            executor.shutdown(wait=False, cancel_futures=True)
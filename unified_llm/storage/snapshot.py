@@ -0,0 +1,136 @@
+import os
+import json
+import time
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+SNAPSHOT_FORMAT = "unified-llm-snapshot"
+SNAPSHOT_VERSION = 1
+MANIFEST = "manifest.json"
+# Facts per chunk: 20k x 384 float32 is ~30 MB of vectors
+SNAPSHOT_CHUNK = 20_000
+
+# A snapshot is a directory of chunks. chunk-NNNNN.f32 holds the chunk's
+# vectors as raw little-endian float32, row-major (count x dimension);
+# chunk-NNNNN.jsonl holds one {"id", "metadata"} object per row, in the same
+# order. manifest.json, written last, lists every chunk with its row count
+# and the SHA-256 of both files, so a snapshot without one is incomplete.
+
+Chunk = Tuple[List[str], np.ndarray, List[Dict[str, Any]]]
+
+def _metadata_line(fact_id: str, metadata: Union[Dict[str, Any], bytes]) -> bytes:
+    if isinstance(metadata, (bytes, bytearray)):
+        # Already-serialized metadata (e.g. straight from a local segment)
+        return b'{"id":' + json.dumps(fact_id).encode("utf-8") + b',"metadata":' + bytes(metadata).rstrip(b"\n") + b"}\n"
+    return json.dumps({"id": fact_id, "metadata": metadata}, separators=(",", ":")).encode("utf-8") + b"\n"
+
+class SnapshotWriter:
+    """Writes a snapshot one chunk at a time; close() publishes the manifest."""
+
+    def __init__(self, path: str, namespace: str, source: str):
+        if os.path.exists(os.path.join(path, MANIFEST)):
+            raise FileExistsError(f"{path} already holds a snapshot")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.namespace = namespace
+        self.source = source
+        self.dimension: Optional[int] = None
+        self.chunks: List[Dict[str, Any]] = []
+        self.bytes_written = 0
+
+    def write_chunk(self, ids: List[str], vectors: np.ndarray,
+                    metadatas: List[Union[Dict[str, Any], bytes]]) -> Dict[str, Any]:
+        vectors = np.ascontiguousarray(vectors, dtype="<f4")
+        if vectors.ndim != 2 or len(vectors) != len(ids) or len(metadatas) != len(ids):
+            raise ValueError("ids, vectors and metadatas must be row-aligned")
+        if self.dimension is None:
+            self.dimension = vectors.shape[1]
+        elif vectors.shape[1] != self.dimension:
+            raise ValueError(f"Vector dimension {vectors.shape[1]} != {self.dimension}")
+
+        name = f"chunk-{len(self.chunks):05d}"
+        data = memoryview(vectors).cast("B")
+        with open(os.path.join(self.path, f"{name}.f32"), "wb") as f:
+            f.write(data)
+        lines = b"".join(_metadata_line(fact_id, meta) for fact_id, meta in zip(ids, metadatas))
+        with open(os.path.join(self.path, f"{name}.jsonl"), "wb") as f:
+            f.write(lines)
+
+        entry = {
+            "name": name,
+            "count": len(ids),
+            "vectors_sha256": hashlib.sha256(data).hexdigest(),
+            "metadata_sha256": hashlib.sha256(lines).hexdigest(),
+        }
+        self.chunks.append(entry)
+        self.bytes_written += len(data) + len(lines)
+        return entry
+
+    def close(self) -> Dict[str, Any]:
+        manifest = {
+            "format": SNAPSHOT_FORMAT,
+            "version": SNAPSHOT_VERSION,
+            "namespace": self.namespace,
+            "source": self.source,
+            "dimension": self.dimension,
+            "dtype": "float32-le",
+            "count": sum(c["count"] for c in self.chunks),
+            "created_at": time.time(),
+            "chunks": self.chunks,
+        }
+        tmp = os.path.join(self.path, MANIFEST + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=1)
+        os.replace(tmp, os.path.join(self.path, MANIFEST))
+        return manifest
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(path, MANIFEST), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        raise ValueError(f"{path} has no {MANIFEST}; the snapshot is missing or incomplete")
+    if manifest.get("format") != SNAPSHOT_FORMAT or manifest.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Unsupported snapshot format in {path}")
+    return manifest
+
+def _read_chunk(path: str, entry: Dict[str, Any], dimension: int, verify: bool) -> Chunk:
+    name = entry["name"]
+    with open(os.path.join(path, f"{name}.f32"), "rb") as f:
+        data = f.read()
+    with open(os.path.join(path, f"{name}.jsonl"), "rb") as f:
+        lines = f.read()
+    if verify:
+        if hashlib.sha256(data).hexdigest() != entry["vectors_sha256"]:
+            raise ValueError(f"Checksum mismatch in {name}.f32")
+        if hashlib.sha256(lines).hexdigest() != entry["metadata_sha256"]:
+            raise ValueError(f"Checksum mismatch in {name}.jsonl")
+
+    vectors = np.frombuffer(data, dtype="<f4").reshape(-1, dimension)
+    ids, metadatas = [], []
+    for line in lines.splitlines():
+        record = json.loads(line)
+        ids.append(record["id"])
+        metadatas.append(record["metadata"])
+    if len(ids) != entry["count"] or len(vectors) != entry["count"]:
+        raise ValueError(f"{name} has {len(ids)} records and {len(vectors)} vectors, expected {entry['count']}")
+    return ids, vectors, metadatas
+
+def iter_snapshot(path: str, verify: bool = True) -> Iterator[Chunk]:
+    """Yields (ids, vectors, metadatas) per chunk. The next chunk is read
+    and verified while the caller handles the current one, so at most two
+    are in memory."""
+    manifest = read_manifest(path)
+    entries = manifest["chunks"]
+    if not entries:
+        return
+    with ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-read") as pool:
+        future = pool.submit(_read_chunk, path, entries[0], manifest["dimension"], verify)
+        for i in range(len(entries)):
+            chunk = future.result()
+            if i + 1 < len(entries):
+                future = pool.submit(_read_chunk, path, entries[i + 1], manifest["dimension"], verify)
+            yield chunk
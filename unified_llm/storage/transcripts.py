@@ -0,0 +1,245 @@
+import os
+import json
+import zlib
+import struct
+import threading
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterable, Iterator, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized within one process
+    fcntl = None
+
+from unified_llm.models import Conversation, Message
+from unified_llm.storage.vector_store import DEFAULT_NAMESPACE, validate_namespace
+
+LOG_FILE = "transcripts.log"
+INDEX_FILE = "transcripts.idx"
+# Each log record is a 4-byte big-endian length followed by a zlib-compressed
+# JSON conversation, so the log can also be scanned without the index.
+RECORD_HEADER = struct.Struct(">I")
+
+def _encode_time(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value else None
+
+def _decode_time(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value else None
+
+def _message_id(message: Message) -> Optional[str]:
+    return message.id
+
+class TranscriptLog:
+    """Append-only, compressed archive of imported conversations.
+
+    Conversations are compressed one record at a time and appended to a
+    single log file. A JSONL index (also append-only) maps each conversation
+    id to its record's offset and length, and each message id to its
+    conversation and position, so any message is one seek plus one
+    decompress away. Re-importing a conversation appends a new record that
+    supersedes the old one.
+    """
+
+    def __init__(self, path: str, compression_level: int = 6):
+        self.path = path
+        self.compression_level = compression_level
+        self._log_path = os.path.join(path, LOG_FILE)
+        self._index_path = os.path.join(path, INDEX_FILE)
+        # conversation id -> (offset, length); message id -> (conversation id, position)
+        self._conversations: Dict[str, Tuple[int, int]] = {}
+        self._messages: Dict[str, Tuple[str, int]] = {}
+        self._index_size = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(path, exist_ok=True)
+        self.refresh()
+
+    def refresh(self):
+        """Reads index entries appended since the last call, e.g. by another process."""
+        try:
+            size = os.path.getsize(self._index_path)
+        except FileNotFoundError:
+            return
+        if size <= self._index_size:
+            return
+
+        with self._lock, open(self._index_path, "rb") as f:
+            f.seek(self._index_size)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break # an append in progress; picked up next time
+                self._index_size += len(line)
+                self._apply(json.loads(line))
+
+    def _apply(self, entry: Dict[str, Any]):
+        conversation_id = entry["conversation"]
+        self._conversations[conversation_id] = (entry["offset"], entry["length"])
+        for position, message_id in enumerate(entry["messages"]):
+            if message_id:
+                self._messages[message_id] = (conversation_id, position)
+
+    def __contains__(self, conversation_id: str) -> bool:
+        self.refresh()
+        return conversation_id in self._conversations
+
+    def count(self) -> int:
+        self.refresh()
+        return len(self._conversations)
+
+    # --- Writing ---
+
+    def append(self, conversations: Iterable[Conversation], source: str = "") -> int:
+        """Archives conversations. Returns the number written."""
+        records = []
+        for conv in conversations:
+            if not conv.id:
+                continue
+            payload = {
+                "id": conv.id,
+                "title": conv.title,
+                "created_at": _encode_time(conv.created_at),
+                "metadata": conv.metadata,
+                "source": source,
+                "messages": [
+                    {
+                        "role": m.role,
+                        "content": m.content,
+                        "timestamp": _encode_time(m.timestamp),
+                        "metadata": m.metadata,
+                        "id": m.id
+                    }
+                    for m in conv.messages
+                ]
+            }
+            blob = zlib.compress(json.dumps(payload, default=str).encode("utf-8"), self.compression_level)
+            records.append((conv, blob))
+        if not records:
+            return 0
+
+        with self._lock, open(self._log_path, "ab") as log, open(self._index_path, "ab") as index:
+            if fcntl:
+                fcntl.flock(log, fcntl.LOCK_EX)
+            try:
+                offset = log.seek(0, os.SEEK_END)
+                entries = []
+                for conv, blob in records:
+                    log.write(RECORD_HEADER.pack(len(blob)))
+                    log.write(blob)
+                    entries.append({
+                        "conversation": conv.id,
+                        "offset": offset + RECORD_HEADER.size,
+                        "length": len(blob),
+                        "messages": [_message_id(m) for m in conv.messages]
+                    })
+                    offset += RECORD_HEADER.size + len(blob)
+                # The log must be durable before the index points into it
+                log.flush()
+                os.fsync(log.fileno())
+                index.write(b"".join(json.dumps(e).encode("utf-8") + b"\n" for e in entries))
+                index.flush()
+            finally:
+                if fcntl:
+                    fcntl.flock(log, fcntl.LOCK_UN)
+
+        self.refresh()
+        return len(records)
+
+    # --- Reading ---
+
+    def _read(self, offset: int, length: int) -> Dict[str, Any]:
+        with open(self._log_path, "rb") as f:
+            f.seek(offset)
+            return json.loads(zlib.decompress(f.read(length)))
+
+    @staticmethod
+    def _to_conversation(payload: Dict[str, Any]) -> Conversation:
+        return Conversation(
+            id=payload["id"],
+            title=payload.get("title"),
+            messages=[TranscriptLog._to_message(m) for m in payload["messages"]],
+            created_at=_decode_time(payload.get("created_at")),
+            metadata=payload.get("metadata")
+        )
+
+    @staticmethod
+    def _to_message(data: Dict[str, Any]) -> Message:
+        return Message(
+            role=data["role"],
+            content=data["content"],
+            timestamp=_decode_time(data.get("timestamp")),
+            metadata=data.get("metadata"),
+            id=data.get("id")
+        )
+
+    def get_conversation(self, conversation_id: str) -> Optional[Conversation]:
+        self.refresh()
+        location = self._conversations.get(conversation_id)
+        if location is None:
+            return None
+        return self._to_conversation(self._read(*location))
+
+    def get_message(self, message_id: str) -> Optional[Tuple[str, Message]]:
+        """Returns (conversation id, message) for a source message id."""
+        self.refresh()
+        location = self._messages.get(message_id)
+        if location is None:
+            return None
+        conversation_id, position = location
+        payload = self._read(*self._conversations[conversation_id])
+        return conversation_id, self._to_message(payload["messages"][position])
+
+    def iter_conversations(self) -> Iterator[Conversation]:
+        """Yields the latest version of every conversation in one sequential pass over the log."""
+        self.refresh()
+        live = {offset for offset, _ in self._conversations.values()}
+        if not live:
+            return
+        with open(self._log_path, "rb") as f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                (length,) = RECORD_HEADER.unpack(header)
+                offset = f.tell()
+                if offset in live:
+                    yield self._to_conversation(json.loads(zlib.decompress(f.read(length))))
+                else:
+                    # Superseded by a later import, or not yet indexed
+                    f.seek(length, os.SEEK_CUR)
+
+class TranscriptStore:
+    """Per-namespace transcript logs under TRANSCRIPT_DIR."""
+
+    def __init__(self, root: Optional[str] = None):
+        self.root = root or os.environ.get("TRANSCRIPT_DIR", os.path.join("data", "transcripts"))
+        self._logs: Dict[str, TranscriptLog] = {}
+        self._logs_lock = threading.Lock()
+
+    def get_log(self, namespace: str = DEFAULT_NAMESPACE) -> TranscriptLog:
+        namespace = validate_namespace(namespace)
+        log = self._logs.get(namespace)
+        if log is None:
+            with self._logs_lock:
+                log = self._logs.get(namespace)
+                if log is None:
+                    path = self.root
+                    if namespace != DEFAULT_NAMESPACE:
+                        path = os.path.join(path, "namespaces", namespace)
+                    log = TranscriptLog(path)
+                    self._logs[namespace] = log
+        return log
+
+    def append(self, conversations: List[Conversation], namespace: str = DEFAULT_NAMESPACE, source: str = "") -> int:
+        return self.get_log(namespace).append(conversations, source=source)
+
+    def get_conversation(self, conversation_id: str, namespace: str = DEFAULT_NAMESPACE) -> Optional[Conversation]:
+        return self.get_log(namespace).get_conversation(conversation_id)
+
+    def get_message(self, message_id: str, namespace: str = DEFAULT_NAMESPACE) -> Optional[Tuple[str, Message]]:
+        return self.get_log(namespace).get_message(message_id)
+
+    def iter_conversations(self, namespace: str = DEFAULT_NAMESPACE) -> Iterator[Conversation]:
+        return self.get_log(namespace).iter_conversations()
+
+    def count(self, namespace: str = DEFAULT_NAMESPACE) -> int:
+        return self.get_log(namespace).count()
@@ -1,23 +1,84 @@
+import re
+import json
+import base64
 import uuid
+import random
 import hashlib
 import os
 import time
-from typing import List, Dict, Any
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from typing import List, Dict, Any, Tuple, Optional, Iterator
+
+import numpy as np
+
 from unified_llm.models import Fact
 from unified_llm.storage.embeddings import EmbeddingService
+from unified_llm.storage.local_index import LocalIndex, parse_timestamp
+from unified_llm.storage.snapshot import SNAPSHOT_CHUNK, SnapshotWriter, iter_snapshot, read_manifest
+from unified_llm.utils.metrics import stage, FACTS_WRITTEN, UPSERT_RETRIES
+from unified_llm.utils.singleflight import SingleFlight
+
+# Facts are partitioned per user/tenant. The default namespace ("") is
+# Pinecone's default namespace and the root of the local index directory,
+# so memories written before namespaces existed stay where they were.
+DEFAULT_NAMESPACE = ""
+_NAMESPACE_RE = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+def validate_namespace(namespace: str) -> str:
+    """Returns namespace if it is safe to use as a Pinecone namespace and a directory name."""
+    namespace = namespace or DEFAULT_NAMESPACE
+    if namespace != DEFAULT_NAMESPACE and not _NAMESPACE_RE.match(namespace):
+        raise ValueError(f"Invalid namespace '{namespace}': use 1-64 letters, digits, '_' or '-'")
+    return namespace
+
+# Pinecone rejects upsert requests over 2MB or 1000 vectors
+UPSERT_MAX_BYTES = 2 * 1024 * 1024
+UPSERT_MAX_VECTORS = 1000
+# Ids per Pinecone fetch; they travel in the URL, so keep requests short
+FETCH_MAX_IDS = 200
+# Most rows one add_facts() call writes to a local segment at once (~75 MB of vectors)
+LOCAL_WRITE_ROWS = 50_000
+# Rough JSON size of one float32 value, e.g. "-0.04371652379631996,"
+JSON_BYTES_PER_VALUE = 21
 
 class VectorStore:
-    def __init__(self, embedding_service: EmbeddingService, index_name: str = "unified-llm-memory-384"):
+    def __init__(self, embedding_service: EmbeddingService, index_name: str = "unified-llm-memory-384",
+                 embed_chunk_size: int = 256, upsert_workers: int = 4, upsert_retries: int = 3,
+                 query_workers: int = 8, search_shards: int = 0):
         self.embedding_service = embedding_service
         self.index_name = index_name
         self.index = None
         self.use_mock = False
         
+        # Bulk write path: facts are embedded embed_chunk_size at a time and
+        # each chunk is upserted by upsert_workers threads while the next one
+        # is embedded, so at most two chunks are held in memory.
+        self.embed_chunk_size = embed_chunk_size
+        self.upsert_workers = upsert_workers
+        self.upsert_retries = upsert_retries
+        self._upsert_pool = None
+        self._upsert_pool_lock = threading.Lock()
+        # Concurrent Pinecone queries for search_batch
+        self.query_workers = query_workers
+        self._query_pool = None
+        # Local search scattered over this many worker processes (0/1: in-process)
+        self.search_shards = search_shards
+        self._shard_pool = None
+        # Identical query texts embedded concurrently share one encode
+        self._embed_flight = SingleFlight("embed_query")
+        # Writes made through this store per namespace; see memory_version()
+        self._write_counts: Dict[str, int] = {}
+        
+        self.local_index_dir = None
+        self._local_indexes: Dict[str, LocalIndex] = {}
+        self._local_indexes_lock = threading.Lock()
+        
         api_key = os.environ.get("PINECONE_API_KEY")
         if not api_key:
-            print("Warning: PINECONE_API_KEY not found. Using mock storage.")
-            self.mock_storage = []
-            self.use_mock = True
+            print("Warning: PINECONE_API_KEY not found. Using local storage.")
+            self._use_local_index()
             return
 
         try:
@@ -46,85 +107,608 @@ class VectorStore:
                     )
                     while not self.pc.describe_index(index_name).status['ready']:
                         time.sleep(1)
-                self.index = self.pc.Index(index_name)
+                self.index = self.pc.Index(index_name, pool_threads=upsert_workers)
             else:
                 # Old API
                 if index_name not in pinecone.list_indexes():
                     print(f"Creating Pinecone index '{index_name}'...")
                     pinecone.create_index(index_name, dimension=384, metric='cosine')
-                self.index = pinecone.Index(index_name)
+                self.index = pinecone.Index(index_name, pool_threads=upsert_workers)
             
         except Exception as e:
             print(f"Error initializing Pinecone: {e}")
-            print("Using mock storage.")
-            self.mock_storage = []
-            self.use_mock = True
+            print("Using local storage.")
+            self._use_local_index()
+
+    def _use_local_index(self):
+        # Segment files are mmap'd read-only, so every uvicorn worker pointed
+        # at the same directory shares one copy of the vectors.
+        self.local_index_dir = os.environ.get("LOCAL_INDEX_DIR", os.path.join("data", "local_index"))
+        self.use_mock = True
+
+    def get_local_index(self, namespace: str = DEFAULT_NAMESPACE) -> LocalIndex:
+        """Returns the local partition for a namespace, opening it on first use."""
+        namespace = validate_namespace(namespace)
+        local_index = self._local_indexes.get(namespace)
+        if local_index is None:
+            with self._local_indexes_lock:
+                local_index = self._local_indexes.get(namespace)
+                if local_index is None:
+                    path = self.local_index_dir
+                    if namespace != DEFAULT_NAMESPACE:
+                        path = os.path.join(path, "namespaces", namespace)
+                    local_index = LocalIndex(path, dimension=384)
+                    self._local_indexes[namespace] = local_index
+        return local_index
 
-    def add_facts(self, facts: List[Fact]):
+    def add_facts(self, facts: List[Fact], namespace: str = DEFAULT_NAMESPACE):
         if not facts:
             return
+        namespace = validate_namespace(namespace)
+
+        # Pinecone takes each embedded chunk as it comes. Locally every write
+        # is a new segment, so chunks are buffered into one write per call
+        # (up to LOCAL_WRITE_ROWS) rather than one small segment per chunk.
+        flush_rows = self.embed_chunk_size if self.index else LOCAL_WRITE_ROWS
+        pending = []
+        buffered = []
+        try:
+            for start in range(0, len(facts), self.embed_chunk_size):
+                # Embed chunk N+1 while chunk N's writes are still in flight
+                buffered.append(self._prepare_chunk(facts[start:start + self.embed_chunk_size]))
+                if start + self.embed_chunk_size < len(facts) and sum(len(c[0]) for c in buffered) < flush_rows:
+                    continue
+                ids, embeddings, metadatas = _concat_chunks(buffered)
+                buffered = []
+                self._wait_for(pending)
+                pending = self._submit_writes(ids, embeddings, metadatas, namespace)
+            
+            self._wait_for(pending)
+        finally:
+            # Even a failed import may have written some batches
+            self._bump_version(namespace)
+
+    def _submit_writes(self, ids: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, Any]],
+                       namespace: str, replace: bool = False) -> List[Future]:
+        """Starts writing one chunk on the upsert pool; returns the futures to wait for."""
+        if self.index:
+            # Pinecone upserts always replace
+            return [
+                self._get_upsert_pool().submit(self._upsert_with_retry, batch, namespace)
+                for batch in self._payload_batches(ids, embeddings, metadatas)
+            ]
+        local_index = self.get_local_index(namespace)
+        return [self._get_upsert_pool().submit(self._local_write, local_index, ids, embeddings, metadatas, replace)]
 
+    def _local_write(self, local_index: LocalIndex, ids: List[str], embeddings: np.ndarray,
+                     metadatas: List[Dict[str, Any]], replace: bool = False) -> int:
+        with stage("vector_store.local_write"):
+            added = local_index.add(ids, embeddings, metadatas, replace=replace)
+        FACTS_WRITTEN.labels("local").inc(added)
+        return added
+
+    def _prepare_chunk(self, facts: List[Fact]) -> Tuple[List[str], np.ndarray, List[Dict[str, str]]]:
+        """Embeds a chunk of facts and builds their ids and metadata."""
         texts = [f"{fact.category}: {fact.content}" for fact in facts]
-        embeddings = self.embedding_service.embed(texts)
+        with stage("vector_store.embed_facts"):
+            embeddings = np.asarray(self.embedding_service.embed(texts), dtype=np.float32)
         
-        if self.index:
-            vectors = []
-            for i, fact in enumerate(facts):
-                meta = fact.metadata or {}
-                meta['category'] = fact.category
-                meta['timestamp'] = str(fact.timestamp) if fact.timestamp else ""
-                meta['content'] = texts[i]
-                
-                # Pinecone metadata values must be strings, numbers, booleans, or list of strings
-                # Ensure everything is stringified if complex
-                clean_meta = {k: str(v) for k, v in meta.items()}
-                
-                # Generate deterministic ID based on content to prevent duplicates
-                fact_id = hashlib.md5(f"{fact.category}:{fact.content}".encode()).hexdigest()
-                vectors.append({
-                    "id": fact_id,
-                    "values": embeddings[i],
-                    "metadata": clean_meta
-                })
+        ids = []
+        metadatas = []
+        for i, fact in enumerate(facts):
+            meta = fact.metadata or {}
+            meta['category'] = fact.category
+            meta['timestamp'] = str(fact.timestamp) if fact.timestamp else ""
+            meta['content'] = texts[i]
+            if fact.source_message_id:
+                # Lets the source message be looked up in the transcript store
+                meta['source_message_id'] = fact.source_message_id
             
-            # Upsert in batches of 100
-            batch_size = 100
-            for i in range(0, len(vectors), batch_size):
-                batch = vectors[i:i+batch_size]
-                self.index.upsert(vectors=batch)
-        else:
-            # Mock storage
-            for i, text in enumerate(texts):
-                self.mock_storage.append({
-                    'content': text,
-                    'embedding': embeddings[i]
-                })
-
-    def search(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        query_embedding = self.embedding_service.embed([query])[0]
+            # Pinecone metadata values must be strings, numbers, booleans, or list of strings
+            # Ensure everything is stringified if complex
+            metadatas.append({k: str(v) for k, v in meta.items()})
+            
+            # Generate deterministic ID based on content to prevent duplicates
+            ids.append(hashlib.md5(f"{fact.category}:{fact.content}".encode()).hexdigest())
+        
+        return ids, embeddings, metadatas
+
+    def _payload_batches(self, ids: List[str], embeddings: np.ndarray, metadatas: List[Dict[str, str]]):
+        """Yields upsert batches that stay under Pinecone's request size limits."""
+        budget = int(UPSERT_MAX_BYTES * 0.8) # headroom for the JSON envelope
+        vector_bytes = embeddings.shape[1] * JSON_BYTES_PER_VALUE if embeddings.ndim == 2 else 0
+        
+        batch = []
+        batch_bytes = 0
+        for i, fact_id in enumerate(ids):
+            size = vector_bytes + len(fact_id) + len(json.dumps(metadatas[i]))
+            if batch and (batch_bytes + size > budget or len(batch) >= UPSERT_MAX_VECTORS):
+                yield batch
+                batch = []
+                batch_bytes = 0
+            batch.append({"id": fact_id, "values": embeddings[i].tolist(), "metadata": metadatas[i]})
+            batch_bytes += size
+        if batch:
+            yield batch
+
+    def _upsert_with_retry(self, batch: List[Dict[str, Any]], namespace: str) -> int:
+        for attempt in range(self.upsert_retries + 1):
+            try:
+                with stage("vector_store.upsert_batch"):
+                    self.index.upsert(vectors=batch, namespace=namespace)
+                FACTS_WRITTEN.labels("pinecone").inc(len(batch))
+                return len(batch)
+            except Exception as e:
+                if attempt == self.upsert_retries:
+                    raise
+                UPSERT_RETRIES.inc()
+                delay = 0.5 * (2 ** attempt) + random.uniform(0, 0.25)
+                print(f"Upsert of {len(batch)} vectors failed ({e}), retrying in {delay:.1f}s...")
+                time.sleep(delay)
+
+    def _get_upsert_pool(self) -> ThreadPoolExecutor:
+        if self._upsert_pool is None:
+            with self._upsert_pool_lock:
+                if self._upsert_pool is None:
+                    self._upsert_pool = ThreadPoolExecutor(
+                        max_workers=self.upsert_workers,
+                        thread_name_prefix="upsert"
+                    )
+        return self._upsert_pool
+
+    def _get_shard_pool(self):
+        if self.search_shards <= 1:
+            return None
+        if self._shard_pool is None:
+            with self._upsert_pool_lock:
+                if self._shard_pool is None:
+                    from unified_llm.storage.shards import ShardPool
+                    self._shard_pool = ShardPool(self.search_shards)
+        return self._shard_pool
+
+    def _get_query_pool(self) -> ThreadPoolExecutor:
+        # Separate from the upsert pool so batch queries never queue behind an import
+        if self._query_pool is None:
+            with self._upsert_pool_lock:
+                if self._query_pool is None:
+                    self._query_pool = ThreadPoolExecutor(
+                        max_workers=self.query_workers,
+                        thread_name_prefix="query"
+                    )
+        return self._query_pool
+
+    @staticmethod
+    def _wait_for(futures):
+        """Blocks until every future is done, re-raising the first failure."""
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(e)
+        if errors:
+            raise errors[0]
+
+    def search(self, query: str, k: int = 5, namespace: str = DEFAULT_NAMESPACE,
+               include_values: bool = False) -> List[Dict[str, Any]]:
+        """
+        Returns the k most similar facts as {'id', 'content', 'metadata', 'distance'}.
+        include_values adds each fact's embedding as 'values' (float32 array).
+        """
+        return self.search_batch([query], k=k, namespace=namespace, include_values=include_values)[0]
+
+    def _embed_queries(self, queries: List[str]) -> np.ndarray:
+        """Embeds each distinct text once; a lone query joins an identical one in flight."""
+        unique = list(dict.fromkeys(queries))
+        if len(unique) == 1:
+            text = unique[0]
+            vector = self._embed_flight.do(text, lambda: np.asarray(self.embedding_service.embed([text]), dtype=np.float32))
+            return np.repeat(vector, len(queries), axis=0) if len(queries) > 1 else vector
+        embeddings = np.asarray(self.embedding_service.embed(unique), dtype=np.float32)
+        if len(unique) == len(queries) or len(embeddings) != len(unique):
+            return embeddings
+        position = {text: i for i, text in enumerate(unique)}
+        return embeddings[[position[text] for text in queries]]
+
+    def search_batch(self, queries: List[str], k: int = 5, namespace: str = DEFAULT_NAMESPACE,
+                     include_values: bool = False) -> List[List[Dict[str, Any]]]:
+        """
+        Runs search() for several queries: one embedding call for all of them,
+        then one matrix product per local segment, or concurrent Pinecone queries.
+        """
+        namespace = validate_namespace(namespace)
+        if not queries:
+            return []
+        with stage("vector_store.embed_query"):
+            query_embeddings = self._embed_queries(queries)
         
         if self.index:
-            results = self.index.query(
-                vector=query_embedding,
-                top_k=k,
-                include_metadata=True
-            )
+            def query_one(vector: np.ndarray) -> List[Dict[str, Any]]:
+                with stage("vector_store.search"):
+                    results = self.index.query(
+                        vector=vector.tolist(),
+                        top_k=k,
+                        include_metadata=True,
+                        include_values=include_values,
+                        namespace=namespace
+                    )
+                output = []
+                for match in results['matches']:
+                    item = {
+                        'id': match['id'],
+                        'content': match['metadata'].get('content', ''),
+                        'metadata': match['metadata'],
+                        'distance': match['score']
+                    }
+                    if include_values:
+                        item['values'] = np.asarray(match['values'], dtype=np.float32)
+                    output.append(item)
+                return output
             
-            output = []
-            for match in results['matches']:
-                output.append({
+            if len(query_embeddings) == 1:
+                return [query_one(query_embeddings[0])]
+            return list(self._get_query_pool().map(query_one, query_embeddings))
+        
+        with stage("vector_store.search"):
+            batches = self.get_local_index(namespace).search_batch(
+                query_embeddings, k=k, include_vectors=include_values, shards=self._get_shard_pool()
+            )
+        output = []
+        for matches in batches:
+            items = []
+            for match in matches:
+                item = {
+                    'id': match['id'],
                     'content': match['metadata'].get('content', ''),
                     'metadata': match['metadata'],
                     'distance': match['score']
-                })
-            return output
+                }
+                if include_values:
+                    item['values'] = match['vector']
+                items.append(item)
+            output.append(items)
+        return output
+
+    def list_facts(self, limit: int = 50, cursor: Optional[str] = None, namespace: str = DEFAULT_NAMESPACE,
+                   category: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+                   offset: int = 0) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        Lists facts in a stable order, one page at a time.
+        Returns (facts, next_cursor); next_cursor is None on the last page.
+        since/until are epoch seconds. offset is only honoured without a cursor.
+        """
+        namespace = validate_namespace(namespace)
+        state = _decode_cursor(cursor) if cursor else {}
+        skip = 0 if cursor else max(offset, 0)
+        limit = max(limit, 1)
+        
+        if not self.index:
+            rows, last_seq = self.get_local_index(namespace).page(
+                limit, after_seq=state.get("seq"), skip=skip,
+                category=category, since=since, until=until
+            )
+            facts = [{'id': fact_id, 'content': meta.get('content', ''), 'metadata': meta} for fact_id, meta in rows]
+            return facts, _encode_cursor({"seq": last_seq}) if last_seq is not None else None
+        
+        if not hasattr(self.index, "list_paginated"):
+            # Pod-based / legacy indexes cannot list ids; fall back to a single best-effort page
+            print("Warning: index does not support listing ids; returning one page only.")
+            results = self.index.query(vector=[0.1] * 384, top_k=limit, include_metadata=True, namespace=namespace)
+            facts = [{'id': m['id'], 'content': m['metadata'].get('content', ''), 'metadata': m['metadata']}
+                     for m in results['matches']]
+            return facts, None
+        
+        # Pinecone: list ids a page at a time and fetch their metadata in one call.
+        # The cursor is the page's pagination token plus a position within it,
+        # and the listing page size, which pos is only valid for: a client
+        # asking for a different limit on the next call keeps the old size.
+        token = state.get("token")
+        pos = state.get("pos", 0)
+        page_size = state.get("size") or min(limit, 100)
+        facts = []
+        while True:
+            page = self.index.list_paginated(namespace=namespace, limit=page_size, pagination_token=token)
+            ids = [_field(v, 'id') for v in (_field(page, 'vectors') or [])]
+            pagination = _field(page, 'pagination')
+            next_token = _field(pagination, 'next') if pagination else None
+            
+            fetched = {}
+            if ids[pos:]:
+                fetched = _field(self.index.fetch(ids=ids[pos:], namespace=namespace), 'vectors') or {}
+            
+            for i in range(pos, len(ids)):
+                vector = fetched.get(ids[i])
+                if vector is None:
+                    continue
+                meta = dict(_field(vector, 'metadata') or {})
+                if category is not None and meta.get('category') != category:
+                    continue
+                if since is not None or until is not None:
+                    ts = parse_timestamp(meta.get('timestamp'))
+                    if (since is not None and not ts >= since) or (until is not None and not ts < until):
+                        continue
+                if skip:
+                    skip -= 1
+                    continue
+                facts.append({'id': ids[i], 'content': meta.get('content', ''), 'metadata': meta})
+                if len(facts) == limit:
+                    if i + 1 < len(ids):
+                        return facts, _encode_cursor({"token": token, "pos": i + 1, "size": page_size})
+                    return facts, _encode_cursor({"token": next_token, "pos": 0, "size": page_size}) if next_token else None
+            
+            if not next_token:
+                return facts, None
+            token = next_token
+            pos = 0
+
+    def get_fact(self, fact_id: str, namespace: str = DEFAULT_NAMESPACE) -> Optional[Dict[str, Any]]:
+        """Returns {'id', 'content', 'metadata'} for a fact, or None if not found."""
+        return self.get_facts([fact_id], namespace=namespace)[0]
+
+    def get_facts(self, ids: List[str], namespace: str = DEFAULT_NAMESPACE,
+                  include_values: bool = False) -> List[Optional[Dict[str, Any]]]:
+        """
+        Looks facts up by id, never by similarity. Returns one
+        {'id', 'content', 'metadata'} dict per id, in order, or None where
+        the id is unknown. include_values adds the embedding as 'values'.
+        Local lookups go through the index's id -> row map; Pinecone ids
+        are fetched FETCH_MAX_IDS at a time, concurrently.
+        """
+        namespace = validate_namespace(namespace)
+        if not ids:
+            return []
+
+        if not self.index:
+            with stage("vector_store.get"):
+                rows = self.get_local_index(namespace).get_many(ids, include_vectors=include_values)
+            return [None if row is None else _fact_dict(fact_id, *row) for fact_id, row in zip(ids, rows)]
+
+        unique = list(dict.fromkeys(ids))
+
+        def fetch(chunk: List[str]) -> Dict[str, Any]:
+            with stage("vector_store.get"):
+                return _field(self.index.fetch(ids=chunk, namespace=namespace), 'vectors') or {}
+
+        chunks = [unique[i:i + FETCH_MAX_IDS] for i in range(0, len(unique), FETCH_MAX_IDS)]
+        fetched = {}
+        if len(chunks) == 1:
+            fetched.update(fetch(chunks[0]))
+        else:
+            for vectors in self._get_query_pool().map(fetch, chunks):
+                fetched.update(vectors)
+
+        results = []
+        for fact_id in ids:
+            vector = fetched.get(fact_id)
+            if vector is None:
+                results.append(None)
+                continue
+            values = _field(vector, 'values') if include_values else None
+            results.append(_fact_dict(
+                fact_id, dict(_field(vector, 'metadata') or {}),
+                np.asarray(values, dtype=np.float32) if values is not None else None
+            ))
+        return results
+
+    def iter_fact_ids(self, namespace: str = DEFAULT_NAMESPACE) -> Iterator[str]:
+        """
+        Returns an iterator over every fact id in the namespace. Raises
+        NotImplementedError up front for Pinecone indexes that cannot list
+        ids (pod-based / legacy), rather than silently yielding nothing.
+        """
+        namespace = validate_namespace(namespace)
+        if self.index and not hasattr(self.index, "list_paginated"):
+            raise NotImplementedError("This Pinecone index cannot list ids (pod-based or legacy); "
+                                      "use a serverless index to enumerate or export facts")
+        return self._iter_fact_ids(namespace)
+
+    def _iter_fact_ids(self, namespace: str) -> Iterator[str]:
+        if not self.index:
+            for fact_id, _ in self.get_local_index(namespace).iter_rows():
+                yield fact_id
+            return
+        token = None
+        while True:
+            page = self.index.list_paginated(namespace=namespace, limit=100, pagination_token=token)
+            for vector in _field(page, 'vectors') or []:
+                yield _field(vector, 'id')
+            pagination = _field(page, 'pagination')
+            token = _field(pagination, 'next') if pagination else None
+            if not token:
+                return
+
+    def export_snapshot(self, path: str, namespace: str = DEFAULT_NAMESPACE,
+                        chunk_size: int = SNAPSHOT_CHUNK) -> Dict[str, Any]:
+        """
+        Streams every fact of a namespace (id, metadata and embedding) into
+        a snapshot directory; see storage/snapshot.py for the format. Chunk
+        N is written while chunk N+1 is read, so memory stays at two chunks.
+        Local rows are copied straight from the segment files; Pinecone ids
+        are listed and fetched in concurrent batches. Returns the manifest.
+        Raises NotImplementedError for Pinecone indexes that cannot list ids.
+        """
+        namespace = validate_namespace(namespace)
+        # Fails before anything is written if the index cannot list its ids
+        ids = self.iter_fact_ids(namespace) if self.index else None
+        writer = SnapshotWriter(path, namespace, source="pinecone" if self.index else "local")
+        if self.index:
+            def chunks():
+                while True:
+                    chunk_ids = list(islice(ids, chunk_size))
+                    if not chunk_ids:
+                        return
+                    with stage("vector_store.snapshot_fetch"):
+                        facts = [f for f in self.get_facts(chunk_ids, namespace=namespace, include_values=True)
+                                 if f is not None and f.get('values') is not None]
+                    if facts:
+                        yield ([f['id'] for f in facts], np.vstack([f['values'] for f in facts]),
+                               [f['metadata'] for f in facts])
         else:
-            # Mock search - just return everything for now since embeddings are dummy
-            output = []
-            for item in self.mock_storage:
-                output.append({
-                    'content': item['content'],
-                    'metadata': item.get('metadata', {}),
-                    'distance': 1.0 # precise match in mock land
-                })
-            return output[:k]
+            local_index = self.get_local_index(namespace)
+            
+            def chunks():
+                return local_index.export_chunks(chunk_size)
+        
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="snapshot-write") as pool:
+            pending = []
+            for chunk in chunks():
+                self._wait_for(pending)
+                pending = [pool.submit(writer.write_chunk, *chunk)]
+            self._wait_for(pending)
+        return writer.close()
+
+    def import_snapshot(self, path: str, namespace: str = DEFAULT_NAMESPACE, verify: bool = True) -> Dict[str, Any]:
+        """
+        Upserts every fact of a snapshot into a namespace, keeping ids,
+        metadata and embeddings, so nothing is re-extracted or re-embedded.
+        Each chunk's checksums are verified before any of it is written, and
+        the next chunk is read while the current one is upserted. Returns
+        {'facts', 'chunks', 'seconds'}.
+        """
+        namespace = validate_namespace(namespace)
+        manifest = read_manifest(path)
+        if not self.index:
+            dimension = self.get_local_index(namespace).dimension
+            if manifest["dimension"] not in (None, dimension):
+                raise ValueError(f"Snapshot vectors have dimension {manifest['dimension']}, the index expects {dimension}")
+        
+        start = time.perf_counter()
+        written = 0
+        pending = []
+        try:
+            for ids, vectors, metadatas in iter_snapshot(path, verify=verify):
+                self._wait_for(pending)
+                pending = self._submit_writes(ids, vectors, metadatas, namespace, replace=True)
+                written += len(ids)
+            self._wait_for(pending)
+        finally:
+            self._bump_version(namespace)
+        return {'facts': written, 'chunks': len(manifest['chunks']), 'seconds': time.perf_counter() - start}
+
+    def delete_facts(self, ids: List[str], namespace: str = DEFAULT_NAMESPACE) -> int:
+        """Deletes facts by id. Returns how many were deleted (requested, for Pinecone)."""
+        namespace = validate_namespace(namespace)
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return 0
+
+        if not self.index:
+            return self.get_local_index(namespace).delete(ids)
+
+        # Pinecone accepts up to 1000 ids per delete, the same cap as upserts
+        try:
+            for start in range(0, len(ids), UPSERT_MAX_VECTORS):
+                self.index.delete(ids=ids[start:start + UPSERT_MAX_VECTORS], namespace=namespace)
+        finally:
+            self._bump_version(namespace)
+        return len(ids)
+
+    def update_fact(self, fact_id: str, content: Optional[str] = None, category: Optional[str] = None,
+                    metadata: Optional[Dict[str, Any]] = None,
+                    namespace: str = DEFAULT_NAMESPACE) -> Optional[Dict[str, Any]]:
+        """
+        Corrects a fact in place, keeping its id. Unset fields keep their value;
+        metadata is merged into the stored metadata. The fact is re-embedded.
+        Returns the updated fact ({'id', 'content', 'metadata'}) or None if not found.
+        Raises RuntimeError if the new content cannot be embedded.
+        """
+        namespace = validate_namespace(namespace)
+        existing = self.get_fact(fact_id, namespace)
+        if existing is None:
+            return None
+        meta = existing['metadata']
+
+        old_category = meta.get('category', 'general')
+        old_content = meta.get('content', '')
+        # Content is stored as "Category: Content"
+        if old_content.startswith(f"{old_category}:"):
+            old_content = old_content[len(old_category) + 1:].strip()
+
+        category = category or old_category
+        content = content if content is not None else old_content
+        meta.update({k: str(v) for k, v in (metadata or {}).items()})
+        meta['category'] = category
+        meta['content'] = f"{category}: {content}"
+
+        with stage("vector_store.embed_facts"):
+            embedding = np.asarray(self.embedding_service.embed([meta['content']]), dtype=np.float32)
+        if len(embedding) != 1:
+            # The embedding services log and return no vectors on failure
+            raise RuntimeError(f"Could not embed the updated content of fact '{fact_id}'")
+
+        if self.index:
+            self._upsert_with_retry([{"id": fact_id, "values": embedding[0].tolist(), "metadata": meta}], namespace)
+        else:
+            # Keep the fact's place in /facts order so paging clients neither
+            # see it twice nor miss it
+            self.get_local_index(namespace).add([fact_id], embedding, [meta], replace=True, keep_seq=True)
+            FACTS_WRITTEN.labels("local").inc()
+        self._bump_version(namespace)
+        return {'id': fact_id, 'content': meta['content'], 'metadata': meta}
+
+    def _bump_version(self, namespace: str):
+        with self._upsert_pool_lock:
+            self._write_counts[namespace] = self._write_counts.get(namespace, 0) + 1
+
+    def memory_version(self, namespace: str = DEFAULT_NAMESPACE) -> int:
+        """
+        A number that changes whenever the namespace's facts change, for keying caches.
+        Locally this is the index manifest version, which also reflects writes by
+        other processes. Pinecone has no such counter, so only writes made
+        through this VectorStore are seen there.
+        """
+        namespace = validate_namespace(namespace)
+        if self.index:
+            return self._write_counts.get(namespace, 0)
+        local_index = self.get_local_index(namespace)
+        local_index.refresh()
+        return local_index.version
+
+    def namespace_sizes(self) -> Dict[str, int]:
+        """Fact counts for every namespace this process knows about."""
+        if self.index:
+            stats = self.index.describe_index_stats()
+            return {ns: info.get('vector_count', 0) for ns, info in stats.get('namespaces', {}).items()}
+        return {ns: local_index.count() for ns, local_index in list(self._local_indexes.items())}
+
+    def count(self, namespace: str = DEFAULT_NAMESPACE) -> int:
+        """Number of facts stored in a namespace."""
+        namespace = validate_namespace(namespace)
+        if self.index:
+            stats = self.index.describe_index_stats()
+            return stats.get('namespaces', {}).get(namespace, {}).get('vector_count', 0)
+        return self.get_local_index(namespace).count()
+
+def _fact_dict(fact_id: str, meta: Dict[str, Any], values: Optional[np.ndarray] = None) -> Dict[str, Any]:
+    fact = {'id': fact_id, 'content': meta.get('content', ''), 'metadata': meta}
+    if values is not None:
+        fact['values'] = values
+    return fact
+
+def _concat_chunks(chunks: List[Tuple[List[str], np.ndarray, List[Dict[str, str]]]]):
+    if len(chunks) == 1:
+        return chunks[0]
+    ids, metadatas = [], []
+    for chunk_ids, _, chunk_metadatas in chunks:
+        ids.extend(chunk_ids)
+        metadatas.extend(chunk_metadatas)
+    return ids, np.concatenate([embeddings for _, embeddings, _ in chunks]), metadatas
+
+def _field(obj: Any, name: str) -> Any:
+    """Reads a field from a Pinecone response object or a plain dict."""
+    if isinstance(obj, dict):
+        return obj.get(name)
+    return getattr(obj, name, None)
+
+def _encode_cursor(state: Dict[str, Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode().rstrip("=")
+
+def _decode_cursor(cursor: str) -> Dict[str, Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        state = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(state, dict):
+        raise ValueError("Invalid cursor")
+    return state
@@ -0,0 +1,124 @@
+import os
+import math
+import time
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Deque
+
+from unified_llm.utils.metrics import ADMISSION_ACTIVE, ADMISSION_QUEUE_DEPTH, ADMISSION_SHED, ADMISSION_WAIT
+
+class Overloaded(Exception):
+    """Raised when a request is shed; retry_after is a hint in whole seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """Caps concurrent requests for one endpoint class, with a bounded FIFO queue.
+
+    At most max_concurrency requests run at once. Up to max_queue more wait
+    in arrival order for at most max_queue_time seconds each. Anything
+    beyond that is rejected immediately with Overloaded, so under overload
+    admitted requests keep their normal latency instead of every request
+    slowing down together. A finishing request hands its slot straight to
+    the oldest waiter.
+    """
+
+    def __init__(self, name: str, max_concurrency: int, max_queue: int = 0, max_queue_time: float = 5.0):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_queue_time = max_queue_time
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        # Moving average of how long an admitted request holds its slot
+        self._service_time = 1.0
+
+    @classmethod
+    def from_env(cls, name: str, max_concurrency: int, max_queue: int, max_queue_time: float) -> "AdmissionController":
+        prefix = f"ADMISSION_{name.upper()}_"
+        return cls(
+            name,
+            max_concurrency=int(os.environ.get(prefix + "CONCURRENCY", str(max_concurrency))),
+            max_queue=int(os.environ.get(prefix + "QUEUE", str(max_queue))),
+            max_queue_time=float(os.environ.get(prefix + "QUEUE_TIME", str(max_queue_time)))
+        )
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_concurrency > 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    def retry_after(self) -> int:
+        # Time for the current queue to drain through the available slots
+        backlog = (self.queued + 1) / max(self.max_concurrency, 1)
+        return max(1, math.ceil(backlog * self._service_time))
+
+    def _shed(self, reason: str) -> Overloaded:
+        ADMISSION_SHED.labels(self.name, reason).inc()
+        return Overloaded(reason, self.retry_after())
+
+    async def _acquire(self):
+        if self.active < self.max_concurrency and not self._waiters:
+            self.active += 1
+            ADMISSION_WAIT.labels(self.name).observe(0.0)
+            return
+        if self.queued >= self.max_queue:
+            raise self._shed("queue_full")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        ADMISSION_QUEUE_DEPTH.labels(self.name).set(self.queued)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.max_queue_time)
+        except asyncio.TimeoutError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait timed out: keep it
+                return
+            waiter.cancel()
+            raise self._shed("queue_timeout")
+        except asyncio.CancelledError:
+            # Client went away while queued; pass on a slot it may have been given
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            waiter.cancel()
+            raise
+        finally:
+            try:
+                self._waiters.remove(waiter)
+            except ValueError:
+                pass
+            ADMISSION_QUEUE_DEPTH.labels(self.name).set(self.queued)
+            ADMISSION_WAIT.labels(self.name).observe(time.perf_counter() - start)
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot over; active stays the same
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        """Holds a slot for the body of the block, or raises Overloaded."""
+        if not self.enabled:
+            yield
+            return
+        await self._acquire()
+        ADMISSION_ACTIVE.labels(self.name).set(self.active)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._service_time = 0.9 * self._service_time + 0.1 * (time.perf_counter() - start)
+            self._release()
+            ADMISSION_ACTIVE.labels(self.name).set(self.active)
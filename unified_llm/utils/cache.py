@@ -0,0 +1,49 @@
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from unified_llm.utils.metrics import CACHE_REQUESTS
+
+class LRUCache:
+    """Thread-safe LRU cache whose entries are tagged with a version.
+
+    A lookup only hits if the entry was stored under the same version the
+    caller passes in (e.g. the memory version of a namespace), so a write
+    invalidates every dependent entry without touching the cache. ttl, if
+    set, additionally bounds how long an entry is served.
+    """
+
+    def __init__(self, name: str, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, version: Any = None) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, entry_version, stored_at = entry
+                if entry_version == version and (self.ttl is None or time.monotonic() - stored_at < self.ttl):
+                    self._entries.move_to_end(key)
+                    CACHE_REQUESTS.labels(self.name, "hit").inc()
+                    return value
+                del self._entries[key]
+        CACHE_REQUESTS.labels(self.name, "miss").inc()
+        return None
+
+    def put(self, key: Hashable, value: Any, version: Any = None):
+        with self._lock:
+            self._entries[key] = (value, version, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
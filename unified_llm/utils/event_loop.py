@@ -0,0 +1,78 @@
+import asyncio
+import atexit
+import threading
+from concurrent.futures import Future
+from typing import Any, Coroutine, Optional
+
+class BackgroundLoop:
+    """An asyncio event loop running in a daemon thread for the life of the process.
+
+    Sync code (the CLI, interactive mode, sync wrappers) submits coroutines
+    here instead of spinning up or borrowing a loop per call, so async
+    resources bound to a loop, like an HTTP connection pool, outlive any
+    one call. Async code on another loop can await submit() via
+    asyncio.wrap_future.
+    """
+
+    def __init__(self, name: str = "unified-llm-loop"):
+        self.name = name
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is None:
+            with self._lock:
+                if self._loop is None:
+                    loop = asyncio.new_event_loop()
+                    ready = threading.Event()
+                    self._thread = threading.Thread(target=self._run, args=(loop, ready), name=self.name, daemon=True)
+                    self._thread.start()
+                    ready.wait()
+                    self._loop = loop
+        return self._loop
+
+    @staticmethod
+    def _run(loop: asyncio.AbstractEventLoop, ready: threading.Event):
+        asyncio.set_event_loop(loop)
+        loop.call_soon(ready.set)
+        loop.run_forever()
+
+    def is_current(self) -> bool:
+        """True when called from the loop's own thread."""
+        return self._thread is not None and threading.current_thread() is self._thread
+
+    def submit(self, coro: Coroutine) -> Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """Runs coro on the loop and blocks the calling thread for its result."""
+        if self.is_current():
+            coro.close()
+            raise RuntimeError("BackgroundLoop.run() called from its own loop; await the coroutine instead")
+        return self.submit(coro).result(timeout)
+
+    def stop(self):
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop = self._thread = None
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join(timeout=5)
+
+_default_loop: Optional[BackgroundLoop] = None
+_default_lock = threading.Lock()
+
+def get_background_loop() -> BackgroundLoop:
+    """The process-wide loop shared by every sync caller."""
+    global _default_loop
+    if _default_loop is None:
+        with _default_lock:
+            if _default_loop is None:
+                _default_loop = BackgroundLoop()
+                atexit.register(_default_loop.stop)
+    return _default_loop
+
+def run_sync(coro: Coroutine, timeout: Optional[float] = None) -> Any:
+    return get_background_loop().run(coro, timeout)
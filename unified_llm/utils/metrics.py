@@ -0,0 +1,249 @@
+"""Minimal in-process metrics with Prometheus text exposition.
+
+Recording is a dict lookup plus a locked increment, and nothing is
+formatted until /metrics is scraped, so instrumentation is cheap enough
+for hot paths.
+"""
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values, **kwargs):
+        if kwargs:
+            values = tuple(str(kwargs[n]) for n in self.labelnames)
+        else:
+            values = tuple(str(v) for v in values)
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _default(self):
+        # Unlabelled metrics use a single child keyed by ()
+        return self.labels()
+
+    def collect(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in sorted(self._children.items()):
+            lines.extend(self._collect_child(values, child))
+        return lines
+
+class _Value:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def _collect_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._callback: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self._default().inc(amount)
+
+    def dec(self, amount: float = 1.0):
+        self._default().dec(amount)
+
+    def set(self, value: float):
+        self._default().set(value)
+
+    def set_function(self, callback: Callable[[], Dict[Tuple[str, ...], float]]):
+        """Computes values at scrape time; callback returns {label_values: value}."""
+        self._callback = callback
+
+    @contextmanager
+    def track_inprogress(self, *values):
+        child = self.labels(*values)
+        child.inc()
+        try:
+            yield
+        finally:
+            child.dec()
+
+    def collect(self) -> List[str]:
+        if self._callback:
+            try:
+                for values, value in self._callback().items():
+                    self.labels(*values).set(value)
+            except Exception as e:
+                print(f"Error collecting gauge {self.name}: {e}")
+        return super().collect()
+
+    def _collect_child(self, values, child):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float):
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default().observe(value)
+
+    def time(self, *values):
+        return self.labels(*values).time()
+
+    def _collect_child(self, values, child):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+def counter(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+def gauge(name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+def histogram(name: str, documentation: str, labelnames: Iterable[str] = (),
+              buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+# --- Shared application metrics ---
+
+STAGE_LATENCY = histogram(
+    "unified_llm_stage_latency_seconds",
+    "Latency of hot-path stages (embedding, vector search, prompt building, LLM calls, extraction).",
+    ("stage",)
+)
+LLM_REQUESTS = counter("unified_llm_llm_requests_total", "LLM API calls by outcome.", ("status",))
+LLM_TOKENS = counter("unified_llm_llm_tokens_total", "LLM tokens reported by the API.", ("kind",))
+CACHE_REQUESTS = counter("unified_llm_cache_requests_total", "Cache lookups by cache and result.", ("cache", "result"))
+FACTS_WRITTEN = counter("unified_llm_facts_written_total", "Facts written to the vector store.", ("backend",))
+UPSERT_RETRIES = counter("unified_llm_upsert_retries_total", "Vector upsert batches retried after an error.")
+TEXTS_EMBEDDED = counter("unified_llm_texts_embedded_total", "Texts passed through the embedding model.")
+EXTRACTOR_MESSAGES = counter("unified_llm_extractor_messages_total", "Messages seen by the extractor by outcome.", ("outcome",))
+LLM_CALLS_AVOIDED = counter("unified_llm_llm_calls_avoided_total", "Extraction LLM calls saved by the local pre-filter.")
+PREFILTER_SHADOW_FACTS = counter("unified_llm_prefilter_shadow_facts_total", "Facts extracted in pre-filter shadow mode, by whether the pre-filter would have kept their message.", ("outcome",))
+FACTS_EXTRACTED = counter("unified_llm_facts_extracted_total", "Facts parsed from LLM extraction responses.")
+INDEX_SIZE = gauge("unified_llm_index_size", "Facts stored per namespace.", ("namespace",))
+INFLIGHT_REQUESTS = gauge("unified_llm_inflight_requests", "HTTP requests currently being handled.", ("endpoint",))
+CONTEXT_TOKENS = counter("unified_llm_context_tokens_total", "Estimated prompt context tokens, packed and saved by packing.", ("kind",))
+CONTEXT_FACTS = counter("unified_llm_context_facts_total", "Candidate facts by packing outcome.", ("outcome",))
+ADMISSION_ACTIVE = gauge("unified_llm_admission_active", "Requests holding an admission slot.", ("endpoint_class",))
+ADMISSION_QUEUE_DEPTH = gauge("unified_llm_admission_queue_depth", "Requests waiting for an admission slot.", ("endpoint_class",))
+ADMISSION_SHED = counter("unified_llm_admission_shed_total", "Requests rejected with 503 by admission control.", ("endpoint_class", "reason"))
+ADMISSION_WAIT = histogram("unified_llm_admission_wait_seconds", "Time spent queued for an admission slot.", ("endpoint_class",))
+SINGLEFLIGHT_CALLS = counter("unified_llm_singleflight_calls_total", "Coalesced calls by operation; shared calls reused an in-flight result.", ("operation", "role"))
+HTTP_LATENCY = histogram("unified_llm_http_request_duration_seconds", "HTTP request latency.", ("endpoint", "status"))
+
+def stage(name: str):
+    """Context manager timing one hot-path stage into STAGE_LATENCY."""
+    return STAGE_LATENCY.labels(name).time()
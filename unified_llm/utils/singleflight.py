@@ -0,0 +1,66 @@
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+from unified_llm.utils.metrics import SINGLEFLIGHT_CALLS
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution.
+
+    The first caller for a key (the leader) runs the work; callers that
+    arrive while it is in flight wait for it and get the same result or
+    exception. Nothing is kept once the call finishes, so this is not a
+    cache: keys should include whatever the result depends on (e.g. the
+    memory version) and results must be treated as read-only, since every
+    waiter receives the same object.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+        self._tasks: Dict[Tuple[int, Hashable], asyncio.Task] = {}
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Runs fn() unless a call with this key is already running in another thread."""
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+        SINGLEFLIGHT_CALLS.labels(self.name, "leader" if leader else "shared").inc()
+        if not leader:
+            return future.result()
+
+        try:
+            result = fn()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                self._calls.pop(key, None)
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Awaits fn() unless a call with this key is already running on this loop.
+
+        The work runs as its own task, so a caller that is cancelled (e.g.
+        the client disconnected) stops waiting without cancelling it for
+        the others.
+        """
+        task_key = (id(asyncio.get_running_loop()), key)
+        task = self._tasks.get(task_key)
+        leader = task is None
+        if leader:
+            task = self._tasks[task_key] = asyncio.ensure_future(fn())
+            task.add_done_callback(lambda _: self._tasks.pop(task_key, None))
+        SINGLEFLIGHT_CALLS.labels(self.name, "leader" if leader else "shared").inc()
+        return await asyncio.shield(task)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._calls) + len(self._tasks)